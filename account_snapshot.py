@@ -0,0 +1,143 @@
+"""
+Foto compartida de posiciones y órdenes abiertas de toda la cuenta.
+
+En cada refresco se piden todas las posiciones y órdenes abiertas linear con
+settleCoin=USDT (una petición de cada, más paginación) y se indexan por símbolo.
+Todos los lectores usan la misma foto; cada una lleva versión y marca de tiempo
+para que el lector sepa si sus datos están desactualizados.
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+
+def fetch_all(call, **params):
+    """Recorre nextPageCursor de un endpoint paginado de pybit y devuelve la lista completa"""
+    items = []
+    cursor = None
+    while True:
+        if cursor:
+            params["cursor"] = cursor
+        response = call(**params)
+        if response['retCode'] != 0:
+            raise RuntimeError(f"{response['retCode']}: {response['retMsg']}")
+        items.extend(response['result']['list'])
+        cursor = response['result'].get('nextPageCursor')
+        if not cursor:
+            return items
+
+
+class AccountSnapshot:
+    """
+    Posiciones y órdenes abiertas indexadas por símbolo.
+
+    refresh() hace la lectura masiva; start() la repite cada `interval` segundos en un
+    thread daemon. Los lectores consultan position()/open_orders() con max_age y
+    reciben None si la foto es más vieja que eso, para decidir si consultar por REST.
+    """
+
+    def __init__(self, session, interval=2.0, settle_coin="USDT", category="linear"):
+        self.session = session
+        self.interval = interval
+        self.settle_coin = settle_coin
+        self.category = category
+        self.version = 0
+        self.taken_at: Optional[float] = None  # Inicio de la lectura que generó la foto
+        self.updated_at: Optional[float] = None
+        self._positions: Dict[str, dict] = {}
+        self._orders: Dict[str, List[dict]] = {}
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        """Lee todas las posiciones y órdenes abiertas de la cuenta y publica una nueva versión"""
+        taken_at = time.monotonic()
+        positions = fetch_all(
+            self.session.get_positions,
+            category=self.category, settleCoin=self.settle_coin, limit=200,
+        )
+        orders = fetch_all(
+            self.session.get_open_orders,
+            category=self.category, settleCoin=self.settle_coin, limit=50,
+        )
+
+        by_symbol_positions = {p['symbol']: p for p in positions if Decimal(p['size']) != 0}
+        by_symbol_orders: Dict[str, List[dict]] = {}
+        for order in orders:
+            by_symbol_orders.setdefault(order['symbol'], []).append(order)
+
+        with self._updated:
+            self._positions = by_symbol_positions
+            self._orders = by_symbol_orders
+            self.version += 1
+            self.taken_at = taken_at
+            self.updated_at = time.monotonic()
+            self._updated.notify_all()
+        return self.version
+
+    # ---------- lectores ----------
+    def age(self):
+        """Segundos desde el último refresco (infinito si nunca se refrescó)"""
+        return float('inf') if self.updated_at is None else time.monotonic() - self.updated_at
+
+    def is_usable(self, max_age=None, since=None):
+        """
+        True si la foto tiene como mucho max_age segundos y, si se indica since
+        (time.monotonic()), si su lectura empezó después de ese instante
+        """
+        if self.taken_at is None:
+            return False
+        if max_age is not None and self.age() > max_age:
+            return False
+        return since is None or self.taken_at > since
+
+    def position(self, symbol, max_age=None, since=None):
+        """
+        Posición abierta del símbolo según la última foto.
+
+        Returns:
+            (posición o None, versión), o (None, None) si la foto no cumple max_age/since
+        """
+        with self._lock:
+            if not self.is_usable(max_age, since):
+                return None, None
+            return self._positions.get(symbol), self.version
+
+    def open_orders(self, symbol, max_age=None, since=None):
+        """Órdenes abiertas del símbolo: (lista, versión), o (None, None) si la foto no sirve"""
+        with self._lock:
+            if not self.is_usable(max_age, since):
+                return None, None
+            return list(self._orders.get(symbol, [])), self.version
+
+    def positions(self):
+        with self._lock:
+            return dict(self._positions), self.version
+
+    def wait_newer(self, version, timeout=None):
+        """Espera a que haya una foto posterior a `version`. Devuelve la versión actual"""
+        with self._updated:
+            self._updated.wait_for(lambda: self.version > version, timeout)
+            return self.version
+
+    # ---------- refresco en segundo plano ----------
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error al refrescar la foto de la cuenta: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,611 @@
+"""
+Runtime asyncio: cada símbolo es una tarea con su propia máquina de estados
+(idle → bracket armado → en posición → cerrado) y su propio ciclo de distancias.
+
+Todas las tareas comparten un cliente HTTP asíncrono con límite de concurrencia, un
+tablero de posiciones (una sola consulta settleCoin=USDT por intervalo para todos los
+símbolos) y un tablero de precios (una sola consulta de tickers de toda la categoría).
+Un cierre en un símbolo ya no retrasa el rearmado de otro, y un solo proceso atiende
+cientos de símbolos.
+
+Al arrancar concilia cada símbolo con el exchange (posiciones y órdenes abiertas) y con
+el último estado del journal, igual que restore_state del runtime de threads: un
+reinicio retoma el bracket o la posición en curso en lugar de armar otro encima.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from decimal import Decimal
+from enum import Enum
+from typing import Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from instruments import InstrumentRegistry, round_price
+from batch_orders import new_order_link_id
+from strategy import (
+    FIRST_CYCLE, StrategyParams, close_side, cycle_distance, next_cycle, percent_label,
+    quote_bracket, take_profit_price,
+)
+from transport import DUPLICATE_ORDER_LINK_ID, ORDER_NOT_EXISTS
+
+MAINNET_URL = "https://api.bybit.com"
+TESTNET_URL = "https://api-testnet.bybit.com"
+
+
+class BybitAPIError(Exception):
+    """Respuesta de Bybit con retCode distinto de 0"""
+
+    def __init__(self, response):
+        self.response = response
+        super().__init__(f"{response.get('retCode')}: {response.get('retMsg')}")
+
+
+# ==================== CLIENTE HTTP ASÍNCRONO ====================
+class AsyncBybitClient:
+    """
+    Cliente REST v5 asíncrono (aiohttp) con firma HMAC y límite de peticiones simultáneas.
+
+    Los métodos reciben los mismos parámetros que los de pybit y devuelven el JSON de Bybit.
+    """
+
+    def __init__(self, api_key, api_secret, testnet=False, max_concurrency=20, recv_window=5000, timeout=10):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = TESTNET_URL if testnet else MAINNET_URL
+        self.recv_window = str(recv_window)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.requests = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._http = None
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._http = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._http.close()
+
+    def _headers(self, payload):
+        timestamp = str(int(time.time() * 1000))
+        signature = hmac.new(
+            self.api_secret.encode(),
+            f"{timestamp}{self.api_key}{self.recv_window}{payload}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return {
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-SIGN": signature,
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-TIMESTAMP": timestamp,
+            "X-BAPI-RECV-WINDOW": self.recv_window,
+            "Content-Type": "application/json",
+        }
+
+    async def request(self, method, path, params=None, auth=True):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        async with self._semaphore:
+            self.requests += 1
+            if method == "GET":
+                query = urlencode(params)
+                headers = self._headers(query) if auth else {}
+                url = f"{self.base_url}{path}?{query}" if query else f"{self.base_url}{path}"
+                async with self._http.get(url, headers=headers) as response:
+                    return await response.json(content_type=None)
+            body = json.dumps(params)
+            async with self._http.post(f"{self.base_url}{path}", data=body, headers=self._headers(body)) as response:
+                return await response.json(content_type=None)
+
+    # ---------- endpoints usados por el bot ----------
+    async def get_instruments_info(self, **params):
+        return await self.request("GET", "/v5/market/instruments-info", params, auth=False)
+
+    async def get_tickers(self, **params):
+        return await self.request("GET", "/v5/market/tickers", params, auth=False)
+
+    async def get_positions(self, **params):
+        return await self.request("GET", "/v5/position/list", params)
+
+    async def get_open_orders(self, **params):
+        return await self.request("GET", "/v5/order/realtime", params)
+
+    async def get_closed_pnl(self, **params):
+        return await self.request("GET", "/v5/position/closed-pnl", params)
+
+    async def place_order(self, **params):
+        return await self.request("POST", "/v5/order/create", params)
+
+    async def place_batch_order(self, **params):
+        return await self.request("POST", "/v5/order/create-batch", params)
+
+    async def cancel_order(self, **params):
+        return await self.request("POST", "/v5/order/cancel", params)
+
+
+async def fetch_all_pages(call, **params):
+    """Recorre nextPageCursor y devuelve la lista completa"""
+    items = []
+    cursor = None
+    while True:
+        response = await call(**params, cursor=cursor)
+        if response.get('retCode') != 0:
+            raise BybitAPIError(response)
+        items.extend(response['result']['list'])
+        cursor = response['result'].get('nextPageCursor')
+        if not cursor:
+            return items
+
+
+# ==================== TABLEROS COMPARTIDOS ====================
+class PriceBoard:
+    """Últimos precios de toda la categoría; las consultas simultáneas comparten una sola petición"""
+
+    def __init__(self, client, max_age=1.0):
+        self.client = client
+        self.max_age = max_age
+        self.prices: Dict[str, Decimal] = {}
+        self.updated_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, symbol):
+        if time.monotonic() - self.updated_at > self.max_age:
+            async with self._lock:
+                if time.monotonic() - self.updated_at > self.max_age:
+                    response = await self.client.get_tickers(category="linear")
+                    if response.get('retCode') != 0:
+                        raise BybitAPIError(response)
+                    self.prices = {t['symbol']: Decimal(t['lastPrice']) for t in response['result']['list']}
+                    self.updated_at = time.monotonic()
+        return self.prices.get(symbol)
+
+
+class PositionBoard:
+    """
+    Posiciones de toda la cuenta, refrescadas por una única tarea.
+
+    Cada símbolo espera con wait_for() a que su posición cumpla una condición, sin
+    hacer peticiones propias.
+    """
+
+    def __init__(self, client, interval=2.0):
+        self.client = client
+        self.interval = interval
+        self.positions: Dict[str, dict] = {}
+        self.version = 0
+        self._condition = asyncio.Condition()
+
+    def size(self, symbol):
+        position = self.positions.get(symbol)
+        return Decimal(position['size']) if position else Decimal(0)
+
+    async def run(self):
+        while True:
+            try:
+                items = await fetch_all_pages(
+                    self.client.get_positions, category="linear", settleCoin="USDT", limit=200
+                )
+                positions = {p['symbol']: p for p in items if Decimal(p['size']) != 0}
+                async with self._condition:
+                    self.positions = positions
+                    self.version += 1
+                    self._condition.notify_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error al refrescar posiciones: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def wait_for(self, symbol, predicate):
+        """Espera a que predicate(posición o None) sea verdadero en un refresco nuevo"""
+        async with self._condition:
+            start = self.version
+            await self._condition.wait_for(
+                lambda: self.version > start and predicate(self.positions.get(symbol))
+            )
+            return self.positions.get(symbol)
+
+
+# ==================== ESTRATEGIA POR SÍMBOLO ====================
+class SymbolState(Enum):
+    IDLE = "idle"
+    ARMED = "armed"
+    IN_POSITION = "in_position"
+    CLOSED = "closed"
+
+
+class SymbolStrategy:
+    """
+    Máquina de estados de un símbolo: idle → armed → in_position → closed → idle
+
+    Args:
+        take_profit_mode: "attached" (TP adjunto a cada entrada) o "separate" (orden
+            reduce only tras el fill), como TAKE_PROFIT_MODE del bot
+        distance_for: función(symbol, ciclo) -> distancia (por defecto, la fija del ciclo)
+        on_transition: función(symbol, evento, órdenes activas o None, ciclo) que guarda
+            cada transición en el journal
+        on_close: función(symbol, etiqueta del ciclo) bloqueante que se llama (en un
+            thread) al cerrarse una posición, p. ej. para sincronizar el libro de PnL
+    """
+
+    def __init__(self, symbol, client, registry, prices, positions, params, notify, retry_delay=10,
+                 take_profit_mode="separate", distance_for=None, on_transition=None, on_close=None):
+        self.symbol = symbol
+        self.client = client
+        self.registry = registry
+        self.prices = prices
+        self.positions = positions
+        self.params = params
+        self.notify = notify
+        self.retry_delay = retry_delay
+        self.take_profit_mode = take_profit_mode
+        self.distance_for = distance_for
+        self.on_transition = on_transition
+        self.on_close = on_close
+        self.state = SymbolState.IDLE
+        self.cycle = FIRST_CYCLE
+        self.armed_distance = None
+        self.long_order_id = None
+        self.short_order_id = None
+        self.tp_order_link_id = None  # Fijo por posición: reintentar no duplica el take profit
+        self.missing_take_profit = False  # Posición restaurada sin TP: wait_fill lo coloca
+        self.opposite_cancelled = False
+
+    def distance(self):
+        if self.distance_for is not None:
+            return self.distance_for(self.symbol, self.cycle)
+        return cycle_distance(self.params, self.cycle)
+
+    # ---------- journal y conciliación ----------
+    def active(self):
+        """Órdenes activas con el formato de active_orders del bot (None sin bracket)"""
+        if not (self.long_order_id or self.short_order_id):
+            return None
+        active = {
+            'long_order_id': self.long_order_id,
+            'short_order_id': self.short_order_id,
+            'has_position': self.state == SymbolState.IN_POSITION,
+        }
+        if self.armed_distance is not None:
+            active.update({'cycle': percent_label(self.armed_distance), 'distance': str(self.armed_distance)})
+        return active
+
+    def record(self, event):
+        if self.on_transition is None:
+            return
+        try:
+            self.on_transition(self.symbol, event, self.active(), self.cycle)
+        except Exception as e:
+            print(f"Error al guardar el estado de {self.symbol}: {e}")
+
+    def restore(self, saved, cycle, position, orders):
+        """
+        Elige el estado inicial a partir del exchange y del último estado guardado
+
+        Args:
+            saved: órdenes activas del journal (o None)
+            cycle: ciclo guardado (o None)
+            position: posición abierta del símbolo (o None)
+            orders: órdenes abiertas del símbolo
+
+        Returns:
+            Lista de orderId a cancelar (restos de un bracket incompleto o la pierna
+            opuesta de una posición), o None si hay órdenes desconocidas y el símbolo
+            no debe operarse
+        """
+        if cycle:
+            self.cycle = cycle
+        saved = saved or {}
+        if saved.get('distance'):
+            self.armed_distance = Decimal(saved['distance'])
+        open_ids = {o['orderId'] for o in orders}
+        entries = [o for o in orders if not o.get('reduceOnly') and o.get('orderType') == "Limit"]
+        take_profits = [o for o in orders if o.get('reduceOnly')]
+        legs = [saved.get('long_order_id'), saved.get('short_order_id')]
+        if not any(legs):
+            # Sin registro: adoptar un bracket existente (una Buy y una Sell limit sin reduce only)
+            buys = [o['orderId'] for o in entries if o['side'] == "Buy"]
+            sells = [o['orderId'] for o in entries if o['side'] == "Sell"]
+            if len(buys) > 1 or len(sells) > 1 or (entries and not position and len(entries) != 2):
+                print(f"⚠️ {self.symbol}: {len(entries)} órdenes abiertas desconocidas, no se colocarán nuevas")
+                return None
+            legs = [buys[0] if buys else None, sells[0] if sells else None]
+        self.long_order_id, self.short_order_id = legs
+
+        if position:
+            # La pierna opuesta pudo quedar abierta si el bot se detuvo justo tras el fill
+            cancels = [o['orderId'] for o in entries if o['side'] != position['side']]
+            if take_profits:
+                print(f"♻️ {self.symbol}: posición con take profit restaurada")
+                self.tp_order_link_id = take_profits[0].get('orderLinkId')
+                self.state = SymbolState.IN_POSITION
+                self.record('restored')
+                return cancels
+            # Se ejecutó mientras el bot estaba detenido o se perdió el TP: wait_fill lo coloca
+            print(f"♻️ {self.symbol}: posición restaurada sin take profit, colocándolo")
+            self.missing_take_profit = True
+            self.state = SymbolState.ARMED
+            return cancels
+
+        if saved.get('has_position'):
+            # La posición se cerró mientras el bot estaba detenido
+            self.state = SymbolState.CLOSED
+            return []
+        legs = [leg for leg in legs if leg]
+        if legs and all(leg in open_ids for leg in legs):
+            print(f"♻️ {self.symbol}: bracket restaurado")
+            self.state = SymbolState.ARMED
+            self.record('restored')
+            return []
+        # Bracket incompleto o inexistente: cancelar lo que quede y volver a armar
+        self.long_order_id = self.short_order_id = None
+        self.state = SymbolState.IDLE
+        return [leg for leg in legs if leg in open_ids]
+
+    async def run(self):
+        handlers = {
+            SymbolState.IDLE: self.arm,
+            SymbolState.ARMED: self.wait_fill,
+            SymbolState.IN_POSITION: self.wait_close,
+            SymbolState.CLOSED: self.finish_cycle,
+        }
+        while True:
+            try:
+                self.state = await handlers[self.state]()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error en {self.symbol} ({self.state.value}): {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def arm(self):
+        """Coloca el bracket (long y short con stop loss) en una sola petición batch"""
+        price = await self.prices.get(self.symbol)
+        if price is None:
+            print(f"No se pudo obtener el precio actual de {self.symbol}")
+            await asyncio.sleep(self.retry_delay)
+            return SymbolState.IDLE
+
+        distance = self.distance()
+        quote = quote_bracket(
+            self.registry.get(self.symbol), price, distance, self.params.stop_loss,
+            self.params.take_profit, self.params.amount_usdt,
+        )
+        if not quote.qty_in_limits:
+            print(f"Cantidad {quote.quantity} fuera de los límites del instrumento {self.symbol}")
+            await asyncio.sleep(self.retry_delay)
+            return SymbolState.IDLE
+
+        legs = [
+            self._leg("Buy", quote.quantity, quote.long_entry, quote.long_stop, quote.long_take_profit),
+            self._leg("Sell", quote.quantity, quote.short_entry, quote.short_stop, quote.short_take_profit),
+        ]
+        response = await self.client.place_batch_order(category="linear", request=legs)
+        if response.get('retCode') != 0:
+            raise BybitAPIError(response)
+
+        orders = {o.get('orderLinkId'): o.get('orderId') or None for o in response['result']['list']}
+        self.long_order_id = orders.get(legs[0]['orderLinkId'])
+        self.short_order_id = orders.get(legs[1]['orderLinkId'])
+        if not (self.long_order_id or self.short_order_id):
+            print(f"❌ No se pudo colocar ninguna orden para {self.symbol}")
+            await asyncio.sleep(self.retry_delay)
+            return SymbolState.IDLE
+        # Las órdenes ya existen: un error de aquí en adelante no debe volver a armar
+        self.state = SymbolState.ARMED
+        self.armed_distance = distance
+        self.record('armed')
+
+        print(f"🎯 {self.symbol}: bracket {percent_label(distance)} en {legs[0]['price']} / {legs[1]['price']}")
+        self.notify(
+            f"<b>🎯 Órdenes colocadas para {self.symbol}</b>\n\n"
+            f"💰 Precio actual: <b>${price}</b>\n"
+            f"🟢 LONG: ${legs[0]['price']} (SL ${legs[0]['stopLoss']})\n"
+            f"🔴 SHORT: ${legs[1]['price']} (SL ${legs[1]['stopLoss']})"
+        )
+        return SymbolState.ARMED
+
+    def _leg(self, side, quantity, price, stop_loss, take_profit):
+        leg = {
+            'symbol': self.symbol,
+            'side': side,
+            'orderType': "Limit",
+            'qty': quantity,
+            'price': price,
+            'timeInForce': "GTC",
+            'stopLoss': stop_loss,
+            'slOrderType': "Market",
+            'slTriggerBy': "LastPrice",
+            'tpslMode': "Full",
+            'orderLinkId': new_order_link_id(side[0]),
+        }
+        if self.take_profit_mode == "attached":
+            # TP limit (modo Partial) que Bybit activa con el fill, como attach_take_profit del bot
+            leg.update({
+                'takeProfit': take_profit,
+                'tpLimitPrice': take_profit,
+                'tpOrderType': "Limit",
+                'tpTriggerBy': "LastPrice",
+                'tpslMode': "Partial",
+            })
+        return leg
+
+    async def wait_fill(self):
+        """
+        Espera la apertura de posición, cancela la orden opuesta y coloca el take profit
+        (en modo attached el TP ya viaja con la entrada, salvo en una posición restaurada sin él)
+
+        Si la cancelación o el take profit fallan se lanza el error: el símbolo sigue en
+        ARMED y run() lo reintenta tras retry_delay (sin repetir lo que ya se hizo)
+        """
+        position = await self.positions.wait_for(self.symbol, lambda p: p is not None)
+        side = position['side']
+        entry_price = Decimal(position['avgPrice'])
+        opposite = self.short_order_id if side == "Buy" else self.long_order_id
+        if opposite and not self.opposite_cancelled:
+            response = await self.client.cancel_order(category="linear", symbol=self.symbol, orderId=opposite)
+            # 110001: la orden ya no existe (cancelada en un intento anterior)
+            if response.get('retCode') not in (0, ORDER_NOT_EXISTS):
+                self.notify(
+                    f"<b>⚠️ {self.symbol}: no se pudo cancelar la orden opuesta</b>\n\n"
+                    f"🆔 {opposite}\n🔁 Se reintentará"
+                )
+                raise BybitAPIError(response)
+            self.opposite_cancelled = True
+
+        if self.take_profit_mode == "attached" and not self.missing_take_profit:
+            tp_text = "adjunto a la entrada"
+        else:
+            tp_price = take_profit_price(side, entry_price, self.params.take_profit)
+            tp_price = round_price(self.registry.get(self.symbol), tp_price)
+            if self.tp_order_link_id is None:
+                self.tp_order_link_id = new_order_link_id("T")
+            response = await self.client.place_order(
+                category="linear",
+                symbol=self.symbol,
+                side=close_side(side),
+                orderType="Limit",
+                qty=position['size'],
+                price=tp_price,
+                timeInForce="GTC",
+                reduceOnly=True,
+                orderLinkId=self.tp_order_link_id,
+            )
+            # 110072: un intento anterior ya lo colocó (p. ej. respuesta perdida por timeout)
+            if response.get('retCode') not in (0, DUPLICATE_ORDER_LINK_ID):
+                self.notify(
+                    f"<b>❌ Error al colocar Take Profit de {self.symbol}</b>\n\n"
+                    f"{response.get('retMsg')}\n🔁 Se reintentará"
+                )
+                raise BybitAPIError(response)
+            tp_text = f"${tp_price}"
+        # El take profit ya se envió: un error de aquí en adelante no debe colocar otro
+        self.state = SymbolState.IN_POSITION
+        self.missing_take_profit = False
+        self.record('position_opened')
+
+        emoji = "🟢" if side == "Buy" else "🔴"
+        self.notify(
+            f"<b>{emoji} ¡Posición abierta!</b>\n\n"
+            f"🪙 Símbolo: <b>{self.symbol}</b>\n"
+            f"💰 Precio entrada: <b>${entry_price}</b>\n"
+            f"🎯 Take Profit: <b>{tp_text}</b>"
+        )
+        return SymbolState.IN_POSITION
+
+    async def wait_close(self):
+        await self.positions.wait_for(self.symbol, lambda p: p is None)
+        return SymbolState.CLOSED
+
+    async def finish_cycle(self):
+        """Alterna el ciclo de distancia y espera antes de rearmar (sin afectar a otros símbolos)"""
+        closed_cycle = percent_label(self.armed_distance) if self.armed_distance is not None else None
+        self.cycle = next_cycle(self.cycle)
+        self.long_order_id = self.short_order_id = self.tp_order_link_id = None
+        self.armed_distance = None
+        self.missing_take_profit = self.opposite_cancelled = False
+        self.record('position_closed')
+        if self.on_close is not None:
+            try:
+                await asyncio.to_thread(self.on_close, self.symbol, closed_cycle)
+            except Exception as e:
+                print(f"Error al procesar el cierre de {self.symbol}: {e}")
+        self.notify(
+            f"<b>✅ Posición cerrada</b>\n\n"
+            f"🪙 Símbolo: <b>{self.symbol}</b>\n"
+            f"🔄 Siguiente ciclo: <b>{percent_label(self.distance())}</b>"
+        )
+        await asyncio.sleep(self.params.rearm_delay)
+        return SymbolState.IDLE
+
+
+# ==================== RUNTIME ====================
+async def reconcile(client, strategies, saved_orders, saved_cycles):
+    """
+    Concilia cada estrategia con una lectura masiva de posiciones y órdenes abiertas y
+    cancela los restos de brackets incompletos
+
+    Returns:
+        Las estrategias que pueden operarse (sin órdenes desconocidas)
+    """
+    positions = {
+        p['symbol']: p
+        for p in await fetch_all_pages(client.get_positions, category="linear", settleCoin="USDT", limit=200)
+        if Decimal(p['size']) != 0
+    }
+    orders: Dict[str, list] = {}
+    for order in await fetch_all_pages(client.get_open_orders, category="linear", settleCoin="USDT", limit=50):
+        orders.setdefault(order['symbol'], []).append(order)
+
+    ready = []
+    for strategy in strategies:
+        symbol = strategy.symbol
+        cancels = strategy.restore(
+            saved_orders.get(symbol), saved_cycles.get(symbol), positions.get(symbol), orders.get(symbol, [])
+        )
+        if cancels is None:
+            continue
+        for order_id in cancels:
+            response = await client.cancel_order(category="linear", symbol=symbol, orderId=order_id)
+            if response.get('retCode') != 0:
+                print(f"Error al cancelar la orden {order_id} de {symbol}: {response.get('retMsg')}")
+        ready.append(strategy)
+    return ready
+
+
+async def run_strategies(
+    symbols,
+    client: AsyncBybitClient,
+    params: StrategyParams,
+    notify: Callable[[str], None] = lambda mensaje: None,
+    position_interval: float = 2.0,
+    saved_orders: Optional[dict] = None,
+    saved_cycles: Optional[dict] = None,
+    **options,
+):
+    """
+    Carga instrumentos, concilia cada símbolo con el exchange y ejecuta una tarea por
+    símbolo hasta que se cancele
+
+    Args:
+        saved_orders, saved_cycles: último estado del journal (StateStore.load)
+        options: argumentos de SymbolStrategy (take_profit_mode, distance_for,
+            on_transition, on_close)
+    """
+    registry = InstrumentRegistry(None, symbols)
+    registry.load_from_list(
+        await fetch_all_pages(client.get_instruments_info, category="linear", limit=1000)
+    )
+    prices = PriceBoard(client)
+    positions = PositionBoard(client, interval=position_interval)
+
+    strategies = []
+    for symbol in symbols:
+        try:
+            registry.get(symbol)
+        except Exception:
+            print(f"⚠️ {symbol} no existe en la categoría linear, se omite")
+            continue
+        strategies.append(SymbolStrategy(symbol, client, registry, prices, positions, params, notify, **options))
+    strategies = await reconcile(client, strategies, saved_orders or {}, saved_cycles or {})
+
+    print(f"⚡ Runtime asyncio: {len(strategies)} símbolos, {client.max_concurrency} peticiones simultáneas")
+    tasks = [asyncio.create_task(positions.run())]
+    tasks += [asyncio.create_task(s.run(), name=s.symbol) for s in strategies]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def run_async_bot(api_key, api_secret, testnet, symbols, params, notify, max_concurrency=20, **options):
+    async with AsyncBybitClient(api_key, api_secret, testnet=testnet, max_concurrency=max_concurrency) as client:
+        await run_strategies(symbols, client, params, notify, **options)
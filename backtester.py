@@ -0,0 +1,287 @@
+"""
+Backtester offline de la estrategia de brackets con ciclos de distancia.
+
+Reproduce sobre datos históricos (trades o klines en CSV/Parquet) exactamente las
+reglas de strategy.py: bracket ±distancia con stop loss, take profit reduce only,
+cancelación de la pierna opuesta y alternancia de ciclos tras cada cierre.
+
+La búsqueda de ejecuciones es vectorizada con NumPy (se examinan bloques de precios
+de tamaño creciente en lugar de tick a tick) y los barridos de parámetros y símbolos
+se reparten en un pool de procesos.
+
+Uso:
+    python backtester.py data/LINKUSDT.csv --distance-1 0.005,0.01 --distance-2 0.025 \\
+        --stop-loss 0.01 --take-profit 0.02 --workers 8
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+from strategy import (
+    FIRST_CYCLE, StrategyParams, bracket_prices, cycle_distance, cycle_label, next_cycle,
+    order_quantity, take_profit_price,
+)
+
+MAKER_FEE = 0.0002  # Entradas y take profit (limit)
+TAKER_FEE = 0.00055  # Stop loss (market)
+
+TIMESTAMP_COLUMNS = ("timestamp", "ts", "time", "start", "open_time", "startTime")
+
+
+# ==================== CARGA DE DATOS ====================
+def _read_table(path):
+    """Lee un CSV (opcionalmente .gz) o Parquet y devuelve {columna: array}"""
+    if path.endswith(".parquet"):
+        import pandas as pd
+
+        frame = pd.read_parquet(path)
+        return {c: frame[c].to_numpy() for c in frame.columns}
+    try:
+        import pandas as pd
+
+        frame = pd.read_csv(path)
+        return {c: frame[c].to_numpy() for c in frame.columns}
+    except ImportError:
+        data = np.genfromtxt(path, delimiter=",", names=True, dtype=None, encoding="utf-8")
+        return {c: data[c] for c in data.dtype.names}
+
+
+def _timestamps_ms(columns):
+    for name in TIMESTAMP_COLUMNS:
+        if name in columns:
+            ts = np.asarray(columns[name], dtype=np.float64)
+            # Los volcados públicos de Bybit usan segundos; las klines, milisegundos
+            if ts.size and np.nanmax(ts) < 1e11:
+                ts = ts * 1000
+            return ts.astype(np.int64)
+    raise ValueError(f"No se encontró columna de tiempo ({', '.join(TIMESTAMP_COLUMNS)})")
+
+
+def expand_klines(ts, open_, high, low, close):
+    """
+    Convierte cada vela en cuatro precios dentro de su intervalo: O, L, H, C si la vela
+    es alcista y O, H, L, C si es bajista (el recorrido intravela más probable)
+    """
+    step = np.median(np.diff(ts)) if ts.size > 1 else 60_000
+    bullish = close >= open_
+    second = np.where(bullish, low, high)
+    third = np.where(bullish, high, low)
+    prices = np.column_stack((open_, second, third, close)).ravel()
+    offsets = (np.arange(4) * (step // 4)).astype(np.int64)
+    times = (ts[:, None] + offsets[None, :]).ravel()
+    return times, prices
+
+
+@lru_cache(maxsize=8)
+def load_series(path):
+    """
+    Carga una serie de precios ordenada: (timestamps en ms int64, precios float64).
+
+    Acepta trades (columna 'price') o klines (columnas open/high/low/close), o el
+    directorio de un símbolo del almacén local (market_data/klines/LINKUSDT).
+    """
+    if os.path.isdir(path):
+        from tick_store import TickStore, price_history
+
+        root, kind, symbol = path.rstrip(os.sep).rsplit(os.sep, 2)
+        if kind == "trades":
+            data = TickStore(root).load('trades', symbol, columns=['ts', 'price'])
+            return data['ts'], data['price']
+        return price_history(TickStore(root), symbol, None)
+    columns = _read_table(path)
+    ts = _timestamps_ms(columns)
+    if "price" in columns:
+        prices = np.asarray(columns["price"], dtype=np.float64)
+    elif {"open", "high", "low", "close"} <= set(columns):
+        ts, prices = expand_klines(
+            ts, *(np.asarray(columns[c], dtype=np.float64) for c in ("open", "high", "low", "close"))
+        )
+    else:
+        raise ValueError(f"{path}: se esperaba columna 'price' o columnas open/high/low/close")
+
+    order = np.argsort(ts, kind="stable")
+    return ts[order], prices[order]
+
+
+def symbol_from_path(path):
+    return os.path.basename(path).split(".")[0].split("_")[0].upper()
+
+
+# ==================== SIMULADOR ====================
+def first_index(prices, start, predicate, chunk=4096):
+    """Primer índice >= start donde predicate(bloque) es verdadero, o -1"""
+    n = prices.shape[0]
+    i = start
+    while i < n:
+        end = min(n, i + chunk)
+        hits = np.flatnonzero(predicate(prices[i:end]))
+        if hits.size:
+            return i + int(hits[0])
+        i = end
+        chunk *= 2
+    return -1
+
+
+@dataclass
+class BacktestResult:
+    symbol: str
+    params: StrategyParams
+    trades: int = 0
+    wins: int = 0
+    pnl: float = 0.0
+    fees: float = 0.0
+    max_drawdown: float = 0.0
+    pnl_by_cycle: Dict[str, float] = field(default_factory=dict)
+    trades_by_cycle: Dict[str, int] = field(default_factory=dict)
+    open_at_end: bool = False
+
+    @property
+    def hit_rate(self):
+        return self.wins / self.trades if self.trades else 0.0
+
+
+def simulate(ts, prices, params, symbol="", maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+    """
+    Recorre la serie aplicando la estrategia y devuelve un BacktestResult.
+
+    Supuestos: las órdenes limit se llenan a su precio al tocarse; el stop loss
+    (market) sale al precio del tick que lo dispara si hubo hueco; el take profit
+    (limit) sale a su precio; tras cada cierre se espera params.rearm_delay segundos.
+    """
+    result = BacktestResult(symbol=symbol, params=params)
+    net_pnls: List[float] = []
+    cycle = FIRST_CYCLE
+    start = 0
+    n = prices.shape[0]
+    rearm_ms = int(params.rearm_delay * 1000)
+
+    while start < n - 1:
+        reference = prices[start]
+        bracket = bracket_prices(reference, cycle_distance(params, cycle), params.stop_loss)
+        long_entry, short_entry = bracket.long_entry, bracket.short_entry
+
+        entry_index = first_index(
+            prices, start + 1, lambda p: (p <= long_entry) | (p >= short_entry)
+        )
+        if entry_index < 0:
+            break
+
+        if prices[entry_index] <= long_entry:
+            side, entry, stop = "Buy", long_entry, bracket.long_stop
+            target = take_profit_price(side, entry, params.take_profit)
+            exit_index = first_index(prices, entry_index + 1, lambda p: (p <= stop) | (p >= target))
+        else:
+            side, entry, stop = "Sell", short_entry, bracket.short_stop
+            target = take_profit_price(side, entry, params.take_profit)
+            exit_index = first_index(prices, entry_index + 1, lambda p: (p >= stop) | (p <= target))
+
+        if exit_index < 0:
+            result.open_at_end = True
+            break
+
+        tick = prices[exit_index]
+        hit_target = tick >= target if side == "Buy" else tick <= target
+        if hit_target:
+            exit_price, exit_fee = target, maker_fee
+        else:
+            exit_price = min(tick, stop) if side == "Buy" else max(tick, stop)
+            exit_fee = taker_fee
+
+        quantity = order_quantity(params.amount_usdt, reference)
+        gross = (exit_price - entry) * quantity if side == "Buy" else (entry - exit_price) * quantity
+        fees = (entry * maker_fee + exit_price * exit_fee) * quantity
+        net = gross - fees
+
+        result.trades += 1
+        result.wins += net > 0
+        result.fees += fees
+        net_pnls.append(net)
+        result.pnl_by_cycle[cycle] = result.pnl_by_cycle.get(cycle, 0.0) + net
+        result.trades_by_cycle[cycle] = result.trades_by_cycle.get(cycle, 0) + 1
+
+        cycle = next_cycle(cycle)
+        start = int(np.searchsorted(ts, ts[exit_index] + rearm_ms, side="left"))
+
+    if net_pnls:
+        equity = np.cumsum(net_pnls)
+        peaks = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+        result.pnl = float(equity[-1])
+        result.max_drawdown = float(np.max(peaks - equity))
+    return result
+
+
+# ==================== BARRIDOS EN PARALELO ====================
+def _run_job(job):
+    path, params, maker_fee, taker_fee = job
+    ts, prices = load_series(path)
+    return simulate(ts, prices, params, symbol_from_path(path), maker_fee, taker_fee)
+
+
+def run_backtests(paths, param_sets, workers=None, maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+    """Ejecuta cada combinación (archivo, parámetros) en un pool de procesos"""
+    jobs = [(path, params, maker_fee, taker_fee) for path in paths for params in param_sets]
+    if workers == 1 or len(jobs) == 1:
+        return [_run_job(job) for job in jobs]
+    # Los trabajos van ordenados por archivo: con bloques grandes cada proceso
+    # reutiliza la serie ya cargada en su caché
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_job, jobs, chunksize=chunksize))
+
+
+def parameter_grid(amount, distances_1, distances_2, stop_losses, take_profits, rearm_delay=5):
+    return [
+        StrategyParams(amount, d1, d2, sl, tp, rearm_delay)
+        for d1, d2, sl, tp in itertools.product(distances_1, distances_2, stop_losses, take_profits)
+    ]
+
+
+def format_result(result):
+    p = result.params
+    ciclos = ", ".join(
+        f"{cycle_label(p, c)}: {result.pnl_by_cycle.get(c, 0.0):+.2f} ({result.trades_by_cycle.get(c, 0)})"
+        for c in (FIRST_CYCLE, next_cycle(FIRST_CYCLE))
+    )
+    return (
+        f"{result.symbol:<12} d1={p.distance_1:<7g} d2={p.distance_2:<7g} sl={p.stop_loss:<7g} "
+        f"tp={p.take_profit:<7g} | trades={result.trades:<5} acierto={result.hit_rate:6.1%} "
+        f"pnl={result.pnl:+10.2f} fees={result.fees:8.2f} dd={result.max_drawdown:8.2f} | {ciclos}"
+    )
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtester de la estrategia de brackets con ciclos")
+    parser.add_argument("paths", nargs="+", help="Archivos CSV/Parquet de trades o klines (uno por símbolo)")
+    parser.add_argument("--amount", type=float, default=20)
+    parser.add_argument("--distance-1", type=_floats, default=[0.01])
+    parser.add_argument("--distance-2", type=_floats, default=[0.025])
+    parser.add_argument("--stop-loss", type=_floats, default=[0.01])
+    parser.add_argument("--take-profit", type=_floats, default=[0.02])
+    parser.add_argument("--rearm-delay", type=float, default=5)
+    parser.add_argument("--maker-fee", type=float, default=MAKER_FEE)
+    parser.add_argument("--taker-fee", type=float, default=TAKER_FEE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20, help="Resultados a mostrar (ordenados por PnL)")
+    args = parser.parse_args()
+
+    grid = parameter_grid(
+        args.amount, args.distance_1, args.distance_2, args.stop_loss, args.take_profit, args.rearm_delay
+    )
+    print(f"🧪 {len(args.paths)} archivos x {len(grid)} combinaciones de parámetros")
+    results = run_backtests(args.paths, grid, args.workers, args.maker_fee, args.taker_fee)
+    for result in sorted(results, key=lambda r: r.pnl, reverse=True)[:args.top]:
+        print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
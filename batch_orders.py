@@ -0,0 +1,91 @@
+"""
+Colocación, modificación y cancelación de órdenes por lotes (/v5/order/create-batch,
+/v5/order/amend-batch y /v5/order/cancel-batch).
+
+Cada petición lleva hasta BATCH_LIMIT órdenes; la respuesta se concilia pierna por
+pierna (result.list y retExtInfo.list vienen en el mismo orden que la petición).
+"""
+import os
+
+BATCH_LIMIT = 20  # Máximo de órdenes por petición batch en la categoría linear
+
+
+def new_order_link_id(prefix):
+    """orderLinkId único (máximo 36 caracteres) para identificar cada pierna"""
+    return f"{prefix}-{os.urandom(12).hex()}"
+
+
+def chunked(items, size=BATCH_LIMIT):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _leg_result(request, ok, order_id=None, msg=""):
+    return {
+        'symbol': request['symbol'],
+        'order_link_id': request.get('orderLinkId'),
+        'order_id': order_id,
+        'ok': ok,
+        'msg': msg,
+        'request': request,
+    }
+
+
+def reconcile_batch(requests, response):
+    """Convierte la respuesta batch en un resultado por pierna, en el orden de la petición"""
+    if response.get('retCode') != 0:
+        return [_leg_result(r, False, msg=response.get('retMsg', '')) for r in requests]
+
+    orders = response['result'].get('list', [])
+    statuses = (response.get('retExtInfo') or {}).get('list', [])
+    by_link_id = {o.get('orderLinkId'): o for o in orders if o.get('orderLinkId')}
+
+    results = []
+    for i, request in enumerate(requests):
+        status = statuses[i] if i < len(statuses) else {'code': 0, 'msg': 'OK'}
+        order = by_link_id.get(request.get('orderLinkId'))
+        if order is None and i < len(orders):
+            order = orders[i]
+        order_id = (order or {}).get('orderId') or None
+        ok = status.get('code', 0) == 0 and order_id is not None
+        results.append(_leg_result(request, ok, order_id, status.get('msg', '')))
+    return results
+
+
+def _send_chunks(call, requests, category, max_parallel):
+    def send(chunk):
+        try:
+            return reconcile_batch(chunk, call(category=category, request=chunk))
+        except Exception as e:
+            return [_leg_result(r, False, msg=str(e)) for r in chunk]
+
+    chunks = list(chunked(requests))
+    if len(chunks) <= 1 or max_parallel <= 1:
+        return [leg for chunk in chunks for leg in send(chunk)]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(chunks))) as pool:
+        return [leg for legs in pool.map(send, chunks) for leg in legs]
+
+
+def place_batch_orders(session, orders, category="linear", max_parallel=1):
+    """
+    Coloca una lista de órdenes (dicts con los campos de place_order) por lotes.
+
+    Devuelve un resultado por orden: {'symbol', 'order_link_id', 'order_id', 'ok', 'msg', 'request'}
+    """
+    for order in orders:
+        order.setdefault('orderLinkId', new_order_link_id(order['side'][0]))
+    return _send_chunks(session.place_batch_order, orders, category, max_parallel)
+
+
+def cancel_batch_orders(session, cancels, category="linear", max_parallel=1):
+    """Cancela una lista de (symbol, order_id) por lotes. Devuelve un resultado por orden"""
+    requests = [{'symbol': symbol, 'orderId': order_id} for symbol, order_id in cancels]
+    return _send_chunks(session.cancel_batch_order, requests, category, max_parallel)
+
+
+def amend_batch_orders(session, amends, category="linear", max_parallel=1):
+    """Modifica una lista de órdenes (dicts con symbol, orderId y los campos a cambiar) por lotes"""
+    return _send_chunks(session.amend_batch_order, amends, category, max_parallel)
@@ -0,0 +1,155 @@
+"""
+Benchmark del bot contra el exchange simulado (exchange_sim.py), sin cuenta real.
+
+Para cada cantidad de símbolos arma todos los brackets y luego avanza el mercado paso
+a paso; en cada paso ejecuta una pasada del modo polling (foto de la cuenta, aperturas,
+cierres y rearme en lote) y mide:
+
+- órdenes/s al armar todos los brackets
+- latencia ejecución -> take profit (p50/p99, medida del lado del exchange). Por
+  defecto el bot coloca el TP tras el fill (--take-profit-mode separate); con
+  --take-profit-mode attached el TP viaja con la entrada y no hay latencia que medir
+- llamadas REST por ciclo completo (apertura + cierre + rearme)
+
+Cada paso cuenta como un segundo y su precio alimenta los estimadores de volatilidad
+del bot, así --distance-policy ewma|atr mide también su costo por tick. Con --requote
+el mismo precio pasa por la re-cotización (amend en lote al final de cada paso).
+
+Uso:
+    python benchmark.py --symbols 1,10,100,500 --steps 300 --latency 0.002
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import tempfile
+import time
+
+import bybit_bot as bot
+from account_snapshot import AccountSnapshot
+from exchange_sim import ExchangeSimulator
+from instruments import InstrumentRegistry
+from state_store import StateStore
+from trade_ledger import TradeLedger
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def format_ms(seconds):
+    """Segundos como ms con 2 decimales ("-" si no hay muestras)"""
+    return "-" if math.isnan(seconds) else f"{seconds * 1000:.2f}"
+
+
+def setup(symbols, steps, latency, volatility, rate_limited, state_dir, distance_policy="fixed"):
+    """Apunta el bot a un simulador nuevo con `symbols` y estado vacío"""
+    sim = ExchangeSimulator.synthetic(symbols, steps=steps + 1, volatility=volatility, latency=latency)
+    bot.SYMBOLS = list(symbols)
+    bot.instrument_registry = InstrumentRegistry(None, symbols)
+    bot.account_snapshot = AccountSnapshot(None)
+    bot.price_cache.symbols = list(symbols)
+    bot.price_cache.max_age = 0  # Sin stream público: cada bracket pide el precio del paso actual
+    bot.price_cache.reset()
+    bot.active_orders.clear()
+    bot.cycle_control.clear()
+    bot.volatility.symbols.clear()
+    bot.distance_policy = bot.make_distance_policy(distance_policy)
+    bot.requoter.reset()
+    bot.state_store = StateStore(os.path.join(state_dir, f"bench_{len(symbols)}.db"))
+    bot.trade_ledger = TradeLedger(
+        None, os.path.join(state_dir, f"ledger_{len(symbols)}"), cycle_for=bot.ledger_cycle
+    )
+    bot.use_session(sim, rate_limited=rate_limited)
+    bot.instrument_registry.load()
+    return sim
+
+
+def run(count, steps, latency, volatility, rate_limited, state_dir, distance_policy="fixed", requote=False):
+    symbols = [f"SIM{i:03d}USDT" for i in range(count)]
+    sim = setup(symbols, steps, latency, volatility, rate_limited, state_dir, distance_policy)
+    sim.reset_counters()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        armed = bot.rearm_symbols(symbols)
+        arm_seconds = time.perf_counter() - start
+        arm_calls = sum(sim.calls.values())
+
+        sim.reset_counters()
+        start = time.perf_counter()
+        for t in range(steps):
+            if not sim.step():
+                break
+            for symbol, market in sim.markets.items():
+                bot.volatility.update(symbol, market.last, t)
+                if requote:
+                    bot.requoter.update(symbol, market.last, t)
+            if requote:
+                bot.requoter.flush()
+            bot.account_snapshot.refresh()
+            bot.scan_opened_positions()
+            closed = bot.scan_closed_positions()
+            if closed:
+                bot.rearm_symbols(closed)
+        loop_seconds = time.perf_counter() - start
+
+    calls = sum(sim.calls.values())
+    return {
+        'symbols': count,
+        'armed': len(armed),
+        'orders_per_s': 2 * len(armed) / arm_seconds if arm_seconds else 0.0,
+        'arm_calls': arm_calls,
+        'fills': sim.fills,
+        'cycles': sim.closes,
+        'fill_to_tp_p50': percentile(sim.fill_to_tp, 0.5),
+        'fill_to_tp_p99': percentile(sim.fill_to_tp, 0.99),
+        'calls_per_cycle': calls / sim.closes if sim.closes else float('nan'),
+        'step_ms': loop_seconds / steps * 1000,
+        'requotes': bot.requoter.requotes,
+        'calls': dict(sim.calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del bot contra el exchange simulado")
+    parser.add_argument("--symbols", default="1,10,50,100,500", help="Cantidades de símbolos separadas por coma")
+    parser.add_argument("--steps", type=int, default=300, help="Pasos de precio por corrida")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada por llamada REST (s)")
+    parser.add_argument("--volatility", type=float, default=0.003, help="Volatilidad por paso del random walk")
+    parser.add_argument("--rate-limit", action="store_true", help="Pasar por el limitador de peticiones real")
+    parser.add_argument("--distance-policy", default="fixed", choices=("fixed", "ewma", "atr"))
+    parser.add_argument("--requote", action="store_true", help="Re-cotizar brackets cuando el precio se aleja")
+    parser.add_argument(
+        "--take-profit-mode", default="separate", choices=("attached", "separate"),
+        help="TP adjunto a la entrada o colocado por el bot tras el fill (solo este mide tp p50/p99)",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Mostrar llamadas por endpoint")
+    args = parser.parse_args()
+    bot.TAKE_PROFIT_MODE = args.take_profit_mode
+
+    if args.take_profit_mode == "attached":
+        print("Nota: TP adjunto a la entrada, el exchange lo activa en el fill: tp p50/p99 no aplican (-)")
+    print(
+        f"{'símbolos':>8} {'órdenes/s':>10} {'fills':>6} {'ciclos':>6} {'tp p50 ms':>10} "
+        f"{'tp p99 ms':>10} {'REST/ciclo':>10} {'ms/paso':>8} {'amends':>7}"
+    )
+    with tempfile.TemporaryDirectory() as state_dir:
+        for count in (int(c) for c in args.symbols.split(",")):
+            r = run(count, args.steps, args.latency, args.volatility, args.rate_limit, state_dir, args.distance_policy, args.requote)
+            print(
+                f"{r['symbols']:>8} {r['orders_per_s']:>10.1f} {r['fills']:>6} {r['cycles']:>6} "
+                f"{format_ms(r['fill_to_tp_p50']):>10} {format_ms(r['fill_to_tp_p99']):>10} "
+                f"{r['calls_per_cycle']:>10.1f} {r['step_ms']:>8.2f} {r['requotes']:>7}"
+            )
+            if args.verbose:
+                print(f"         {r['calls']}")
+            bot.state_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,25 @@
 import config
+import os
 import time
-from pybit.unified_trading import HTTP
-from decimal import Decimal, ROUND_DOWN, ROUND_FLOOR
+from collections import deque
+from decimal import Decimal
 import threading
-import telebot
-from typing import Dict, Optional
-
-# Inicializar sesión de Bybit
-session = HTTP(
-    testnet=config.TESTNET,
-    api_key=config.api_key,
-    api_secret=config.api_secret,
+from instruments import InstrumentRegistry, round_price, round_qty, qty_within_limits
+from ws_client import private_url, public_url
+from batch_orders import new_order_link_id, place_batch_orders, cancel_batch_orders, amend_batch_orders
+from notifier import TelegramNotifier
+from rate_limiter import RateLimitedSession
+from account_snapshot import AccountSnapshot
+from lazy import Lazy, is_created
+from requote import Requoter
+from volatility import FixedCyclePolicy, VolatilityPolicy, VolatilityTracker
+from transport import (
+    RetryingSession, configure_http, install_dns_cache, pool_stats, start_keepalive, warm_up,
+)
+from metrics import InstrumentedSession, metrics, profiler, start_metrics_server
+from strategy import (
+    FIRST_CYCLE, StrategyParams, close_side, cycle_label,
+    next_cycle, percent_label, quote_bracket, take_profit_price,
 )
 
 # ==================== CONFIGURACIÓN DEL BOT ====================
@@ -20,33 +29,244 @@ DISTANCE_1_PERCENTAGE = Decimal(1) / Decimal(100)  # 1% de distancia primer cicl
 DISTANCE_2_PERCENTAGE = Decimal(2.5) / Decimal(100)  # 2.5% de distancia segundo ciclo
 STOP_LOSS_PERCENTAGE = Decimal(1) / Decimal(100)  # 1% de stop loss
 TAKE_PROFIT_PERCENTAGE = Decimal(2) / Decimal(100)  # 1% de take profit
+REARM_DELAY = 5  # Segundos entre un cierre y las nuevas órdenes
+PNL_FOLLOWUP_DELAY = 10  # Segundos tras un cierre para volver a leer el PnL cerrado (Bybit lo publica con demora)
+INSTRUMENTS_TTL = 3600  # Segundos entre refrescos de tickSize/qtyStep
+EXECUTION_MODE = "websocket"  # "websocket" (streams privados) o "polling" (threads de respaldo)
+WS_PRIVATE_URL = None  # None = URL oficial según TESTNET (permite usar un servidor WebSocket local)
+WS_CONNECT_TIMEOUT = 10  # Segundos para conectar antes de pasar a polling
+WS_MAX_RECONNECTS = 5  # Reconexiones fallidas seguidas antes de pasar a polling
+WS_REARM_DELAY = 1  # Pausa antes de volver a colocar órdenes tras un cierre (modo WebSocket)
+BATCH_MAX_PARALLEL = 4  # Peticiones batch simultáneas al rearmar muchos símbolos
+INITIAL_ARM_PARALLEL = 16  # Peticiones batch simultáneas en el armado inicial
+TELEGRAM_INTERVAL = 2  # Segundos en los que se agrupan los mensajes de Telegram
+TELEGRAM_MAX_QUEUE = 1000  # Mensajes pendientes como máximo (el resto se descarta)
+TELEGRAM_FLUSH_TIMEOUT = 10  # Segundos para vaciar la cola al detener el bot
+RUNTIME = "threads"  # "threads" (threads de monitoreo) o "asyncio" (una tarea por símbolo)
+ASYNC_MAX_CONCURRENCY = 20  # Peticiones REST simultáneas en el runtime asyncio
+SNAPSHOT_INTERVAL = 2  # Segundos entre lecturas de posiciones/órdenes de toda la cuenta
+SNAPSHOT_MAX_AGE = 6  # Antigüedad máxima de la foto antes de consultar por REST
+PRICE_MAX_AGE = 2  # Segundos tras los que un precio del stream se considera viejo (se usa REST)
+WS_PUBLIC_URL = None  # None = URL oficial según TESTNET
+STATE_DB = "bot_state.db"  # Journal de estado (SQLite WAL) para reinicios sin duplicar órdenes
+JOURNAL_KEEP = 10000  # Transiciones que se conservan en el journal al compactarlo
+JOURNAL_COMPACT_INTERVAL = 3600  # Segundos entre compactaciones del journal
+LEDGER_PATH = "ledger"  # Directorio del libro de operaciones (PnL cerrado y ejecuciones)
+METRICS_PORT = 9108  # Puerto local de /metrics, /latency y /profile (None = desactivado)
+TAKE_PROFIT_MODE = "attached"  # "attached" (TP limit adjunto a cada entrada) o "separate" (orden reduce only tras el fill)
+PROFILER_ENABLED = False  # Iniciar el perfilador por muestreo al arrancar (también vía /profile?enable=1)
+DISTANCE_POLICY = "fixed"  # "fixed" (DISTANCE_1/DISTANCE_2), "ewma" o "atr" (distancia según la volatilidad)
+VOLATILITY_MULTIPLIERS = {'distance_1': 1.0, 'distance_2': 2.5}  # Volatilidades de distancia por ciclo
+VOLATILITY_HALFLIFE = 600  # Vida media en segundos de la volatilidad EWMA
+VOLATILITY_HORIZON = 3600  # Horizonte en segundos de la sigma EWMA usada como unidad de distancia
+ATR_BAR_SECONDS = 60  # Duración de las velas del ATR (armadas con los ticks)
+ATR_PERIOD = 14  # Velas del ATR de Wilder
+VOLATILITY_MIN_SAMPLES = 50  # Ticks (EWMA) o velas (ATR) antes de usar la volatilidad
+DISTANCE_MIN = Decimal("0.002")  # Límites de la distancia adaptativa
+DISTANCE_MAX = Decimal("0.1")
+REQUOTE_ENABLED = False  # Mover ambas piernas (amend) cuando el precio se aleja del bracket (cambia cuándo se ejecutan)
+REQUOTE_TRIGGER = 0.5  # Deriva, en distancias del bracket, que activa la re-cotización
+REQUOTE_RELEASE = 0.25  # Deriva por debajo de la cual se desactiva (histéresis)
+REQUOTE_DWELL = 2  # Segundos que la deriva debe mantenerse antes de modificar
+REQUOTE_BUDGET = 6  # Modificaciones por símbolo cada REQUOTE_BUDGET_WINDOW segundos
+REQUOTE_BUDGET_WINDOW = 60
+HTTP_TIMEOUT = 10  # Segundos por petición REST
+HTTP_POOL_SIZE = 32  # Conexiones persistentes por host (>= threads que llaman al REST a la vez)
+HTTP_RETRIES = 3  # Intentos por llamada ante errores transitorios (red, 5xx, 10000, 10016)
+HTTP_RETRY_DELAY = 0.2  # Espera base (exponencial con jitter) entre intentos
+HTTP_KEEPALIVE_INTERVAL = 30  # Segundos entre consultas que mantienen vivas las conexiones (None = no)
+DNS_CACHE_TTL = 300  # Segundos que se reutiliza la resolución DNS de los hosts de Bybit
+REARM_RETRY_INTERVAL = 30  # Segundos entre reintentos de los símbolos que quedaron sin bracket
+TICK_STORE_PATH = "market_data"  # Almacén local de historial (downloader.py); None = no precargar
+WARM_START_HOURS = 6  # Horas de historial con las que se precarga la volatilidad al arrancar
+
+# Los clientes (sesión de pybit, Telegram, journal, libro y stream de precios) se crean
+# al primer uso: importar el módulo no carga los SDK ni abre conexiones ni archivos
+def make_http_client():
+    """Sesión HTTP de pybit con pool de conexiones persistentes (transport.py)"""
+    from pybit.unified_trading import HTTP
+
+    install_dns_cache(DNS_CACHE_TTL)
+    return configure_http(HTTP(
+        testnet=config.TESTNET,
+        api_key=config.api_key,
+        api_secret=config.api_secret,
+        return_response_headers=True,
+        timeout=HTTP_TIMEOUT,
+    ), pool_maxsize=HTTP_POOL_SIZE)
+
+def make_session(http, rate_limited=True):
+    """
+    Reintentos con jitter sobre el limitador de peticiones, que lee las cabeceras de
+    límite de cada respuesta; cada llamada REST se mide en metrics
+    """
+    wrapped = InstrumentedSession(http, metrics)
+    return RetryingSession(
+        RateLimitedSession(wrapped) if rate_limited else wrapped,
+        attempts=HTTP_RETRIES,
+        base_delay=HTTP_RETRY_DELAY,
+    )
+
+http_client = Lazy(make_http_client)
+session = Lazy(lambda: make_session(http_client))
+
+def transport_samples():
+    """Reutilización de conexiones y reintentos para /metrics"""
+    if not is_created(session):
+        return []
+    stats = pool_stats(http_client)
+    samples = [
+        ("rest_connections_opened", {}, stats['connections']),
+        ("rest_requests_sent", {}, stats['requests']),
+    ]
+    return samples + session.metric_samples()
+
+metrics.add_collector(transport_samples)
+
+STRATEGY = StrategyParams(
+    amount_usdt=AMOUNT_USDT,
+    distance_1=DISTANCE_1_PERCENTAGE,
+    distance_2=DISTANCE_2_PERCENTAGE,
+    stop_loss=STOP_LOSS_PERCENTAGE,
+    take_profit=TAKE_PROFIT_PERCENTAGE,
+    rearm_delay=REARM_DELAY,
+)
+
+# Especificaciones de instrumentos (una carga masiva al iniciar, sin REST al ordenar)
+instrument_registry = InstrumentRegistry(session, SYMBOLS, ttl=INSTRUMENTS_TTL)
+
+# Foto compartida de posiciones y órdenes abiertas (una lectura para todos los símbolos)
+account_snapshot = AccountSnapshot(session, interval=SNAPSHOT_INTERVAL)
+
+# Volatilidad por símbolo actualizada con cada tick del stream (sin REST)
+volatility = VolatilityTracker(VOLATILITY_HALFLIFE, ATR_BAR_SECONDS, ATR_PERIOD)
+
+def make_price_cache():
+    """Precios desde el stream público de tickers (respaldo por REST si está viejo)"""
+    from price_feed import PriceCache
+
+    cache = PriceCache(session, SYMBOLS, WS_PUBLIC_URL or public_url(config.TESTNET), max_age=PRICE_MAX_AGE)
+    cache.add_listener(volatility.on_price)
+    if REQUOTE_ENABLED:
+        cache.add_listener(requoter.on_price)
+    return cache
+
+price_cache = Lazy(make_price_cache)
+
+def make_distance_policy(name=None):
+    """Política de distancia del bracket según DISTANCE_POLICY"""
+    name = name or DISTANCE_POLICY
+    if name == "fixed":
+        return FixedCyclePolicy()
+    return VolatilityPolicy(
+        volatility,
+        VOLATILITY_MULTIPLIERS,
+        estimator=name,
+        horizon=VOLATILITY_HORIZON,
+        min_distance=DISTANCE_MIN,
+        max_distance=DISTANCE_MAX,
+        min_samples=VOLATILITY_MIN_SAMPLES,
+    )
+
+distance_policy = make_distance_policy()
 
 # Telegram Bot
 bot_token = config.token_telegram
-bot = telebot.TeleBot(bot_token)
 chat_id = config.chat_id
 
+def make_telegram_bot():
+    import telebot
+
+    return telebot.TeleBot(bot_token)
+
+bot = Lazy(make_telegram_bot)
+
+def make_state_store():
+    """Journal persistente de transiciones de estado"""
+    from state_store import StateStore
+
+    return StateStore(STATE_DB)
+
+state_store = Lazy(make_state_store)
+
 # Control de órdenes activas y ciclos
 active_orders = {}  # {symbol: {'long_order_id': '', 'short_order_id': '', 'has_position': False}}
 cycle_control = {}  # {symbol: 'distance_1' o 'distance_2'} para alternar distancias
+pending_rearm = set()  # Símbolos que quedaron sin bracket por un error (se reintentan)
+unmatched_positions = set()  # Símbolos con posición notificada antes de registrar su bracket
+bracket_lock = threading.Lock()  # Registro de brackets frente a los eventos del stream privado
+execution_engine = None  # Motor WebSocket en marcha (None en modo polling)
+polling_started = False
+
+# Libro de operaciones: cada cierre queda etiquetado con el ciclo con el que se armó
+CLOSE_CLOCK_SKEW_MS = 1000  # Margen entre el reloj del exchange y el del bot al comparar cierres
+closed_cycles = {}  # {symbol: deque[(cierre detectado en ms, ciclo del bracket cerrado)]}
+
+def ledger_cycle(symbol, ts):
+    """
+    Ciclo del bracket al que pertenece una operación de `symbol` con marca `ts` (ms): el
+    del primer cierre detectado después de ts o, si ninguno, el del bracket en curso
+    
+    Así un cierre que Bybit publica tarde no se atribuye al ciclo siguiente.
+    """
+    for closed_at, cycle in list(closed_cycles.get(symbol, ())):
+        if ts <= closed_at + CLOSE_CLOCK_SKEW_MS:
+            return cycle
+    return active_orders.get(symbol, {}).get('cycle')
+
+def remember_closed_cycle(symbol, cycle=None):
+    """
+    Anota el ciclo del bracket que se acaba de cerrar (por defecto, el de active_orders)
+    para etiquetar su PnL aunque llegue tarde
+    """
+    if cycle is None:
+        cycle = active_orders.get(symbol, {}).get('cycle')
+    closed_cycles.setdefault(symbol, deque(maxlen=20)).append((int(time.time() * 1000), cycle))
+
+def make_trade_ledger():
+    from trade_ledger import TradeLedger
+
+    return TradeLedger(session, LEDGER_PATH, cycle_for=ledger_cycle)
+
+trade_ledger = Lazy(make_trade_ledger)
+metrics.add_collector(lambda: trade_ledger.metric_samples() if is_created(trade_ledger) else [])
+
+def use_session(http_session, rate_limited=True):
+    """
+    Sustituye la sesión REST del bot (p. ej. por exchange_sim.ExchangeSimulator)
+    
+    La nueva sesión se instrumenta y se reintenta igual que la de pybit y la comparten
+    el registro de instrumentos, la foto de la cuenta y la caché de precios.
+    """
+    global session, http_client
+    http_client = http_session
+    session = make_session(http_session, rate_limited)
+    instrument_registry.session = session
+    account_snapshot.session = session
+    # Los que todavía no se crearon tomarán la sesión nueva al crearse
+    for client in (price_cache, trade_ledger):
+        if is_created(client):
+            client.session = session
+    return session
 
 # ==================== FUNCIONES DE TELEGRAM ====================
+def _send_telegram(texto):
+    with metrics.span("telegram_send"):
+        bot.send_message(chat_id, texto, parse_mode='HTML')
+
+# Cola de envío en segundo plano: los threads de trading nunca esperan a Telegram
+notifier = TelegramNotifier(_send_telegram, interval=TELEGRAM_INTERVAL, max_queue=TELEGRAM_MAX_QUEUE)
+
 def enviar_mensaje_telegram(mensaje):
-    """Envía mensaje a Telegram"""
-    try:
-        bot.send_message(chat_id, mensaje, parse_mode='HTML')
-    except Exception as e:
-        print(f"Error al enviar mensaje a Telegram: {e}")
+    """Encola un mensaje para Telegram (no bloquea)"""
+    notifier.notify(mensaje)
 
 # ==================== FUNCIONES AUXILIARES ====================
 def adjust_price(symbol, price):
     """Ajusta el precio según el tick size del símbolo"""
     try:
-        instrument_info = session.get_instruments_info(category="linear", symbol=symbol)
-        tick_size = Decimal(instrument_info['result']['list'][0]['priceFilter']['tickSize'])
-        price_decimal = Decimal(str(price))
-        adjusted_price = (price_decimal / tick_size).quantize(Decimal('1'), rounding=ROUND_FLOOR) * tick_size
-        return str(adjusted_price)
+        with metrics.span("rounding"):
+            return round_price(instrument_registry.get(symbol), price)
     except Exception as e:
         print(f"Error al ajustar el precio para {symbol}: {e}")
         return str(price)
@@ -54,50 +274,55 @@ def adjust_price(symbol, price):
 def adjust_quantity(symbol, quantity):
     """Ajusta la cantidad según el qty step del símbolo"""
     try:
-        instrument_info = session.get_instruments_info(category="linear", symbol=symbol)
-        qty_step = Decimal(instrument_info['result']['list'][0]['lotSizeFilter']['qtyStep'])
-        quantity_decimal = Decimal(str(quantity))
-        
-        # Redondear hacia abajo según el qty_step
-        adjusted_qty = (quantity_decimal / qty_step).quantize(Decimal('1'), rounding=ROUND_FLOOR) * qty_step
-        
-        # Determinar el número de decimales
-        qty_step_str = str(qty_step)
-        if '.' in qty_step_str:
-            decimals = len(qty_step_str.split('.')[1])
-            return str(round(float(adjusted_qty), decimals))
-        else:
-            return str(int(adjusted_qty))
+        with metrics.span("rounding"):
+            return round_qty(instrument_registry.get(symbol), quantity)
     except Exception as e:
         print(f"Error al ajustar cantidad para {symbol}: {e}")
         return str(quantity)
 
-def get_current_price(symbol):
-    """Obtiene el precio actual del mercado"""
+def get_price_snapshot(symbol):
+    """Obtiene la foto de precios (last, bid, ask, mark) del stream, o por REST si está vieja"""
     try:
-        tickers = session.get_tickers(symbol=symbol, category="linear")
-        last_price = Decimal(tickers["result"]["list"][0]["lastPrice"])
-        return last_price
+        with metrics.span("price_fetch"):
+            return price_cache.get(symbol)
     except Exception as e:
         print(f"Error al obtener precio actual de {symbol}: {e}")
         return None
 
-def calculate_quantity(symbol, amount_usdt):
-    """Calcula la cantidad a operar basado en el monto en USDT"""
+def get_current_price(symbol):
+    """Obtiene el precio actual del mercado"""
+    snapshot = get_price_snapshot(symbol)
+    return snapshot.last if snapshot else None
+
+def calculate_quantity(symbol, amount_usdt, current_price=None):
+    """
+    Calcula la cantidad a operar basado en el monto en USDT
+    
+    Si se pasa current_price se usa ese precio, para que la cantidad y los precios
+    de las órdenes salgan de la misma foto
+    """
     try:
-        current_price = get_current_price(symbol)
+        if current_price is None:
+            current_price = get_current_price(symbol)
         if current_price is None:
             return None
         
         quantity = amount_usdt / current_price
         adjusted_qty = adjust_quantity(symbol, quantity)
+        if not qty_within_limits(instrument_registry.get(symbol), adjusted_qty):
+            print(f"Cantidad {adjusted_qty} fuera de los límites del instrumento {symbol}")
+            return None
         return adjusted_qty
     except Exception as e:
         print(f"Error al calcular cantidad para {symbol}: {e}")
         return None
 
-def get_open_orders(symbol):
-    """Obtiene las órdenes abiertas de un símbolo"""
+def get_open_orders(symbol, since=None):
+    """Obtiene las órdenes abiertas de un símbolo (de la foto compartida si está al día)"""
+    orders, version = account_snapshot.open_orders(symbol, max_age=SNAPSHOT_MAX_AGE, since=since)
+    if version is not None:
+        return orders
+    
     try:
         response = session.get_open_orders(category="linear", symbol=symbol)
         if response['retCode'] == 0:
@@ -107,8 +332,17 @@ def get_open_orders(symbol):
         print(f"Error al obtener órdenes abiertas de {symbol}: {e}")
         return []
 
-def get_position(symbol):
-    """Obtiene la posición actual de un símbolo"""
+def get_position(symbol, since=None):
+    """
+    Obtiene la posición actual de un símbolo
+    
+    Usa la foto compartida de la cuenta si tiene menos de SNAPSHOT_MAX_AGE segundos y
+    se tomó después de `since` (time.monotonic()); si no, consulta por REST.
+    """
+    position, version = account_snapshot.position(symbol, max_age=SNAPSHOT_MAX_AGE, since=since)
+    if version is not None:
+        return position
+    
     try:
         response = session.get_positions(category="linear", symbol=symbol)
         if response['retCode'] == 0:
@@ -122,186 +356,425 @@ def get_position(symbol):
 
 def cancel_order(symbol, order_id):
     """Cancela una orden específica"""
-    try:
-        response = session.cancel_order(
-            category="linear",
-            symbol=symbol,
-            orderId=order_id
-        )
-        if response['retCode'] == 0:
-            print(f"Orden {order_id} cancelada exitosamente para {symbol}")
-            return True
+    return cancel_orders([(symbol, order_id)]) == 1
+
+def cancel_orders(cancels):
+    """
+    Cancela varias órdenes [(symbol, order_id), ...] con peticiones batch
+    
+    Returns:
+        Número de órdenes canceladas
+    """
+    canceladas = 0
+    with metrics.span("cancel"):
+        results = cancel_batch_orders(session, cancels)
+    for result in results:
+        order_id = result['request']['orderId']
+        if result['ok']:
+            print(f"Orden {order_id} cancelada exitosamente para {result['symbol']}")
+            canceladas += 1
         else:
-            print(f"Error al cancelar orden {order_id}: {response['retMsg']}")
-            return False
-    except Exception as e:
-        print(f"Error al cancelar orden {order_id} de {symbol}: {e}")
-        return False
+            print(f"Error al cancelar orden {order_id} de {result['symbol']}: {result['msg']}")
+    return canceladas
     
+def schedule_pnl_sync(symbol):
+    """Vuelve a sincronizar el PnL cerrado PNL_FOLLOWUP_DELAY segundos después de un cierre"""
+    timer = threading.Timer(PNL_FOLLOWUP_DELAY, get_pnl, args=(symbol,))
+    timer.daemon = True
+    timer.start()
+
 def get_pnl(symbol):
-    closed_orders_response = session.get_closed_pnl(category="linear", symbol=symbol, limit=1)
-    closed_orders_list = closed_orders_response['result']['list']
+    """
+    Sincroniza el libro de operaciones e informa cada cierre nuevo (de cualquier
+    símbolo, así ninguno se pierde si varios cierran a la vez) con sus acumulados
+    """
+    try:
+        cierres = trade_ledger.sync()
+    except Exception as e:
+        print(f"Error al sincronizar el PnL cerrado ({symbol}): {e}")
+        return
 
-    for order in closed_orders_list:
+    for order in cierres:
         pnl_cerrada = float(order['closedPnl'])
+        acumulado = trade_ledger.symbol_stats(order['symbol'])
         emoji = "✅" if pnl_cerrada >= 0 else "❌"
+        ciclo = f"<b>Ciclo:</b> {order['cycle']}\n" if order.get('cycle') else ""
         mensaje_pnl = (
             f"<b>{emoji} PNL Realizado</b>\n"
             f"━━━━━━━━━━━━━━━\n"
+            f"<b>Símbolo:</b> {order['symbol']}\n"
+            f"{ciclo}"
             f"<b>Resultado:</b> {pnl_cerrada:.2f} USDT\n"
+            f"<b>Acumulado:</b> {acumulado.pnl:.2f} USDT "
+            f"({acumulado.trades} trades, {acumulado.win_rate:.0%} acierto)\n"
             f"━━━━━━━━━━━━━━━"
         )
         enviar_mensaje_telegram(mensaje_pnl)
         print(mensaje_pnl)
 
 # ==================== FUNCIONES PRINCIPALES ====================
+def prepare_bracket(symbol, distance_percentage=None):
+    """
+    Calcula precios y cantidad de las dos órdenes limit (long y short) a la distancia
+    especificada del precio actual, cada una con su stop loss al 1%
+    
+    Args:
+        symbol: Símbolo a operar
+        distance_percentage: Distancia personalizada (si es None, usa el ciclo actual)
+    
+    Returns:
+        dict con los datos del bracket y sus dos piernas, o None si no se pudo calcular
+    """
+    # Verificar si ya hay órdenes activas para este símbolo
+    if symbol in active_orders and active_orders[symbol].get('has_position', False):
+        print(f"Ya hay una posición activa para {symbol}. No se colocarán nuevas órdenes.")
+        return None
+    
+    # Determinar la distancia a usar
+    if distance_percentage is None:
+        # Usar el ciclo guardado o iniciar en distance_1; la política decide la distancia
+        cycle = cycle_control.setdefault(symbol, FIRST_CYCLE)
+        distance_percentage = distance_policy.distance(symbol, cycle, STRATEGY)
+        cycle_name = cycle_label(STRATEGY, cycle)
+    else:
+        cycle_name = percent_label(distance_percentage)
+    distance_name = percent_label(distance_percentage)
+    
+    # Obtener precio actual (una sola foto para precios y cantidad)
+    current_price = get_current_price(symbol)
+    if current_price is None:
+        print(f"No se pudo obtener el precio actual de {symbol}")
+        return None
+    
+    # Cantidad, entradas, stop loss y take profit ya ajustados, en una sola pasada
+    with metrics.span("rounding"):
+        quote = quote_bracket(
+            instrument_registry.get(symbol), current_price, distance_percentage,
+            STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE, AMOUNT_USDT,
+        )
+    if not quote.qty_in_limits:
+        print(f"Cantidad {quote.quantity} fuera de los límites del instrumento {symbol}")
+        return None
+    quantity = quote.quantity
+    long_price_adjusted = quote.long_entry
+    short_price_adjusted = quote.short_entry
+    long_sl_adjusted = quote.long_stop
+    short_sl_adjusted = quote.short_stop
+    
+    long_leg = {
+        'symbol': symbol,
+        'side': "Buy",
+        'orderType': "Limit",
+        'qty': quantity,
+        'price': long_price_adjusted,
+        'timeInForce': "GTC",
+        'stopLoss': long_sl_adjusted,
+        'slOrderType': "Market",
+        'slTriggerBy': "LastPrice",
+        'tpslMode': "Full",
+        'orderLinkId': new_order_link_id("L"),
+    }
+    short_leg = {
+        'symbol': symbol,
+        'side': "Sell",
+        'orderType': "Limit",
+        'qty': quantity,
+        'price': short_price_adjusted,
+        'timeInForce': "GTC",
+        'stopLoss': short_sl_adjusted,
+        'slOrderType': "Market",
+        'slTriggerBy': "LastPrice",
+        'tpslMode': "Full",
+        'orderLinkId': new_order_link_id("S"),
+    }
+    
+    if TAKE_PROFIT_MODE == "attached":
+        # El TP sale del precio limit, que es el precio de entrada
+        attach_take_profit(long_leg, quote.long_take_profit)
+        attach_take_profit(short_leg, quote.short_take_profit)
+    
+    print(f"\n{'='*60}")
+    print(f"🔄 Ciclo actual: {cycle_name} (distancia {distance_name})")
+    print(f"Colocando órdenes para {symbol}")
+    print(f"Precio actual: {current_price}")
+    print(f"Cantidad: {quantity}")
+    print(f"\nORDEN LONG:")
+    print(f"  - Precio Limit: {long_price_adjusted}")
+    print(f"  - Stop Loss: {long_sl_adjusted}")
+    if long_leg.get('takeProfit'):
+        print(f"  - Take Profit: {long_leg['takeProfit']}")
+    print(f"\nORDEN SHORT:")
+    print(f"  - Precio Limit: {short_price_adjusted}")
+    print(f"  - Stop Loss: {short_sl_adjusted}")
+    if short_leg.get('takeProfit'):
+        print(f"  - Take Profit: {short_leg['takeProfit']}")
+    print(f"{'='*60}\n")
+    
+    return {
+        'symbol': symbol,
+        'cycle_name': cycle_name,
+        'distance': distance_percentage,
+        'distance_name': distance_name,
+        'current_price': current_price,
+        'quantity': quantity,
+        'long': long_leg,
+        'short': short_leg,
+    }
+
+def attach_take_profit(leg, tp_price):
+    """
+    Adjunta a la orden de entrada un take profit limit (modo Partial) que Bybit coloca
+    en cuanto la orden se ejecuta, sin esperar a que el bot detecte la posición
+    
+    El modo Partial es el que admite TP de tipo Limit; cubre la cantidad de la orden.
+    """
+    leg.update({
+        'takeProfit': tp_price,
+        'tpLimitPrice': tp_price,
+        'tpOrderType': "Limit",
+        'tpTriggerBy': "LastPrice",
+        'tpslMode': "Partial",
+    })
+    return leg
+
+def register_bracket(bracket, long_result, short_result):
+    """Concilia el resultado de cada pierna y guarda las órdenes activas del símbolo"""
+    symbol = bracket['symbol']
+    long_leg = bracket['long']
+    short_leg = bracket['short']
+    
+    long_order_id = long_result['order_id'] if long_result['ok'] else None
+    short_order_id = short_result['order_id'] if short_result['ok'] else None
+    
+    if long_order_id:
+        print(f"✅ Orden LONG colocada: ID {long_order_id}")
+    else:
+        print(f"❌ Error al colocar orden LONG: {long_result['msg']}")
+    if short_order_id:
+        print(f"✅ Orden SHORT colocada: ID {short_order_id}")
+    else:
+        print(f"❌ Error al colocar orden SHORT: {short_result['msg']}")
+    
+    # Guardar IDs de órdenes
+    if long_order_id or short_order_id:
+        with bracket_lock:
+            active_orders[symbol] = {
+                'long_order_id': long_order_id,
+                'short_order_id': short_order_id,
+                'has_position': False,
+                'cycle': bracket['cycle_name'],
+                'anchor_price': str(bracket['current_price']),  # Precio de referencia para re-cotizar
+                'distance': str(bracket['distance']),
+                'state_since': time.monotonic(),  # Fotos anteriores a este instante no sirven
+            }
+            early_position = symbol in unmatched_positions
+            unmatched_positions.discard(symbol)
+        persist_state(symbol, 'armed')
+        if early_position and execution_engine is not None:
+            # Una pierna se ejecutó antes de registrar el bracket: releer la posición
+            execution_engine.resync([symbol])
+        
+        # Mensaje de Telegram
+        mensaje = (
+            f"<b>🎯 Órdenes colocadas para {symbol}</b>\n\n"
+            f"🔄 <b>Ciclo: {bracket['cycle_name']}</b> (distancia {bracket['distance_name']})\n"
+            f"💰 Precio actual: <b>${bracket['current_price']}</b>\n"
+            f"📊 Cantidad: <b>{bracket['quantity']}</b>\n\n"
+            f"<b>🟢 ORDEN LONG:</b>\n"
+            f"  └ Precio: ${long_leg['price']}\n"
+            f"  └ Stop Loss: ${long_leg['stopLoss']}\n"
+            f"{take_profit_line(long_leg)}\n"
+            f"<b>🔴 ORDEN SHORT:</b>\n"
+            f"  └ Precio: ${short_leg['price']}\n"
+            f"  └ Stop Loss: ${short_leg['stopLoss']}\n"
+            f"{take_profit_line(short_leg)}\n"
+            f"✅ Estado: Órdenes activas"
+        )
+        enviar_mensaje_telegram(mensaje)
+        return True
+    return False
+
+def take_profit_line(leg):
+    """Línea del mensaje de Telegram con el take profit adjunto (vacía si no lo hay)"""
+    return f"  └ Take Profit: ${leg['takeProfit']}\n" if leg.get('takeProfit') else ""
+
+# ==================== RE-COTIZACIÓN ====================
+def requotable_bracket(symbol):
+    """(ancla, distancia) del bracket del símbolo si se puede re-cotizar, o None"""
+    active = active_orders.get(symbol)
+    if not active or active.get('has_position') or active.get('opposite_cancelled'):
+        return None
+    if not active.get('anchor_price') or not active.get('distance'):
+        return None  # Brackets adoptados o de versiones anteriores
+    return float(active['anchor_price']), float(active['distance'])
+
+def requote_brackets(targets):
+    """
+    Mueve las dos piernas de cada símbolo al precio indicado con amend (en lote), sin
+    cancelar ni volver a colocar: misma distancia, stop loss y take profit recalculados
+    
+    Args:
+        targets: {symbol: precio actual}
+    """
+    amends = []
+    brackets = {}
+    for symbol, price in targets.items():
+        # Corre en el thread de re-cotización: se fija qué bracket se modifica para no
+        # tocar uno con posición ni anotar el ancla en el armado después de un cierre
+        with bracket_lock:
+            if requotable_bracket(symbol) is None:
+                continue
+            active = active_orders[symbol]
+            brackets[symbol] = (active, active.get('long_order_id'), active.get('short_order_id'))
+        with metrics.span("rounding"):
+            quote = quote_bracket(
+                instrument_registry.get(symbol), Decimal(str(price)), Decimal(active['distance']),
+                STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE, AMOUNT_USDT,
+            )
+        if not quote.qty_in_limits:
+            continue
+        legs = (
+            (active.get('long_order_id'), quote.long_entry, quote.long_stop, quote.long_take_profit),
+            (active.get('short_order_id'), quote.short_entry, quote.short_stop, quote.short_take_profit),
+        )
+        for order_id, entry, stop, take_profit in legs:
+            if not order_id:
+                continue
+            # Sin qty: una pierna parcialmente ejecutada conserva su cantidad
+            amend = {'symbol': symbol, 'orderId': order_id, 'price': entry, 'stopLoss': stop}
+            if TAKE_PROFIT_MODE == "attached":
+                amend.update({'takeProfit': take_profit, 'tpLimitPrice': take_profit})
+            amends.append(amend)
+    
+    if not amends:
+        return []
+    with metrics.span("amend"):
+        results = amend_batch_orders(session, amends, max_parallel=BATCH_MAX_PARALLEL)
+    
+    requoted = []
+    for symbol in dict.fromkeys(r['symbol'] for r in results):
+        legs = [r for r in results if r['symbol'] == symbol]
+        failed = [r for r in legs if not r['ok']]
+        for r in failed:
+            # Normalmente la pierna ya se ejecutó: la apertura la procesa su handler
+            print(f"⚠️ {symbol}: no se pudo re-cotizar la orden {r['request']['orderId']}: {r['msg']}")
+        if len(failed) == len(legs) or not still_requotable(symbol, *brackets[symbol]):
+            continue
+        with bracket_lock:
+            active_orders[symbol]['anchor_price'] = str(targets[symbol])
+        persist_state(symbol, 'requoted')
+        requoted.append(symbol)
+        print(f"↔️ {symbol}: bracket re-cotizado a {targets[symbol]}")
+    return requoted
+
+def still_requotable(symbol, active, long_order_id, short_order_id):
+    """True si el símbolo conserva el mismo bracket (mismas órdenes) y sigue sin posición"""
+    with bracket_lock:
+        current = active_orders.get(symbol)
+        return (
+            current is active
+            and current.get('long_order_id') == long_order_id
+            and current.get('short_order_id') == short_order_id
+            and requotable_bracket(symbol) is not None
+        )
+
+requoter = Requoter(
+    requotable_bracket,
+    requote_brackets,
+    trigger=REQUOTE_TRIGGER,
+    release=REQUOTE_RELEASE,
+    dwell=REQUOTE_DWELL,
+    budget=REQUOTE_BUDGET,
+    budget_window=REQUOTE_BUDGET_WINDOW,
+)
+metrics.add_collector(lambda: requoter.metric_samples())
+
 def place_limit_orders_with_sl(symbol, distance_percentage=None):
     """
     Coloca dos órdenes limit (long y short) a la distancia especificada del precio actual,
-    cada una con su stop loss al 1%
+    cada una con su stop loss al 1%. Ambas piernas viajan en una sola petición batch.
     
     Args:
         symbol: Símbolo a operar
         distance_percentage: Distancia personalizada (si es None, usa el ciclo actual)
     """
     try:
-        # Verificar si ya hay órdenes activas para este símbolo
-        if symbol in active_orders and active_orders[symbol].get('has_position', False):
-            print(f"Ya hay una posición activa para {symbol}. No se colocarán nuevas órdenes.")
-            return
-        
-        # Determinar la distancia a usar
-        if distance_percentage is None:
-            # Usar el ciclo guardado o iniciar en distance_1
-            if symbol not in cycle_control:
-                cycle_control[symbol] = 'distance_1'
-            
-            if cycle_control[symbol] == 'distance_1':
-                distance_percentage = DISTANCE_1_PERCENTAGE
-                cycle_name = "1%"
-            else:
-                distance_percentage = DISTANCE_2_PERCENTAGE
-                cycle_name = "2.5%"
-        else:
-            cycle_name = f"{distance_percentage * 100}%"
-        
-        # Obtener precio actual
-        current_price = get_current_price(symbol)
-        if current_price is None:
-            print(f"No se pudo obtener el precio actual de {symbol}")
-            return
-        
-        # Calcular cantidad
-        quantity = calculate_quantity(symbol, AMOUNT_USDT)
-        if quantity is None:
-            print(f"No se pudo calcular la cantidad para {symbol}")
-            return
-        
-        # Calcular precios de las órdenes limit
-        long_price = current_price * (Decimal(1) - distance_percentage)
-        short_price = current_price * (Decimal(1) + distance_percentage)
-        
-        # Calcular precios de stop loss
-        long_sl_price = long_price * (Decimal(1) - STOP_LOSS_PERCENTAGE)
-        short_sl_price = short_price * (Decimal(1) + STOP_LOSS_PERCENTAGE)
-        
-        # Ajustar precios
-        long_price_adjusted = adjust_price(symbol, long_price)
-        short_price_adjusted = adjust_price(symbol, short_price)
-        long_sl_adjusted = adjust_price(symbol, long_sl_price)
-        short_sl_adjusted = adjust_price(symbol, short_sl_price)
+        bracket = prepare_bracket(symbol, distance_percentage)
+        if bracket is None:
+            return False
         
-        print(f"\n{'='*60}")
-        print(f"🔄 Ciclo actual: {cycle_name}")
-        print(f"Colocando órdenes para {symbol}")
-        print(f"Precio actual: {current_price}")
-        print(f"Cantidad: {quantity}")
-        print(f"\nORDEN LONG:")
-        print(f"  - Precio Limit: {long_price_adjusted}")
-        print(f"  - Stop Loss: {long_sl_adjusted}")
-        print(f"\nORDEN SHORT:")
-        print(f"  - Precio Limit: {short_price_adjusted}")
-        print(f"  - Stop Loss: {short_sl_adjusted}")
-        print(f"{'='*60}\n")
+        with metrics.span("place_order"):
+            long_result, short_result = place_batch_orders(session, [bracket['long'], bracket['short']])
+        return register_bracket(bracket, long_result, short_result)
         
-        # Colocar orden LONG con stop loss
+    except Exception as e:
+        print(f"Error en place_limit_orders_with_sl para {symbol}: {e}")
+        return False
+    finally:
+        track_rearm([symbol])
+
+def track_rearm(symbols):
+    """Anota los símbolos que siguen sin bracket para reintentarlos (y quita los armados)"""
+    for symbol in symbols:
+        if symbol in active_orders:
+            pending_rearm.discard(symbol)
+        else:
+            pending_rearm.add(symbol)
+
+def retry_pending_rearms():
+    """Vuelve a armar cada REARM_RETRY_INTERVAL segundos los símbolos que quedaron sin bracket"""
+    while True:
+        time.sleep(REARM_RETRY_INTERVAL)
+        track_rearm(list(pending_rearm))
+        pending = sorted(pending_rearm)
+        if not pending:
+            continue
+        print(f"🔁 Reintentando brackets de {len(pending)} símbolos: {', '.join(pending)}")
         try:
-            long_order = session.place_order(
-                category="linear",
-                symbol=symbol,
-                side="Buy",
-                orderType="Limit",
-                qty=quantity,
-                price=long_price_adjusted,
-                timeInForce="GTC",
-                stopLoss=long_sl_adjusted,
-                slOrderType="Market",
-                slTriggerBy="LastPrice",
-                tpslMode="Full"
-            )
-            
-            if long_order['retCode'] == 0:
-                long_order_id = long_order['result']['orderId']
-                print(f"✅ Orden LONG colocada: ID {long_order_id}")
-            else:
-                print(f"❌ Error al colocar orden LONG: {long_order['retMsg']}")
-                long_order_id = None
+            rearm_symbols(pending)
         except Exception as e:
-            print(f"❌ Error al colocar orden LONG: {e}")
-            long_order_id = None
-        
-        # Colocar orden SHORT con stop loss
+            print(f"Error al reintentar brackets: {e}")
+
+def rearm_symbols(symbols, max_parallel=None):
+    """
+    Coloca los brackets de varios símbolos a la vez, agrupando todas las piernas
+    en peticiones batch (hasta BATCH_LIMIT órdenes por petición, `max_parallel`
+    peticiones simultáneas; por defecto BATCH_MAX_PARALLEL)
+    
+    Returns:
+        Lista de símbolos que quedaron con órdenes activas
+    """
+    # Si varios precios están viejos, refrescarlos todos con una sola petición
+    stale = [symbol for symbol in symbols if not price_cache.is_fresh(symbol)]
+    if len(stale) > 1:
         try:
-            short_order = session.place_order(
-                category="linear",
-                symbol=symbol,
-                side="Sell",
-                orderType="Limit",
-                qty=quantity,
-                price=short_price_adjusted,
-                timeInForce="GTC",
-                stopLoss=short_sl_adjusted,
-                slOrderType="Market",
-                slTriggerBy="LastPrice",
-                tpslMode="Full"
-            )
-            
-            if short_order['retCode'] == 0:
-                short_order_id = short_order['result']['orderId']
-                print(f"✅ Orden SHORT colocada: ID {short_order_id}")
-            else:
-                print(f"❌ Error al colocar orden SHORT: {short_order['retMsg']}")
-                short_order_id = None
+            price_cache.refresh_all()
         except Exception as e:
-            print(f"❌ Error al colocar orden SHORT: {e}")
-            short_order_id = None
-        
-        # Guardar IDs de órdenes
-        if long_order_id or short_order_id:
-            active_orders[symbol] = {
-                'long_order_id': long_order_id,
-                'short_order_id': short_order_id,
-                'has_position': False
-            }
-            
-            # Mensaje de Telegram
-            mensaje = (
-                f"<b>🎯 Órdenes colocadas para {symbol}</b>\n\n"
-                f"🔄 <b>Ciclo: {cycle_name}</b>\n"
-                f"💰 Precio actual: <b>${current_price}</b>\n"
-                f"📊 Cantidad: <b>{quantity}</b>\n\n"
-                f"<b>🟢 ORDEN LONG:</b>\n"
-                f"  └ Precio: ${long_price_adjusted}\n"
-                f"  └ Stop Loss: ${long_sl_adjusted}\n\n"
-                f"<b>🔴 ORDEN SHORT:</b>\n"
-                f"  └ Precio: ${short_price_adjusted}\n"
-                f"  └ Stop Loss: ${short_sl_adjusted}\n\n"
-                f"✅ Estado: Órdenes activas"
-            )
-            enviar_mensaje_telegram(mensaje)
-        
-    except Exception as e:
-        print(f"Error en place_limit_orders_with_sl para {symbol}: {e}")
+            print(f"Error al refrescar precios: {e}")
+    
+    brackets = []
+    for symbol in symbols:
+        try:
+            bracket = prepare_bracket(symbol)
+            if bracket is not None:
+                brackets.append(bracket)
+        except Exception as e:
+            print(f"Error al preparar órdenes para {symbol}: {e}")
+    
+    if not brackets:
+        track_rearm(symbols)
+        return []
+    
+    legs = [leg for bracket in brackets for leg in (bracket['long'], bracket['short'])]
+    with metrics.span("place_order"):
+        results = place_batch_orders(session, legs, max_parallel=max_parallel or BATCH_MAX_PARALLEL)
+    
+    armed = []
+    for i, bracket in enumerate(brackets):
+        if register_bracket(bracket, results[2 * i], results[2 * i + 1]):
+            armed.append(bracket['symbol'])
+    track_rearm(symbols)
+    return armed
 
 def place_take_profit(symbol, side, entry_price, quantity):
     """
@@ -309,27 +782,21 @@ def place_take_profit(symbol, side, entry_price, quantity):
     """
     try:
         # Calcular precio del take profit
-        if side == "Buy":
-            tp_price = Decimal(entry_price) * (Decimal(1) + TAKE_PROFIT_PERCENTAGE)
-        else:  # Sell
-            tp_price = Decimal(entry_price) * (Decimal(1) - TAKE_PROFIT_PERCENTAGE)
-        
+        tp_price = take_profit_price(side, Decimal(entry_price), TAKE_PROFIT_PERCENTAGE)
         tp_price_adjusted = adjust_price(symbol, tp_price)
         
-        # Determinar el lado opuesto para cerrar la posición
-        close_side = "Sell" if side == "Buy" else "Buy"
-        
         # Colocar orden take profit
-        tp_order = session.place_order(
-            category="linear",
-            symbol=symbol,
-            side=close_side,
-            orderType="Limit",
-            qty=quantity,
-            price=tp_price_adjusted,
-            timeInForce="GTC",
-            reduceOnly=True
-        )
+        with metrics.span("take_profit"):
+            tp_order = session.place_order(
+                category="linear",
+                symbol=symbol,
+                side=close_side(side),
+                orderType="Limit",
+                qty=quantity,
+                price=tp_price_adjusted,
+                timeInForce="GTC",
+                reduceOnly=True
+            )
         
         if tp_order['retCode'] == 0:
             tp_order_id = tp_order['result']['orderId']
@@ -353,9 +820,233 @@ def place_take_profit(symbol, side, entry_price, quantity):
         print(f"Error al colocar Take Profit para {symbol}: {e}")
         return False
 
+def handle_position_opened(symbol, position):
+    """
+    Procesa una posición recién abierta:
+    1. Cancela la orden opuesta
+    2. Coloca el take profit
+    
+    Registra la latencia desde la detección (detect_to_tp) y desde la ejecución en el
+    exchange (fill_to_tp) hasta el take profit. En modo attached el exchange activa el
+    TP con el fill: fill_to_tp mide hasta que el bot procesa la posición ya protegida
+    """
+    detected_at = time.perf_counter()
+    side = position['side']
+    size = position['size']
+    entry_price = position['avgPrice']
+    
+    print(f"\n🚨 Posición detectada para {symbol}!")
+    print(f"   Lado: {side}, Tamaño: {size}, Precio: {entry_price}")
+    
+    # Marcar que ya tiene posición
+    active_orders[symbol]['has_position'] = True
+    active_orders[symbol]['state_since'] = time.monotonic()
+    persist_state(symbol, 'position_opened')
+    
+    # Cancelar la orden opuesta (si el stream de órdenes no lo hizo ya)
+    if not active_orders[symbol].get('opposite_cancelled'):
+        if side == "Buy" and active_orders[symbol].get('short_order_id'):
+            print(f"   Cancelando orden SHORT opuesta...")
+            cancel_order(symbol, active_orders[symbol]['short_order_id'])
+        elif side == "Sell" and active_orders[symbol].get('long_order_id'):
+            print(f"   Cancelando orden LONG opuesta...")
+            cancel_order(symbol, active_orders[symbol]['long_order_id'])
+    
+    # Colocar Take Profit (en modo attached ya viaja con la orden de entrada)
+    if TAKE_PROFIT_MODE == "attached":
+        print(f"   Take Profit adjunto a la orden de entrada")
+    else:
+        print(f"   Colocando Take Profit...")
+        place_take_profit(symbol, side, entry_price, size)
+    record_fill_latency(symbol, position, detected_at)
+    
+    # Mensaje de Telegram
+    emoji = "🟢" if side == "Buy" else "🔴"
+    mensaje = (
+        f"<b>{emoji} ¡Posición abierta!</b>\n\n"
+        f"🪙 Símbolo: <b>{symbol}</b>\n"
+        f"📊 Lado: <b>{side}</b>\n"
+        f"💰 Precio entrada: <b>${entry_price}</b>\n"
+        f"📈 Tamaño: <b>{size}</b>\n\n"
+        f"✅ Orden opuesta cancelada\n"
+        f"🎯 Take Profit {'adjunto' if TAKE_PROFIT_MODE == 'attached' else 'colocado'}"
+    )
+    enviar_mensaje_telegram(mensaje)
+
+def record_fill_latency(symbol, position, detected_at):
+    """
+    Observa la latencia ejecución -> take profit del símbolo en sus histogramas (la hora
+    de ejecución es el execTime del stream 'execution' o, sin él, el updatedTime)
+    """
+    metrics.observe("detect_to_tp", time.perf_counter() - detected_at, symbol=symbol, mode=TAKE_PROFIT_MODE)
+    try:
+        filled_at = int(active_orders[symbol].get('filled_at') or position.get('updatedTime') or 0) / 1000
+    except (TypeError, ValueError):
+        filled_at = 0
+    if filled_at:
+        # Reloj de pared contra la marca del exchange: incluye la demora de detección
+        metrics.observe("fill_to_tp", max(0.0, time.time() - filled_at), symbol=symbol, mode=TAKE_PROFIT_MODE)
+
+def handle_position_closed(symbol, rearm_delay=REARM_DELAY, rearm=True):
+    """
+    Procesa una posición cerrada: alterna el ciclo entre 1% y 2.5%
+    y vuelve a colocar órdenes (si rearm es False, el llamador las coloca en lote)
+    """
+    print(f"\n✅ Posición cerrada para {symbol}")
+    
+    remember_closed_cycle(symbol)
+    
+    # Alternar el ciclo
+    cycle_control[symbol] = next_cycle(cycle_control.get(symbol, FIRST_CYCLE))
+    next_distance_text = cycle_label(STRATEGY, cycle_control[symbol])
+    print(f"🔄 Cambiando a ciclo {next_distance_text} para {symbol}")
+    
+    mensaje = (
+        f"<b>✅ Posición cerrada</b>\n\n"
+        f"🪙 Símbolo: <b>{symbol}</b>\n"
+        f"🔄 Siguiente ciclo: <b>{next_distance_text}</b>\n"
+        f"⏳ Preparando nuevas órdenes..."
+    )
+    get_pnl(symbol)
+    schedule_pnl_sync(symbol)
+    enviar_mensaje_telegram(mensaje)
+    
+    # Limpiar el registro de órdenes activas
+    del active_orders[symbol]
+    persist_state(symbol, 'position_closed')
+    
+    if not rearm:
+        return
+    
+    # Esperar un poco antes de volver a colocar órdenes
+    if rearm_delay:
+        time.sleep(rearm_delay)
+    
+    # Colocar nuevas órdenes con el nuevo ciclo
+    place_limit_orders_with_sl(symbol)
+
+def on_position_update(symbol, position):
+    """Handler del stream privado 'position': detecta aperturas y cierres al instante"""
+    size = Decimal(position.get('size') or 0)
+    with bracket_lock:
+        if symbol not in active_orders:
+            # Bracket armado fuera del dispatcher que todavía no se registró: register_bracket
+            # vuelve a consultar la posición al registrarlo
+            if size != 0:
+                unmatched_positions.add(symbol)
+            else:
+                unmatched_positions.discard(symbol)
+            return
+    
+    has_position = active_orders[symbol].get('has_position', False)
+    
+    if size != 0 and not has_position:
+        handle_position_opened(symbol, position)
+    elif size == 0 and has_position:
+        handle_position_closed(symbol, rearm_delay=WS_REARM_DELAY)
+
+def on_order_update(symbol, order):
+    """
+    Handler del stream privado 'order': enlace tipo OCO entre las dos piernas
+    
+    En cuanto una pierna se ejecuta (aunque sea parcialmente) se cancela la otra, sin
+    esperar al evento de posición. Corre serializado con on_position_update.
+    """
+    active = active_orders.get(symbol)
+    if not active or active.get('has_position') or active.get('opposite_cancelled'):
+        return
+    if order.get('orderStatus') not in ("Filled", "PartiallyFilled"):
+        return
+    
+    order_id = order.get('orderId')
+    if order_id == active.get('long_order_id'):
+        opposite = active.get('short_order_id')
+    elif order_id == active.get('short_order_id'):
+        opposite = active.get('long_order_id')
+    else:
+        return
+    
+    if not opposite:
+        active['opposite_cancelled'] = True
+        return
+    print(f"⚡ {symbol}: pierna {order_id} ejecutada, cancelando la opuesta")
+    if cancel_order(symbol, opposite):
+        active['opposite_cancelled'] = True
+    else:
+        # Sin la marca, handle_position_opened vuelve a intentarlo al llegar la posición
+        print(f"⚠️ {symbol}: no se pudo cancelar la pierna opuesta {opposite}, se reintentará")
+        enviar_mensaje_telegram(
+            f"<b>⚠️ {symbol}: no se pudo cancelar la orden opuesta</b>\n\n"
+            f"🆔 {opposite}\n🔁 Se reintentará al procesar la posición"
+        )
+
+def on_execution_update(symbol, execution):
+    """
+    Handler del stream privado 'execution': guarda la hora de la primera ejecución
+    (execTime del exchange) de una pierna del bracket para la latencia ejecución -> TP
+    """
+    active = active_orders.get(symbol)
+    if not active or active.get('filled_at') or execution.get('execType', "Trade") != "Trade":
+        return
+    if execution.get('orderId') not in (active.get('long_order_id'), active.get('short_order_id')):
+        return
+    try:
+        active['filled_at'] = int(execution['execTime'])
+    except (KeyError, TypeError, ValueError):
+        pass
+
+def resync_positions(symbols=None):
+    """
+    Consulta por REST las posiciones de `symbols` (por defecto, todos los activos): tras
+    conectar/reconectar el WebSocket o si una pierna se ejecutó antes de registrarse
+    """
+    positions = {}
+    for symbol in list(active_orders) if symbols is None else symbols:
+        active = active_orders.get(symbol)
+        if active is not None:
+            positions[symbol] = get_position(symbol, since=active.get('state_since')) or {'size': '0'}
+    return positions
+
+def scan_opened_positions():
+    """Una pasada de detección de aperturas: cancela la orden opuesta y coloca el take profit"""
+    for symbol in SYMBOLS:
+        if symbol not in active_orders:
+            continue
+        
+        # Verificar si ya se procesó esta posición
+        if active_orders[symbol].get('has_position', False):
+            continue
+        
+        # Obtener posición actual
+        position = get_position(symbol, since=active_orders[symbol].get('state_since'))
+        
+        if position:
+            handle_position_opened(symbol, position)
+
+def scan_closed_positions():
+    """
+    Una pasada de detección de cierres (sin rearmar)
+    
+    Returns:
+        Lista de símbolos cuya posición se cerró
+    """
+    closed_symbols = []
+    for symbol in SYMBOLS:
+        if symbol not in active_orders:
+            continue
+        
+        # Si el símbolo tenía posición, verificar si se cerró
+        if active_orders[symbol].get('has_position', False):
+            position = get_position(symbol, since=active_orders[symbol].get('state_since'))
+            
+            if position is None:  # Posición cerrada
+                handle_position_closed(symbol, rearm=False)
+                closed_symbols.append(symbol)
+    return closed_symbols
+
 def monitor_positions():
     """
-    Monitorea las posiciones para:
+    Monitorea las posiciones (modo polling) para:
     1. Detectar cuando se ejecuta una orden limit
     2. Cancelar la orden opuesta
     3. Colocar el take profit
@@ -364,54 +1055,7 @@ def monitor_positions():
     
     while True:
         try:
-            for symbol in SYMBOLS:
-                if symbol not in active_orders:
-                    continue
-                
-                # Verificar si ya se procesó esta posición
-                if active_orders[symbol].get('has_position', False):
-                    continue
-                
-                # Obtener posición actual
-                position = get_position(symbol)
-                
-                if position:
-                    side = position['side']
-                    size = position['size']
-                    entry_price = position['avgPrice']
-                    
-                    print(f"\n🚨 Posición detectada para {symbol}!")
-                    print(f"   Lado: {side}, Tamaño: {size}, Precio: {entry_price}")
-                    
-                    # Marcar que ya tiene posición
-                    active_orders[symbol]['has_position'] = True
-                    
-                    # Cancelar la orden opuesta
-                    if side == "Buy" and active_orders[symbol].get('short_order_id'):
-                        print(f"   Cancelando orden SHORT opuesta...")
-                        cancel_order(symbol, active_orders[symbol]['short_order_id'])
-                    elif side == "Sell" and active_orders[symbol].get('long_order_id'):
-                        print(f"   Cancelando orden LONG opuesta...")
-                        cancel_order(symbol, active_orders[symbol]['long_order_id'])
-                    
-                    # Colocar Take Profit
-                    print(f"   Colocando Take Profit...")
-                    time.sleep(1)  # Pequeña pausa
-                    place_take_profit(symbol, side, entry_price, size)
-                    
-                    # Mensaje de Telegram
-                    emoji = "🟢" if side == "Buy" else "🔴"
-                    mensaje = (
-                        f"<b>{emoji} ¡Posición abierta!</b>\n\n"
-                        f"🪙 Símbolo: <b>{symbol}</b>\n"
-                        f"📊 Lado: <b>{side}</b>\n"
-                        f"💰 Precio entrada: <b>${entry_price}</b>\n"
-                        f"📈 Tamaño: <b>{size}</b>\n\n"
-                        f"✅ Orden opuesta cancelada\n"
-                        f"🎯 Take Profit colocado"
-                    )
-                    enviar_mensaje_telegram(mensaje)
-            
+            scan_opened_positions()
             time.sleep(3)  # Revisar cada 3 segundos
             
         except Exception as e:
@@ -420,64 +1064,19 @@ def monitor_positions():
 
 def check_closed_positions():
     """
-    Monitorea posiciones cerradas y vuelve a colocar órdenes
+    Monitorea posiciones cerradas (modo polling) y vuelve a colocar órdenes
     alternando entre distancias de 1% y 2.5%
     """
     print("📊 Iniciando monitoreo de posiciones cerradas...")
-    processed_symbols = set()
     
     while True:
         try:
-            for symbol in SYMBOLS:
-                if symbol not in active_orders:
-                    continue
-                
-                # Si el símbolo tenía posición
-                if active_orders[symbol].get('has_position', False):
-                    # Verificar si la posición se cerró
-                    position = get_position(symbol)
-                    
-                    if position is None:  # Posición cerrada
-                        if symbol not in processed_symbols:
-                            print(f"\n✅ Posición cerrada para {symbol}")
-                            
-                            # Alternar el ciclo
-                            if symbol not in cycle_control:
-                                cycle_control[symbol] = 'distance_1'
-                            
-                            # Cambiar al siguiente ciclo
-                            if cycle_control[symbol] == 'distance_1':
-                                next_cycle = 'distance_2'
-                                next_distance_text = "2.5%"
-                            else:
-                                next_cycle = 'distance_1'
-                                next_distance_text = "1%"
-                            
-                            cycle_control[symbol] = next_cycle
-                            
-                            mensaje = (
-                                f"<b>✅ Posición cerrada</b>\n\n"
-                                f"🪙 Símbolo: <b>{symbol}</b>\n"
-                                f"🔄 Siguiente ciclo: <b>{next_distance_text}</b>\n"
-                                f"⏳ Preparando nuevas órdenes..."
-                            )
-                            get_pnl(symbol) 
-                            enviar_mensaje_telegram(mensaje)
-                            
-                            processed_symbols.add(symbol)
-                            
-                            # Limpiar el registro de órdenes activas
-                            del active_orders[symbol]
-                            
-                            # Esperar un poco antes de volver a colocar órdenes
-                            time.sleep(5)
-                            
-                            # Colocar nuevas órdenes con el nuevo ciclo
-                            print(f"🔄 Cambiando a ciclo {next_distance_text} para {symbol}")
-                            place_limit_orders_with_sl(symbol)
-                            
-                            # Remover del set de procesados después de colocar nuevas órdenes
-                            processed_symbols.discard(symbol)
+            closed_symbols = scan_closed_positions()
+            
+            # Colocar las nuevas órdenes de todos los cierres en lote
+            if closed_symbols:
+                time.sleep(REARM_DELAY)  # Esperar un poco antes de volver a colocar órdenes
+                rearm_symbols(closed_symbols)
             
             time.sleep(5)  # Revisar cada 5 segundos
             
@@ -485,9 +1084,270 @@ def check_closed_positions():
             print(f"Error en check_closed_positions: {e}")
             time.sleep(10)
 
+def start_polling_threads():
+    """Inicia los threads de monitoreo por polling (modo de respaldo; solo la primera vez)"""
+    global polling_started
+    with bracket_lock:
+        if polling_started:
+            return
+        polling_started = True
+    # Una sola lectura de posiciones y órdenes de toda la cuenta por intervalo
+    account_snapshot.start()
+    
+    monitor_thread = threading.Thread(target=monitor_positions, daemon=True)
+    monitor_thread.start()
+    
+    closed_positions_thread = threading.Thread(target=check_closed_positions, daemon=True)
+    closed_positions_thread.start()
+
+def start_execution_engine():
+    """Inicia el motor por WebSocket. Devuelve el motor o None si no se pudo conectar"""
+    try:
+        from execution_engine import ExecutionEngine
+        
+        engine = ExecutionEngine(
+            WS_PRIVATE_URL or private_url(config.TESTNET),
+            config.api_key,
+            config.api_secret,
+            on_position=on_position_update,
+            on_order=on_order_update,
+            on_execution=on_execution_update,
+            on_resync=resync_positions,
+            on_failure=fallback_to_polling,
+            max_reconnects=WS_MAX_RECONNECTS,
+        )
+        if engine.start(timeout=WS_CONNECT_TIMEOUT):
+            return engine
+        engine.stop()
+        print("⚠️ No se pudo conectar al stream privado de Bybit")
+    except Exception as e:
+        print(f"Error al iniciar el motor WebSocket: {e}")
+    return None
+
+def fallback_to_polling():
+    """on_failure del motor WebSocket: sin stream privado, el bot sigue por polling"""
+    print("🔁 Stream privado sin conexión: pasando a monitoreo por polling")
+    enviar_mensaje_telegram(
+        "<b>⚠️ Stream privado de Bybit sin conexión</b>\n\n🔁 El bot continúa en modo polling"
+    )
+    start_polling_threads()
+
+def run_asyncio_runtime():
+    """
+    Ejecuta el bot con el runtime asyncio (una máquina de estados por símbolo)
+    
+    Comparte con el runtime de threads el journal (cada símbolo se concilia con él y con
+    el exchange al arrancar), TAKE_PROFIT_MODE, la política de distancia y el libro de PnL.
+    """
+    import asyncio
+    from async_runtime import run_async_bot
+    
+    if REQUOTE_ENABLED:
+        # La re-cotización modifica las órdenes desde el stream de precios con la sesión de threads
+        raise RuntimeError("REQUOTE_ENABLED no está soportado con RUNTIME = \"asyncio\"")
+    
+    saved_orders, saved_cycles = state_store.load()
+    compact_journal()
+    threading.Thread(target=journal_maintenance, name="journal-compact", daemon=True).start()
+    if DISTANCE_POLICY != "fixed":
+        # La volatilidad se alimenta con el stream público de precios
+        price_cache.start()
+    
+    asyncio.run(run_async_bot(
+        config.api_key,
+        config.api_secret,
+        config.TESTNET,
+        SYMBOLS,
+        STRATEGY,
+        enviar_mensaje_telegram,
+        max_concurrency=ASYNC_MAX_CONCURRENCY,
+        saved_orders=saved_orders,
+        saved_cycles=saved_cycles,
+        take_profit_mode=TAKE_PROFIT_MODE,
+        distance_for=lambda symbol, cycle: distance_policy.distance(symbol, cycle, STRATEGY),
+        on_transition=state_store.record,
+        on_close=handle_async_close,
+    ))
+
+def handle_async_close(symbol, cycle):
+    """on_close del runtime asyncio: PnL del cierre en el libro, con el ciclo que cerró"""
+    remember_closed_cycle(symbol, cycle)
+    get_pnl(symbol)
+    schedule_pnl_sync(symbol)
+
+# ==================== PERSISTENCIA Y ARRANQUE EN CALIENTE ====================
+def persist_state(symbol, event):
+    """Registra la transición del símbolo en el journal (un fallo no detiene el trading)"""
+    try:
+        state_store.record(symbol, event, active_orders.get(symbol), cycle_control.get(symbol))
+    except Exception as e:
+        print(f"Error al guardar el estado de {symbol}: {e}")
+
+def compact_journal():
+    """Recorta el journal a las últimas JOURNAL_KEEP transiciones (un fallo no detiene el trading)"""
+    try:
+        deleted = state_store.compact(keep=JOURNAL_KEEP)
+        if deleted:
+            print(f"🗜️ Journal compactado: {deleted} transiciones antiguas borradas")
+    except Exception as e:
+        print(f"Error al compactar el journal: {e}")
+
+def journal_maintenance():
+    """Compacta el journal cada JOURNAL_COMPACT_INTERVAL segundos (las re-cotizaciones lo hacen crecer)"""
+    while True:
+        time.sleep(JOURNAL_COMPACT_INTERVAL)
+        compact_journal()
+
+def restore_state(refresh=True):
+    """
+    Reconstruye active_orders y cycle_control desde el journal y los concilia con el
+    exchange usando una sola lectura masiva de posiciones y órdenes abiertas
+    (refresh=False si account_snapshot ya se acaba de refrescar)
+    
+    Returns:
+        Lista de símbolos que necesitan un bracket nuevo
+    """
+    saved_orders, saved_cycles = state_store.load()
+    cycle_control.update({s: c for s, c in saved_cycles.items() if s in SYMBOLS})
+    if refresh:
+        account_snapshot.refresh()
+    
+    to_rearm = []
+    stale_cancels = []
+    for symbol in SYMBOLS:
+        saved = saved_orders.get(symbol)
+        position, _ = account_snapshot.position(symbol)
+        orders, _ = account_snapshot.open_orders(symbol)
+        open_ids = {o['orderId'] for o in orders}
+        # El TP adjunto (Partial) aparece como orden condicional reduce only
+        has_take_profit = any(o.get('reduceOnly') for o in orders)
+        
+        if position:
+            active_orders[symbol] = {
+                **(saved or {'long_order_id': None, 'short_order_id': None, 'has_position': False}),
+                'state_since': time.monotonic(),
+            }
+            if has_take_profit:
+                print(f"♻️ {symbol}: posición con take profit restaurada")
+                active_orders[symbol]['has_position'] = True
+                persist_state(symbol, 'restored')
+            elif not active_orders[symbol]['has_position']:
+                # Se ejecutó una orden mientras el bot estaba detenido
+                handle_position_opened(symbol, position)
+            else:
+                print(f"♻️ {symbol}: posición restaurada sin take profit, colocándolo")
+                place_take_profit(symbol, position['side'], position['avgPrice'], position['size'])
+            continue
+        
+        if saved and saved.get('has_position'):
+            # La posición se cerró mientras el bot estaba detenido
+            active_orders[symbol] = saved
+            handle_position_closed(symbol, rearm=False)
+            to_rearm.append(symbol)
+            continue
+        
+        if saved:
+            legs = [leg for leg in (saved.get('long_order_id'), saved.get('short_order_id')) if leg]
+            if legs and all(leg in open_ids for leg in legs):
+                print(f"♻️ {symbol}: bracket restaurado")
+                active_orders[symbol] = {**saved, 'state_since': time.monotonic()}
+                continue
+            # Bracket incompleto: cancelar lo que quede y volver a armar
+            stale_cancels += [(symbol, leg) for leg in legs if leg in open_ids]
+            to_rearm.append(symbol)
+            continue
+        
+        # Sin registro: adoptar un bracket existente (una Buy y una Sell limit sin reduce only)
+        entries = [o for o in orders if not o.get('reduceOnly') and o.get('orderType') == "Limit"]
+        buys = [o['orderId'] for o in entries if o['side'] == "Buy"]
+        sells = [o['orderId'] for o in entries if o['side'] == "Sell"]
+        if len(buys) == 1 and len(sells) == 1:
+            print(f"♻️ {symbol}: bracket existente adoptado")
+            active_orders[symbol] = {
+                'long_order_id': buys[0],
+                'short_order_id': sells[0],
+                'has_position': False,
+                'state_since': time.monotonic(),
+            }
+            persist_state(symbol, 'adopted')
+        elif entries:
+            print(f"⚠️ {symbol}: {len(entries)} órdenes abiertas desconocidas, no se colocarán nuevas")
+        else:
+            to_rearm.append(symbol)
+    
+    if stale_cancels:
+        cancel_orders(stale_cancels)
+    return to_rearm
+
+def start_metrics():
+    """Inicia el endpoint local de métricas (y el perfilador si está habilitado)"""
+    if PROFILER_ENABLED:
+        profiler.start()
+    if METRICS_PORT is None:
+        return
+    try:
+        start_metrics_server(metrics, profiler, port=METRICS_PORT)
+        print(f"📈 Métricas en http://127.0.0.1:{METRICS_PORT}/metrics")
+    except OSError as e:
+        print(f"⚠️ No se pudo iniciar el servidor de métricas: {e}")
+
+def warm_start_from_store():
+    """Precarga volatilidad y últimos precios desde el almacén local, sin REST"""
+    if not TICK_STORE_PATH or not os.path.isdir(TICK_STORE_PATH):
+        return []
+    try:
+        from tick_store import TickStore, warm_start
+        
+        warmed = warm_start(TickStore(TICK_STORE_PATH), SYMBOLS, volatility, price_cache, hours=WARM_START_HOURS)
+        print(f"🔥 Historial local precargado: {len(warmed)}/{len(SYMBOLS)} símbolos")
+        return warmed
+    except Exception as e:
+        print(f"⚠️ No se pudo precargar el historial local: {e}")
+        return []
+
+def startup_reads():
+    """
+    Lecturas de arranque en paralelo (son independientes entre sí): conexiones,
+    instrumentos, historial local, precios y cuenta
+
+    Returns:
+        True si account_snapshot quedó refrescado
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    tasks = {
+        'conexiones': lambda: warm_up(session, connections=INITIAL_ARM_PARALLEL),
+        'historial': warm_start_from_store,
+        'precios': price_cache.refresh_all,
+        'cuenta': account_snapshot.refresh,
+    }
+    # Salvo que ya las haya enviado el proceso de datos de mercado del supervisor
+    if instrument_registry.is_stale():
+        tasks['instrumentos'] = instrument_registry.load
+    
+    with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+        futures = {name: pool.submit(task) for name, task in tasks.items()}
+    
+    if 'instrumentos' in futures:
+        # Sin especificaciones no se puede operar: el error detiene el arranque
+        print(f"📐 Instrumentos cargados: {futures['instrumentos'].result()}")
+        instrument_registry.start_refresh()
+    try:
+        futures['precios'].result()
+    except Exception as e:
+        print(f"Error al refrescar precios: {e}")
+    try:
+        futures['cuenta'].result()
+        return True
+    except Exception as e:
+        print(f"Error al leer la cuenta (se reintenta al restaurar el estado): {e}")
+        return False
+
 # ==================== FUNCIÓN PRINCIPAL ====================
 def main():
     """Función principal del bot"""
+    global execution_engine
+    notifier.start()
     try:
         print("=" * 80)
         print("🤖 BOT DE TRADING BYBIT - ÓRDENES LIMIT BIDIRECCIONALES CON CICLOS")
@@ -508,25 +1368,49 @@ def main():
             f"🔄 Ciclo 1: {DISTANCE_1_PERCENTAGE * 100}%\n"
             f"🔄 Ciclo 2: {DISTANCE_2_PERCENTAGE * 100}%\n"
             f"🛡️ Stop Loss: {STOP_LOSS_PERCENTAGE * 100}%\n"
-            f"🎯 Take Profit: {TAKE_PROFIT_PERCENTAGE * 100}%\n\n"
+            f"🎯 Take Profit: {TAKE_PROFIT_PERCENTAGE * 100}%\n"
+            f"📏 Distancia: {DISTANCE_POLICY}\n\n"
             f"ℹ️ El bot alterna entre ambos ciclos"
         )
         enviar_mensaje_telegram(mensaje_inicio)
+        start_metrics()
+        
+        if RUNTIME == "asyncio":
+            run_asyncio_runtime()
+            return
         
-        # Colocar órdenes iniciales para todos los símbolos
+        # Abrir las conexiones REST (un handshake TLS por conexión) y cargar
+        # instrumentos, historial local, precios y cuenta a la vez
+        cuenta_leida = startup_reads()
+        if HTTP_KEEPALIVE_INTERVAL:
+            start_keepalive(session, HTTP_KEEPALIVE_INTERVAL)
+        
+        # Iniciar el stream de precios (y la re-cotización que lo escucha)
+        if REQUOTE_ENABLED:
+            requoter.start()
+        price_cache.start()
+        
+        # Restaurar el estado guardado y conciliarlo con el exchange
+        print("\n♻️ Restaurando estado y conciliando con el exchange...\n")
+        pendientes = restore_state(refresh=not cuenta_leida)
+        compact_journal()
+        threading.Thread(target=journal_maintenance, name="journal-compact", daemon=True).start()
+        
+        # Colocar órdenes solo para los símbolos que no tienen bracket ni posición
         print("\n🚀 Colocando órdenes iniciales...\n")
-        for symbol in SYMBOLS:
-            place_limit_orders_with_sl(symbol)
-            time.sleep(2)  # Pequeña pausa entre símbolos
+        rearm_symbols(pendientes, max_parallel=INITIAL_ARM_PARALLEL)
+        print(f"✅ Símbolos activos: {len(active_orders)}/{len(SYMBOLS)}")
+        threading.Thread(target=retry_pending_rearms, name="rearm-retry", daemon=True).start()
         
         # Iniciar threads de monitoreo
         print("\n🔄 Iniciando threads de monitoreo...\n")
         
-        monitor_thread = threading.Thread(target=monitor_positions, daemon=True)
-        monitor_thread.start()
-        
-        closed_positions_thread = threading.Thread(target=check_closed_positions, daemon=True)
-        closed_positions_thread.start()
+        execution_engine = start_execution_engine() if EXECUTION_MODE == "websocket" else None
+        if execution_engine:
+            print("⚡ Modo WebSocket: eventos de posición en tiempo real")
+        else:
+            print("🔁 Modo polling: monitoreo periódico por REST")
+            start_polling_threads()
         
         print("✅ Bot en funcionamiento. Presiona Ctrl+C para detener.\n")
         
@@ -539,11 +1423,13 @@ def main():
         print("\n\n⚠️ Deteniendo bot...")
         mensaje_fin = "<b>⚠️ Bot detenido</b>"
         enviar_mensaje_telegram(mensaje_fin)
+        notifier.flush(timeout=TELEGRAM_FLUSH_TIMEOUT)
         print("✅ Bot detenido correctamente")
     except Exception as e:
         print(f"\n❌ Error crítico: {e}")
         mensaje_error = f"<b>❌ Error crítico en el bot</b>\n\n{str(e)}"
         enviar_mensaje_telegram(mensaje_error)
+        notifier.flush(timeout=TELEGRAM_FLUSH_TIMEOUT)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
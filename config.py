@@ -13,3 +13,15 @@ chat_id = os.getenv('TELEGRAM_CHAT_ID', 'coloca tu chat ID aqui')
 
 # Trading Parameters
 TESTNET = False  # Cambiar a False para usar mainnet
+
+# Cuentas para repartir símbolos entre procesos (supervisor.py). La principal usa
+# BYBIT_API_KEY/BYBIT_API_SECRET; las subcuentas, BYBIT_API_KEY_1/BYBIT_API_SECRET_1, etc.
+ACCOUNTS = [{'name': 'main', 'api_key': api_key, 'api_secret': api_secret}]
+_i = 1
+while os.getenv(f'BYBIT_API_KEY_{_i}'):
+    ACCOUNTS.append({
+        'name': os.getenv(f'BYBIT_ACCOUNT_NAME_{_i}', f'sub{_i}'),
+        'api_key': os.getenv(f'BYBIT_API_KEY_{_i}'),
+        'api_secret': os.getenv(f'BYBIT_API_SECRET_{_i}'),
+    })
+    _i += 1
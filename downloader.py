@@ -0,0 +1,219 @@
+"""
+Descarga de historial de mercado al almacén local (tick_store.py).
+
+- klines: /v5/market/kline paginado hacia adelante (1000 velas por petición), solo
+  velas cerradas.
+- trades: volcados diarios públicos de Bybit (public.bybit.com/trading), un archivo
+  .csv.gz por símbolo y día; el día en curso se publica al día siguiente.
+
+Los símbolos se descargan en paralelo (un trabajo por tipo y símbolo). Tras cada bloque
+guardado se actualiza checkpoints.json, así una descarga interrumpida continúa donde
+quedó; además los bloques son idempotentes y nunca se duplican filas.
+
+Uso:
+    python downloader.py --days 30 --kinds klines,trades --workers 8 --compact
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from tick_store import DAY_MS, TickStore, day_name, day_start_ms
+
+KLINE_LIMIT = 1000  # Velas por petición de /v5/market/kline
+PUBLIC_TRADES_URL = "https://public.bybit.com/trading"
+INTERVAL_MS = {
+    "1": 60_000, "3": 180_000, "5": 300_000, "15": 900_000, "30": 1_800_000,
+    "60": 3_600_000, "120": 7_200_000, "240": 14_400_000, "360": 21_600_000, "720": 43_200_000,
+    "D": DAY_MS,
+}
+
+
+class Downloader:
+    """
+    Args:
+        store: TickStore de destino
+        session: sesión HTTP (solo endpoints públicos) para las klines
+        symbols: símbolos a descargar
+        start_ms: inicio del historial si un símbolo no tiene checkpoint
+        interval: intervalo de las klines ("1" = 1 minuto)
+        workers: descargas simultáneas
+    """
+
+    def __init__(self, store, session, symbols, start_ms, interval="1", workers=8, category="linear",
+                 trades_url=PUBLIC_TRADES_URL):
+        self.store = store
+        self.session = session
+        self.symbols = list(symbols)
+        self.start_ms = start_ms
+        self.interval = interval
+        self.workers = workers
+        self.category = category
+        self.trades_url = trades_url
+        self._lock = threading.Lock()
+        self.checkpoints = self._load_checkpoints()
+
+    # ---------- checkpoints ----------
+    @property
+    def _checkpoint_path(self):
+        return os.path.join(self.store.root, "checkpoints.json")
+
+    def _load_checkpoints(self):
+        try:
+            with open(self._checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _checkpoint(self, key, value):
+        with self._lock:
+            self.checkpoints[key] = value
+            os.makedirs(self.store.root, exist_ok=True)
+            tmp = self._checkpoint_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.checkpoints, f, indent=1, sort_keys=True)
+            os.replace(tmp, self._checkpoint_path)
+
+    def _resume_from(self, key, kind, symbol):
+        """Siguiente marca de tiempo a descargar: checkpoint o, si falta, lo ya guardado"""
+        resume = self.checkpoints.get(key)
+        if resume is None:
+            last = self.store.last_ts(kind, symbol)
+            resume = last + 1 if last is not None else self.start_ms
+        return max(resume, self.start_ms)
+
+    # ---------- klines ----------
+    def download_klines(self, symbol):
+        step = INTERVAL_MS[self.interval]
+        key = f"klines/{self.interval}/{symbol}"
+        start = self._resume_from(key, 'klines', symbol)
+        start -= start % step
+        total = 0
+        while True:
+            closed_until = int(time.time() * 1000) // step * step  # Inicio de la vela en curso
+            if start >= closed_until:
+                break
+            end = min(start + KLINE_LIMIT * step, closed_until) - 1
+            response = self.session.get_kline(
+                category=self.category, symbol=symbol, interval=self.interval,
+                start=start, end=end, limit=KLINE_LIMIT,
+            )
+            rows = response['result']['list']  # Más nueva primero
+            if rows:
+                data = np.array(rows, dtype=np.float64)
+                total += self.store.append('klines', symbol, {
+                    'ts': data[:, 0].astype(np.int64),
+                    'open': data[:, 1], 'high': data[:, 2], 'low': data[:, 3], 'close': data[:, 4],
+                    'volume': data[:, 5], 'turnover': data[:, 6],
+                })
+            start = end + 1
+            self._checkpoint(key, start)
+        return total
+
+    # ---------- trades ----------
+    def _fetch_trades_day(self, symbol, day):
+        url = f"{self.trades_url}/{symbol}/{symbol}{day}.csv.gz"
+        try:
+            with urllib.request.urlopen(url, timeout=60) as response:
+                raw = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None  # Día sin volcado (símbolo todavía no listado)
+            raise
+        ts, price, size, side = [], [], [], []
+        with gzip.open(io.BytesIO(raw), "rt") as f:
+            for row in csv.DictReader(f):
+                ts.append(float(row['timestamp']))
+                price.append(float(row['price']))
+                size.append(float(row['size']))
+                side.append(1 if row['side'] == "Buy" else -1)
+        # Los volcados usan segundos con decimales
+        return {
+            'ts': (np.array(ts) * 1000).round().astype(np.int64),
+            'price': np.array(price), 'size': np.array(size), 'side': np.array(side, dtype=np.int8),
+        }
+
+    def download_trades(self, symbol):
+        key = f"trades/{symbol}"
+        start = self._resume_from(key, 'trades', symbol)
+        day = day_start_ms(day_name(start))
+        today = day_start_ms(day_name(int(time.time() * 1000)))
+        total = 0
+        while day < today:
+            name = day_name(day)
+            if name not in self.store.days('trades', symbol):
+                data = self._fetch_trades_day(symbol, name)
+                if data is not None:
+                    total += self.store.append('trades', symbol, data)
+            day += DAY_MS
+            self._checkpoint(key, day)
+        return total
+
+    # ---------- ejecución ----------
+    def run(self, kinds=("klines", "trades")):
+        """Descarga todos los tipos y símbolos en paralelo. Devuelve {(tipo, símbolo): filas}"""
+        jobs = [(kind, symbol) for kind in kinds for symbol in self.symbols]
+
+        def run_job(job):
+            kind, symbol = job
+            try:
+                rows = self.download_klines(symbol) if kind == "klines" else self.download_trades(symbol)
+                print(f"📥 {kind} {symbol}: {rows} filas nuevas")
+                return rows
+            except Exception as e:
+                print(f"Error al descargar {kind} de {symbol} (se retomará desde el checkpoint): {e}")
+                return 0
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            return dict(zip(jobs, pool.map(run_job, jobs)))
+
+    def compact(self, kinds=("klines", "trades")):
+        """Comprime los días cerrados de todos los símbolos"""
+        return sum(self.store.compact(kind, symbol) for kind in kinds for symbol in self.symbols)
+
+
+def main():
+    import config
+    from pybit.unified_trading import HTTP
+
+    from rate_limiter import RateLimitedSession
+    from transport import RetryingSession, configure_http
+
+    parser = argparse.ArgumentParser(description="Descarga klines y trades históricos al almacén local")
+    parser.add_argument("--symbols", default=None, help="Símbolos separados por coma (por defecto SYMBOLS del bot)")
+    parser.add_argument("--days", type=int, default=7, help="Días de historial si no hay checkpoint")
+    parser.add_argument("--kinds", default="klines,trades")
+    parser.add_argument("--interval", default="1", choices=sorted(INTERVAL_MS), help="Intervalo de las klines")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--store", default="market_data")
+    parser.add_argument("--compact", action="store_true", help="Comprimir los días cerrados al terminar")
+    args = parser.parse_args()
+
+    if args.symbols:
+        symbols = args.symbols.split(",")
+    else:
+        import bybit_bot
+
+        symbols = bybit_bot.SYMBOLS
+    session = RetryingSession(RateLimitedSession(configure_http(
+        HTTP(testnet=config.TESTNET, return_response_headers=True), pool_maxsize=args.workers
+    )))
+    start_ms = int(time.time() * 1000) - args.days * DAY_MS
+    downloader = Downloader(TickStore(args.store), session, symbols, start_ms, args.interval, args.workers)
+    kinds = args.kinds.split(",")
+    downloader.run(kinds)
+    if args.compact:
+        print(f"🗜️ Días comprimidos: {downloader.compact(kinds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+"""
+Simulador en proceso de los endpoints v5 de Bybit que usa el bot (categoría linear).
+
+ExchangeSimulator tiene la misma interfaz que la sesión HTTP de pybit (solo kwargs,
+respuestas {'retCode', 'retMsg', 'result', 'retExtInfo', 'time'}) y un motor de
+ejecución mínimo en modo one-way:
+
+- Órdenes limit que se llenan a su precio cuando el último precio las cruza.
+- stopLoss/takeProfit adjuntos a la orden de entrada (pasan a la posición al llenarse;
+  un TP con tpLimitPrice se ejecuta a ese precio).
+- Órdenes reduce only que solo reducen la posición y se cancelan si esta se cierra.
+- PnL cerrado neto de comisiones (maker en limit, taker en stop loss) y lista de ejecuciones.
+
+Los precios avanzan un paso por símbolo con step(), sobre caminos sintéticos
+(random_walk) o reproducidos (cualquier iterable, p. ej. backtester.load_series).
+El simulador cuenta las llamadas por endpoint y mide, del lado del exchange, la
+latencia entre la ejecución de una entrada y la llegada de su take profit.
+
+Uso:
+    sim = ExchangeSimulator()
+    sim.add_symbol("LINKUSDT", random_walk(15.0, 10_000, seed=1))
+    bybit_bot.use_session(sim)
+"""
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+MAKER_FEE = Decimal("0.0002")
+TAKER_FEE = Decimal("0.00055")
+
+# Códigos de error de la API v5 que reproduce el simulador
+PARAMS_ERROR = 10001
+ORDER_NOT_EXISTS = 110001
+REDUCE_ONLY_REJECTED = 110017
+DUPLICATE_ORDER_LINK_ID = 110072
+
+
+def random_walk(start, steps, volatility=0.002, seed=None):
+    """Camino de precios log-normal sintético (volatility = desviación por paso)"""
+    rng = random.Random(seed)
+    price = float(start)
+    for _ in range(steps):
+        yield price
+        price *= 1 + rng.gauss(0, volatility)
+
+
+def _ms():
+    return int(time.time() * 1000)
+
+
+def _ok(result, ext=None):
+    return {'retCode': 0, 'retMsg': "OK", 'result': result, 'retExtInfo': ext or {}, 'time': _ms()}
+
+
+def _error(code, msg):
+    return {'retCode': code, 'retMsg': msg, 'result': {}, 'retExtInfo': {}, 'time': _ms()}
+
+
+@dataclass
+class SimOrder:
+    order_id: str
+    order_link_id: str
+    symbol: str
+    side: str
+    order_type: str
+    price: Decimal
+    qty: Decimal
+    reduce_only: bool = False
+    stop_loss: Optional[Decimal] = None
+    take_profit: Optional[Decimal] = None
+    created: int = field(default_factory=_ms)
+
+    def as_dict(self):
+        return {
+            'orderId': self.order_id,
+            'orderLinkId': self.order_link_id,
+            'symbol': self.symbol,
+            'side': self.side,
+            'orderType': self.order_type,
+            'price': str(self.price),
+            'qty': str(self.qty),
+            'reduceOnly': self.reduce_only,
+            'orderStatus': "New",
+            'stopLoss': str(self.stop_loss or ""),
+            'takeProfit': str(self.take_profit or ""),
+            'createdTime': str(self.created),
+        }
+
+
+@dataclass
+class SimPosition:
+    side: str = ""
+    size: Decimal = Decimal(0)
+    avg_price: Decimal = Decimal(0)
+    stop_loss: Optional[Decimal] = None
+    take_profit: Optional[Decimal] = None
+    fees: Decimal = Decimal(0)
+    updated: int = 0
+
+
+@dataclass
+class SimMarket:
+    symbol: str
+    path: Iterator[float]
+    tick_size: Decimal
+    qty_step: Decimal
+    min_qty: Decimal
+    max_qty: Decimal
+    last: Decimal = Decimal(0)
+    position: SimPosition = field(default_factory=SimPosition)
+    orders: Dict[str, SimOrder] = field(default_factory=dict)
+    closed_pnl: List[dict] = field(default_factory=list)
+    executions: List[dict] = field(default_factory=list)
+    exhausted: bool = False
+
+    def advance(self):
+        try:
+            price = Decimal(str(next(self.path)))
+        except StopIteration:
+            self.exhausted = True
+            return False
+        self.last = (price / self.tick_size).to_integral_value() * self.tick_size
+        return True
+
+
+class ExchangeSimulator:
+    """
+    Exchange falso con la interfaz de pybit.unified_trading.HTTP.
+
+    Args:
+        latency: segundos que duerme cada llamada (simula el viaje de red)
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.markets: Dict[str, SimMarket] = {}
+        self.calls: Counter = Counter()
+        self.fills = 0
+        self.closes = 0
+        self.fill_to_tp: List[float] = []  # Segundos entre una entrada y su take profit
+        self._filled_at: Dict[str, float] = {}
+        self._link_ids = set()
+        self._lock = threading.RLock()
+
+    # ==================== MERCADO ====================
+    def add_symbol(self, symbol, path, tick_size="0.001", qty_step="0.1", min_qty="0.1", max_qty="100000"):
+        market = SimMarket(
+            symbol, iter(path), Decimal(tick_size), Decimal(qty_step), Decimal(min_qty), Decimal(max_qty)
+        )
+        market.advance()
+        self.markets[symbol] = market
+
+    @classmethod
+    def synthetic(cls, symbols, steps=10_000, start=15.0, volatility=0.002, seed=0, **kwargs):
+        """Simulador con un random walk independiente por símbolo"""
+        sim = cls(**kwargs)
+        for i, symbol in enumerate(symbols):
+            sim.add_symbol(symbol, random_walk(start, steps, volatility, seed=seed + i))
+        return sim
+
+    def step(self, steps=1):
+        """Avanza el precio de todos los símbolos y ejecuta lo que corresponda. False si se agotaron"""
+        alive = False
+        for _ in range(steps):
+            with self._lock:
+                for market in self.markets.values():
+                    if market.advance():
+                        alive = True
+                        self._match(market)
+        return alive
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.fills = 0
+            self.closes = 0
+            self.fill_to_tp.clear()
+
+    def _match(self, market):
+        price = market.last
+        position = market.position
+
+        # Stop loss y take profit de la posición
+        if position.size:
+            long = position.side == "Buy"
+            if position.stop_loss and (price <= position.stop_loss if long else price >= position.stop_loss):
+                self._fill(market, "Sell" if long else "Buy", position.size, price, TAKER_FEE)
+            elif position.take_profit and (
+                price >= position.take_profit if long else price <= position.take_profit
+            ):
+                self._fill(market, "Sell" if long else "Buy", position.size, position.take_profit, MAKER_FEE)
+
+        for order in list(market.orders.values()):
+            crossed = price <= order.price if order.side == "Buy" else price >= order.price
+            if not crossed or order.order_id not in market.orders:
+                continue
+            del market.orders[order.order_id]
+            qty = order.qty
+            position = market.position
+            if order.reduce_only:
+                if not position.size or position.side == order.side:
+                    continue
+                qty = min(qty, position.size)
+            self._fill(market, order.side, qty, order.price, MAKER_FEE, order)
+
+    def _fill(self, market, side, qty, price, fee_rate, order=None):
+        position = market.position
+        fee = qty * price * fee_rate
+        now = _ms()
+        market.executions.append({
+            'execId': uuid.uuid4().hex,
+            'symbol': market.symbol,
+            'orderId': order.order_id if order else "",
+            'side': side,
+            'execPrice': str(price),
+            'execQty': str(qty),
+            'execFee': str(fee),
+            'execTime': str(now),
+            'isMaker': fee_rate == MAKER_FEE,
+        })
+
+        if not position.size or position.side == side:
+            # Abre o aumenta la posición
+            total = position.size + qty
+            position.avg_price = (position.avg_price * position.size + price * qty) / total
+            position.size = total
+            position.side = side
+            position.fees += fee
+            if order is not None:
+                position.stop_loss = order.stop_loss or position.stop_loss
+                position.take_profit = order.take_profit or position.take_profit
+            position.updated = now
+            self.fills += 1
+            # Un TP adjunto lo activa el exchange en el mismo fill: no hay latencia que
+            # medir, solo la del TP que coloca el bot (TAKE_PROFIT_MODE = "separate")
+            if order is None or not order.take_profit:
+                self._filled_at[market.symbol] = time.perf_counter()
+            return
+
+        # Reduce (o invierte) la posición
+        closing = min(qty, position.size)
+        direction = 1 if position.side == "Buy" else -1
+        gross = (price - position.avg_price) * closing * direction
+        entry_fee = position.fees * closing / position.size
+        market.closed_pnl.append({
+            'symbol': market.symbol,
+            'side': side,
+            'qty': str(closing),
+            'avgEntryPrice': str(position.avg_price),
+            'avgExitPrice': str(price),
+            'closedPnl': str(gross - entry_fee - fee),
+            'orderId': order.order_id if order else uuid.uuid4().hex,
+            'createdTime': str(now),
+            'updatedTime': str(now),
+        })
+        position.fees -= entry_fee
+        position.size -= closing
+        position.updated = now
+        if not position.size:
+            market.position = SimPosition(updated=now)
+            self.closes += 1
+            self._filled_at.pop(market.symbol, None)
+            # Bybit cancela las reduce only que quedan sin posición
+            for order_id in [o.order_id for o in market.orders.values() if o.reduce_only]:
+                del market.orders[order_id]
+        if qty > closing:
+            self._fill(market, side, qty - closing, price, fee_rate, order)
+
+    # ==================== LLAMADAS ====================
+    def _enter(self, name):
+        if self.latency:
+            time.sleep(self.latency)
+        self.calls[name] += 1
+
+    def _market(self, symbol):
+        market = self.markets.get(symbol)
+        if market is None:
+            raise KeyError(symbol)
+        return market
+
+    def get_instruments_info(self, category="linear", symbol=None, **kwargs):
+        self._enter("get_instruments_info")
+        markets = [self._market(symbol)] if symbol else list(self.markets.values())
+        return _ok({
+            'category': category,
+            'list': [{
+                'symbol': m.symbol,
+                'status': "Trading",
+                'priceFilter': {'tickSize': str(m.tick_size)},
+                'lotSizeFilter': {
+                    'qtyStep': str(m.qty_step),
+                    'minOrderQty': str(m.min_qty),
+                    'maxOrderQty': str(m.max_qty),
+                },
+            } for m in markets],
+            'nextPageCursor': "",
+        })
+
+    def get_server_time(self, **kwargs):
+        self._enter("get_server_time")
+        now = _ms()
+        return _ok({'timeSecond': str(now // 1000), 'timeNano': str(now * 1_000_000)})
+
+    def get_tickers(self, category="linear", symbol=None, **kwargs):
+        self._enter("get_tickers")
+        with self._lock:
+            markets = [self._market(symbol)] if symbol else list(self.markets.values())
+            items = [{
+                'symbol': m.symbol,
+                'lastPrice': str(m.last),
+                'bid1Price': str(m.last - m.tick_size),
+                'ask1Price': str(m.last + m.tick_size),
+                'markPrice': str(m.last),
+            } for m in markets]
+        return _ok({'category': category, 'list': items})
+
+    def _place(self, order):
+        """Valida y registra una orden. Devuelve (código, mensaje, SimOrder o None)"""
+        market = self.markets.get(order.get('symbol'))
+        if market is None:
+            return PARAMS_ERROR, "symbol invalid", None
+        link_id = order.get('orderLinkId') or uuid.uuid4().hex
+        if link_id in self._link_ids:
+            return DUPLICATE_ORDER_LINK_ID, "OrderLinkedID is duplicate", None
+        try:
+            qty = Decimal(str(order['qty']))
+            price = Decimal(str(order.get('price') or market.last))
+        except Exception:
+            return PARAMS_ERROR, "params error", None
+        if qty < market.min_qty or qty > market.max_qty:
+            return PARAMS_ERROR, "qty invalid", None
+
+        reduce_only = bool(order.get('reduceOnly'))
+        position = market.position
+        if reduce_only and (not position.size or position.side == order['side']):
+            return REDUCE_ONLY_REJECTED, "current position is zero, cannot fix reduce-only order qty", None
+
+        sim_order = SimOrder(
+            order_id=uuid.uuid4().hex,
+            order_link_id=link_id,
+            symbol=market.symbol,
+            side=order['side'],
+            order_type=order.get('orderType', "Limit"),
+            price=price,
+            qty=qty,
+            reduce_only=reduce_only,
+            stop_loss=Decimal(str(order['stopLoss'])) if order.get('stopLoss') else None,
+            take_profit=Decimal(str(order.get('tpLimitPrice') or order['takeProfit']))
+            if order.get('takeProfit') else None,
+        )
+        self._link_ids.add(link_id)
+        if reduce_only:
+            filled_at = self._filled_at.pop(market.symbol, None)
+            if filled_at is not None:
+                self.fill_to_tp.append(time.perf_counter() - filled_at)
+
+        if sim_order.order_type == "Market":
+            self._fill(market, sim_order.side, qty, market.last, TAKER_FEE, sim_order)
+        else:
+            market.orders[sim_order.order_id] = sim_order
+            self._match(market)
+        return 0, "OK", sim_order
+
+    def place_order(self, category="linear", **order):
+        self._enter("place_order")
+        with self._lock:
+            code, msg, sim_order = self._place(order)
+        if code:
+            return _error(code, msg)
+        return _ok({'orderId': sim_order.order_id, 'orderLinkId': sim_order.order_link_id})
+
+    def place_batch_order(self, category="linear", request=()):
+        self._enter("place_batch_order")
+        results, statuses = [], []
+        with self._lock:
+            for order in request:
+                code, msg, sim_order = self._place(order)
+                results.append({
+                    'category': category,
+                    'symbol': order.get('symbol'),
+                    'orderId': sim_order.order_id if sim_order else "",
+                    'orderLinkId': order.get('orderLinkId', ""),
+                })
+                statuses.append({'code': code, 'msg': msg})
+        return _ok({'list': results}, {'list': statuses})
+
+    def _cancel(self, symbol, order_id=None, order_link_id=None):
+        market = self.markets.get(symbol)
+        if market is None:
+            return PARAMS_ERROR, "symbol invalid", None
+        for order in market.orders.values():
+            if order.order_id == order_id or (order_link_id and order.order_link_id == order_link_id):
+                del market.orders[order.order_id]
+                return 0, "OK", order
+        return ORDER_NOT_EXISTS, "order not exists or too late to cancel", None
+
+    def cancel_order(self, category="linear", symbol=None, orderId=None, orderLinkId=None, **kwargs):
+        self._enter("cancel_order")
+        with self._lock:
+            code, msg, order = self._cancel(symbol, orderId, orderLinkId)
+        if code:
+            return _error(code, msg)
+        return _ok({'orderId': order.order_id, 'orderLinkId': order.order_link_id})
+
+    def cancel_batch_order(self, category="linear", request=()):
+        self._enter("cancel_batch_order")
+        results, statuses = [], []
+        with self._lock:
+            for item in request:
+                code, msg, order = self._cancel(item.get('symbol'), item.get('orderId'), item.get('orderLinkId'))
+                results.append({
+                    'category': category,
+                    'symbol': item.get('symbol'),
+                    'orderId': order.order_id if order else "",
+                    'orderLinkId': order.order_link_id if order else "",
+                })
+                statuses.append({'code': code, 'msg': msg})
+        return _ok({'list': results}, {'list': statuses})
+
+    def _amend(self, symbol, order_id=None, order_link_id=None, changes=None):
+        market = self.markets.get(symbol)
+        order = next(
+            (o for o in (market.orders.values() if market else ())
+             if o.order_id == order_id or (order_link_id and o.order_link_id == order_link_id)),
+            None,
+        )
+        if order is None:
+            return ORDER_NOT_EXISTS, "order not exists or too late to replace", None
+        if changes.get('price'):
+            order.price = Decimal(str(changes['price']))
+        if changes.get('qty'):
+            order.qty = Decimal(str(changes['qty']))
+        if changes.get('stopLoss'):
+            order.stop_loss = Decimal(str(changes['stopLoss']))
+        if changes.get('tpLimitPrice') or changes.get('takeProfit'):
+            order.take_profit = Decimal(str(changes.get('tpLimitPrice') or changes['takeProfit']))
+        self._match(market)
+        return 0, "OK", order
+
+    def amend_order(self, category="linear", symbol=None, orderId=None, orderLinkId=None, **changes):
+        self._enter("amend_order")
+        with self._lock:
+            code, msg, order = self._amend(symbol, orderId, orderLinkId, changes)
+        if code:
+            return _error(code, msg)
+        return _ok({'orderId': order.order_id, 'orderLinkId': order.order_link_id})
+
+    def amend_batch_order(self, category="linear", request=()):
+        self._enter("amend_batch_order")
+        results, statuses = [], []
+        with self._lock:
+            for item in request:
+                code, msg, order = self._amend(item.get('symbol'), item.get('orderId'), item.get('orderLinkId'), item)
+                results.append({
+                    'category': category,
+                    'symbol': item.get('symbol'),
+                    'orderId': order.order_id if order else "",
+                    'orderLinkId': order.order_link_id if order else "",
+                })
+                statuses.append({'code': code, 'msg': msg})
+        return _ok({'list': results}, {'list': statuses})
+
+    def get_positions(self, category="linear", symbol=None, settleCoin=None, **kwargs):
+        self._enter("get_positions")
+        with self._lock:
+            if symbol:
+                markets = [self._market(symbol)]
+            else:
+                markets = [m for m in self.markets.values() if m.position.size]
+            items = [{
+                'symbol': m.symbol,
+                'side': m.position.side,
+                'size': str(m.position.size),
+                'avgPrice': str(m.position.avg_price),
+                'markPrice': str(m.last),
+                'stopLoss': str(m.position.stop_loss or ""),
+                'takeProfit': str(m.position.take_profit or ""),
+                'positionIdx': 0,
+                'updatedTime': str(m.position.updated),
+            } for m in markets]
+        return _ok({'category': category, 'list': items, 'nextPageCursor': ""})
+
+    def get_open_orders(self, category="linear", symbol=None, settleCoin=None, orderId=None, orderLinkId=None,
+                        **kwargs):
+        self._enter("get_open_orders")
+        with self._lock:
+            markets = [self._market(symbol)] if symbol else list(self.markets.values())
+            items = [
+                o.as_dict() for m in markets for o in m.orders.values()
+                if (not orderId or o.order_id == orderId) and (not orderLinkId or o.order_link_id == orderLinkId)
+            ]
+        return _ok({'category': category, 'list': items, 'nextPageCursor': ""})
+
+    def _history(self, attr, time_field, symbol, limit, startTime, endTime, cursor):
+        """Registros del más nuevo al más viejo, filtrados por tiempo y paginados por cursor"""
+        with self._lock:
+            markets = [self._market(symbol)] if symbol else list(self.markets.values())
+            items = sorted(
+                (r for m in markets for r in getattr(m, attr)
+                 if (startTime is None or int(r[time_field]) >= int(startTime))
+                 and (endTime is None or int(r[time_field]) <= int(endTime))),
+                key=lambda r: int(r[time_field]),
+                reverse=True,
+            )
+        offset = int(cursor or 0)
+        page = items[offset:offset + int(limit)]
+        next_cursor = str(offset + int(limit)) if offset + int(limit) < len(items) else ""
+        return page, next_cursor
+
+    def get_closed_pnl(self, category="linear", symbol=None, limit=50, startTime=None, endTime=None,
+                       cursor=None, **kwargs):
+        self._enter("get_closed_pnl")
+        items, next_cursor = self._history('closed_pnl', 'createdTime', symbol, limit, startTime, endTime, cursor)
+        return _ok({'category': category, 'list': items, 'nextPageCursor': next_cursor})
+
+    def get_executions(self, category="linear", symbol=None, limit=50, startTime=None, endTime=None,
+                       cursor=None, **kwargs):
+        self._enter("get_executions")
+        items, next_cursor = self._history('executions', 'execTime', symbol, limit, startTime, endTime, cursor)
+        return _ok({'category': category, 'list': items, 'nextPageCursor': next_cursor})
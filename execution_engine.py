@@ -0,0 +1,147 @@
+"""
+Motor de ejecución basado en los streams privados de Bybit (position, order, execution).
+
+Sustituye el sondeo de monitor_positions / check_closed_positions: cada evento se
+despacha en cuanto llega. Los eventos de un mismo símbolo se procesan en orden y de
+uno en uno; símbolos distintos se procesan en paralelo, así una pausa en un símbolo
+no retrasa a los demás.
+"""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from ws_client import BybitWebSocket
+
+PRIVATE_TOPICS = ("position.linear", "order.linear", "execution.linear")
+
+
+class KeyedDispatcher:
+    """Ejecuta tareas en un pool de threads serializándolas por clave (símbolo)"""
+
+    def __init__(self, max_workers=8):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exec")
+        self._queues: Dict[str, deque] = {}
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            self._queues.setdefault(key, deque()).append((fn, args))
+            if key in self._running:
+                return
+            self._running.add(key)
+        self._pool.submit(self._drain, key)
+
+    def _drain(self, key):
+        while True:
+            with self._lock:
+                queue = self._queues.get(key)
+                if not queue:
+                    self._running.discard(key)
+                    self._queues.pop(key, None)
+                    return
+                fn, args = queue.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Error procesando evento de {key}: {e}")
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+def normalize_position(item):
+    """Adapta un mensaje del stream 'position' al formato de get_positions (side, size, avgPrice)"""
+    position = dict(item)
+    if not position.get('avgPrice'):
+        position['avgPrice'] = position.get('entryPrice', '0')
+    return position
+
+
+class ExecutionEngine:
+    """
+    Escucha los streams privados y llama a los handlers del bot.
+
+    Args:
+        on_position: handler(symbol, position) para cada actualización de posición
+        on_order: handler(symbol, order) para cada actualización de orden (opcional)
+        on_execution: handler(symbol, execution) para cada ejecución (opcional)
+        on_resync: función(symbols) -> {symbol: position} que se llama con None (todos)
+            tras conectar o reconectar, y desde resync(); recupera por
+            REST las posiciones que pudieron cambiar sin conexión y se despachan como
+            actualizaciones normales
+        on_failure: función() que se llama si el stream no logra reconectar tras
+            `max_reconnects` intentos seguidos (el motor queda detenido)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        api_secret: str,
+        on_position: Callable[[str, dict], None],
+        on_order: Optional[Callable[[str, dict], None]] = None,
+        on_execution: Optional[Callable[[str, dict], None]] = None,
+        on_resync: Optional[Callable[..., dict]] = None,
+        on_failure: Optional[Callable[[], None]] = None,
+        max_workers: int = 8,
+        max_reconnects: Optional[int] = None,
+    ):
+        self.on_position = on_position
+        self.on_order = on_order
+        self.on_execution = on_execution
+        self.on_resync = on_resync
+        self.dispatcher = KeyedDispatcher(max_workers=max_workers)
+        self.stream = BybitWebSocket(
+            url,
+            PRIVATE_TOPICS,
+            self._on_message,
+            api_key=api_key,
+            api_secret=api_secret,
+            on_connect=self._on_connect,
+            max_reconnects=max_reconnects,
+            on_give_up=on_failure,
+        )
+
+    def start(self, timeout=10):
+        """Conecta y espera la suscripción. Devuelve False si no se logró a tiempo"""
+        self.stream.start()
+        return self.stream.wait_connected(timeout)
+
+    def stop(self):
+        self.stream.stop()
+        self.dispatcher.shutdown()
+
+    def resync(self, symbols=None):
+        """Relee por REST las posiciones de `symbols` (todas si es None) y las despacha"""
+        if self.on_resync:
+            # Se ejecuta fuera del thread que llama (p. ej. el del WebSocket) para no bloquearlo
+            threading.Thread(target=self._resync, args=(symbols,), daemon=True).start()
+
+    def _on_connect(self):
+        self.resync()
+
+    def _resync(self, symbols=None):
+        try:
+            positions = self.on_resync(symbols)
+        except Exception as e:
+            print(f"Error al resincronizar posiciones: {e}")
+            return
+        for symbol, position in positions.items():
+            self.dispatcher.submit(symbol, self.on_position, symbol, position)
+
+    def _on_message(self, message):
+        topic = message['topic'].split('.')[0]
+        for item in message.get('data', []):
+            if item.get('category', 'linear') != 'linear':
+                continue
+            symbol = item.get('symbol')
+            if not symbol:
+                continue
+            if topic == 'position':
+                self.dispatcher.submit(symbol, self.on_position, symbol, normalize_position(item))
+            elif topic == 'order' and self.on_order:
+                self.dispatcher.submit(symbol, self.on_order, symbol, item)
+            elif topic == 'execution' and self.on_execution:
+                self.dispatcher.submit(symbol, self.on_execution, symbol, item)
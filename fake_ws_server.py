@@ -0,0 +1,222 @@
+"""
+Servidor WebSocket local que imita los streams privados v5 de Bybit, para probar el
+motor de ejecución sin conectarse al exchange.
+
+Responde auth, subscribe y ping como Bybit y permite publicar mensajes de cualquier
+tópico a los clientes conectados. Solo ws:// (sin TLS), con la librería estándar.
+
+Uso:
+    server = FakeBybitWsServer().start()
+    bybit_bot.WS_PRIVATE_URL = server.url
+    server.publish("position.linear", [{'symbol': "LINKUSDT", 'side': "Buy", 'size': "1", ...}])
+"""
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("conexión cerrada")
+        data += chunk
+    return data
+
+
+def read_frame(sock):
+    """(opcode, payload) del siguiente frame del cliente (siempre enmascarado)"""
+    first, second = _recv_exact(sock, 2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", _recv_exact(sock, 2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", _recv_exact(sock, 8))[0]
+    mask = _recv_exact(sock, 4) if second & 0x80 else b"\0\0\0\0"
+    payload = _recv_exact(sock, length)
+    return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+def encode_frame(payload, opcode=OP_TEXT):
+    """Frame sin máscara (servidor -> cliente)"""
+    header = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        header += bytes([len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([126]) + struct.pack(">H", len(payload))
+    else:
+        header += bytes([127]) + struct.pack(">Q", len(payload))
+    return header + payload
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server.owner
+        sock = self.request
+        if not self._handshake(sock):
+            return
+        client = _Client(sock)
+        server._register(client)
+        try:
+            while True:
+                opcode, payload = read_frame(sock)
+                if opcode == OP_CLOSE:
+                    client.send(b"", OP_CLOSE)
+                    return
+                if opcode == OP_PING:
+                    client.send(payload, OP_PONG)
+                elif opcode == OP_TEXT:
+                    server._on_request(client, json.loads(payload))
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            server._unregister(client)
+
+    def _handshake(self, sock):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if not key:
+            return False
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return True
+
+
+class _Client:
+    def __init__(self, sock):
+        self.sock = sock
+        self.topics = set()
+        self._lock = threading.Lock()
+
+    def send(self, payload, opcode=OP_TEXT):
+        with self._lock:
+            self.sock.sendall(encode_frame(payload, opcode))
+
+    def send_json(self, message):
+        self.send(json.dumps(message).encode())
+
+
+class FakeBybitWsServer:
+    """
+    Args:
+        host, port: dirección de escucha (port=0: uno libre)
+        accept_auth: False para rechazar la autenticación
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, accept_auth=True):
+        self.accept_auth = accept_auth
+        self.requests = []  # Mensajes recibidos de los clientes (auth, subscribe, ping)
+        self._clients = []
+        self._lock = threading.Lock()
+        self._subscribed = threading.Condition(self._lock)
+        self._server = socketserver.ThreadingTCPServer((host, port), _Handler, bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.allow_reuse_address = True
+        self._server.owner = self
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"ws://{host}:{port}/v5/private"
+
+    # ---------- ciclo de vida ----------
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ws", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Deja de aceptar conexiones y cierra las abiertas (el puerto queda libre)"""
+        self._server.shutdown()
+        self._server.server_close()
+        self.disconnect_all()
+
+    def disconnect_all(self):
+        """Corta las conexiones abiertas sin dejar de escuchar (el cliente reconecta)"""
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.sock.close()
+
+    # ---------- clientes ----------
+    def _register(self, client):
+        with self._lock:
+            self._clients.append(client)
+
+    def _unregister(self, client):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def _on_request(self, client, message):
+        op = message.get("op")
+        with self._lock:
+            self.requests.append(message)
+        if op == "auth":
+            client.send_json({
+                "op": "auth", "success": self.accept_auth,
+                "ret_msg": "" if self.accept_auth else "Invalid apikey", "conn_id": "fake",
+            })
+        elif op == "subscribe":
+            with self._subscribed:
+                client.topics.update(message.get("args", []))
+                self._subscribed.notify_all()
+            client.send_json({"op": "subscribe", "success": True, "ret_msg": "", "conn_id": "fake"})
+        elif op == "ping":
+            client.send_json({"op": "pong", "success": True, "ret_msg": "pong", "conn_id": "fake"})
+
+    def wait_subscribed(self, topic, timeout=5.0):
+        """Espera a que algún cliente conectado esté suscrito a `topic`"""
+        with self._subscribed:
+            return self._subscribed.wait_for(
+                lambda: any(topic in c.topics for c in self._clients), timeout
+            )
+
+    # ---------- publicación ----------
+    def publish(self, topic, data):
+        """Envía un mensaje del tópico (data: lista de items) a los clientes suscritos"""
+        message = {
+            "id": f"fake-{time.monotonic_ns()}", "topic": topic,
+            "creationTime": int(time.time() * 1000), "data": data,
+        }
+        with self._lock:
+            clients = [c for c in self._clients if topic in c.topics]
+        for client in clients:
+            client.send_json(message)
+        return len(clients)
@@ -0,0 +1,150 @@
+"""
+Registro de especificaciones de instrumentos de Bybit (tickSize, qtyStep, límites de cantidad).
+
+Todas las especificaciones se cargan con una sola petición al arrancar y se refrescan
+en segundo plano, así el redondeo de precios y cantidades no hace peticiones REST.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_FLOOR
+from typing import Dict, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class InstrumentSpec:
+    """Filtros de precio y cantidad de un símbolo"""
+    symbol: str
+    tick_size: Decimal
+    qty_step: Decimal
+    min_order_qty: Decimal
+    max_order_qty: Decimal
+
+
+def parse_instrument(item):
+    """Convierte un elemento de get_instruments_info en un InstrumentSpec"""
+    return InstrumentSpec(
+        symbol=item['symbol'],
+        tick_size=Decimal(item['priceFilter']['tickSize']),
+        qty_step=Decimal(item['lotSizeFilter']['qtyStep']),
+        min_order_qty=Decimal(item['lotSizeFilter']['minOrderQty']),
+        max_order_qty=Decimal(item['lotSizeFilter']['maxOrderQty']),
+    )
+
+
+# ==================== REDONDEO (SOLO DECIMAL) ====================
+def floor_to_step(value, step):
+    """Redondea hacia abajo al múltiplo de step más cercano"""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return (value / step).to_integral_value(rounding=ROUND_FLOOR) * step
+
+
+def format_to_step(value, step):
+    """Formatea un Decimal con los mismos decimales que step, sin notación científica"""
+    return format(value.quantize(step), 'f')
+
+
+def round_price(spec, price):
+    """Precio ajustado hacia abajo al tick size, listo para enviar al exchange"""
+    return format_to_step(floor_to_step(price, spec.tick_size), spec.tick_size)
+
+
+def round_qty(spec, quantity):
+    """Cantidad ajustada hacia abajo al qty step, lista para enviar al exchange"""
+    return format_to_step(floor_to_step(quantity, spec.qty_step), spec.qty_step)
+
+
+def qty_within_limits(spec, quantity):
+    """Indica si la cantidad respeta minOrderQty y maxOrderQty"""
+    quantity = Decimal(quantity)
+    return spec.min_order_qty <= quantity <= spec.max_order_qty
+
+
+# ==================== REGISTRO ====================
+class InstrumentRegistry:
+    """
+    Caché de especificaciones de instrumentos compartida por todo el bot.
+
+    load() hace una carga masiva (paginada) de la categoría completa; start_refresh()
+    la repite cada `ttl` segundos en un thread daemon. get() solo consulta memoria,
+    salvo para símbolos desconocidos, que se piden una única vez como respaldo.
+    """
+
+    def __init__(self, session, symbols: Iterable[str] = (), ttl: float = 3600, category: str = "linear"):
+        self.session = session
+        self.symbols = list(symbols)
+        self.ttl = ttl
+        self.category = category
+        self.loaded_at: Optional[float] = None
+        self._specs: Dict[str, InstrumentSpec] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self):
+        """Carga todas las especificaciones de la categoría en una petición (más paginación)"""
+        specs = {}
+        cursor = None
+        while True:
+            params = {"category": self.category, "limit": 1000}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.session.get_instruments_info(**params)
+            result = response['result']
+            for item in result['list']:
+                spec = parse_instrument(item)
+                specs[spec.symbol] = spec
+            cursor = result.get('nextPageCursor')
+            if not cursor:
+                break
+
+        with self._lock:
+            self._specs = specs
+            self.loaded_at = time.monotonic()
+
+        missing = [symbol for symbol in self.symbols if symbol not in specs]
+        if missing:
+            print(f"⚠️ Símbolos sin especificación de instrumento: {', '.join(missing)}")
+        return len(specs)
+
+    def load_from_list(self, items):
+        """Carga especificaciones ya obtenidas (por ejemplo desde otro proceso o cliente)"""
+        specs = {spec.symbol: spec for spec in map(parse_instrument, items)}
+        with self._lock:
+            self._specs = specs
+            self.loaded_at = time.monotonic()
+
+    def is_stale(self):
+        """True si nunca se cargó o si ya pasó el TTL"""
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def get(self, symbol):
+        """Devuelve la especificación del símbolo (consulta REST solo si es desconocido)"""
+        spec = self._specs.get(symbol)
+        if spec is not None:
+            return spec
+
+        response = self.session.get_instruments_info(category=self.category, symbol=symbol)
+        spec = parse_instrument(response['result']['list'][0])
+        with self._lock:
+            self._specs = {**self._specs, symbol: spec}
+        return spec
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.ttl):
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Error al refrescar instrumentos: {e}")
+
+    def start_refresh(self):
+        """Inicia el refresco periódico en segundo plano"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
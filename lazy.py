@@ -0,0 +1,41 @@
+"""
+Objetos que se crean al primer uso.
+
+Lazy(factory) se comporta como el objeto que devuelve factory(): lo construye (una sola
+vez, aunque varios threads lo usen a la vez) cuando se lee o asigna su primer atributo.
+Así importar un módulo no abre sesiones, sockets ni archivos que quizá nunca se usen.
+"""
+import threading
+
+
+class Lazy:
+    __slots__ = ("_factory", "_target", "_lock")
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    target = self._factory()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        return f"Lazy({self._target!r})" if self._target is not None else "Lazy(<sin crear>)"
+
+
+def is_created(obj):
+    """False si obj es un Lazy que todavía no se construyó"""
+    return not isinstance(obj, Lazy) or obj._target is not None
@@ -0,0 +1,273 @@
+"""
+Métricas de latencia de bajo costo y superficie de perfilado.
+
+- Histogramas de buckets fijos (escala logarítmica) para cada llamada REST y cada
+  paso de la estrategia, medidos con time.perf_counter (reloj monotónico).
+- Endpoint HTTP local compatible con Prometheus (/metrics), un resumen legible con
+  p50/p99 (/latency) y el perfilador por muestreo (/profile).
+- Perfilador por muestreo opcional: cada pocos ms toma las pilas de todos los threads
+  y acumula stacks en formato "folded" (apto para flamegraph.pl / speedscope).
+"""
+import bisect
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Límites superiores de los buckets en segundos: de 100 µs a ~100 s, 4 por octava
+BUCKETS = tuple(0.0001 * 2 ** (i / 4) for i in range(81))
+
+
+class Histogram:
+    """Histograma de buckets fijos; observe() es O(log buckets) y no reserva memoria"""
+
+    __slots__ = ("counts", "total", "count", "max", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Estimación del cuantil q interpolando dentro del bucket"""
+        with self._lock:
+            counts = list(self.counts)
+            count, maximum = self.count, self.max
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+                return min(maximum, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return maximum
+
+
+class MetricsRegistry:
+    """Histogramas indexados por (nombre, etiquetas) y gauges calculados al exportar"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self.collectors: List[Callable[[], List[Tuple[str, dict, float]]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name, seconds, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Mide la duración del bloque: with metrics.span("place_order", symbol=s): ..."""
+        histogram = self.histogram(name, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    def add_collector(self, collector):
+        """collector() -> [(nombre, etiquetas, valor)] que se exporta como gauge"""
+        self.collectors.append(collector)
+
+    # ---------- exportación ----------
+    def prometheus(self):
+        lines = []
+        by_name: Dict[str, list] = {}
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            by_name.setdefault(name, []).append((labels, histogram))
+
+        for name, series in by_name.items():
+            metric = f"bybit_bot_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in series:
+                with histogram._lock:
+                    counts = list(histogram.counts)
+                    total, count = histogram.total, histogram.count
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKETS, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric}_bucket{_labels(labels, le=f'{bound:.6g}')} {cumulative}")
+                lines.append(f"{metric}_bucket{_labels(labels, le='+Inf')} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {total:.9f}")
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+
+        for collector in self.collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                lines.append(f"# error en collector: {e}")
+                continue
+            for name, labels, value in samples:
+                lines.append(f"bybit_bot_{name}{_labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Tabla legible con conteo, p50 y p99 (en ms) de cada histograma"""
+        lines = [f"{'métrica':<40} {'n':>8} {'p50 ms':>10} {'p99 ms':>10}"]
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            label_text = ",".join(f"{k}={v}" for k, v in labels)
+            p50, p99 = histogram.quantile(0.5), histogram.quantile(0.99)
+            lines.append(
+                f"{name + ('{' + label_text + '}' if label_text else ''):<40} {histogram.count:>8} "
+                f"{(p50 or 0) * 1000:>10.2f} {(p99 or 0) * 1000:>10.2f}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+# ==================== SESIÓN INSTRUMENTADA ====================
+class InstrumentedSession:
+    """Envoltorio de una sesión REST que mide cada llamada en el histograma 'rest{method}'"""
+
+    def __init__(self, session, registry):
+        self.session = session
+        self.registry = registry
+
+    def __getattr__(self, name):
+        attr = getattr(self.session, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        histogram = self.registry.histogram("rest", method=name)
+
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return call
+
+
+# ==================== PERFILADOR POR MUESTREO ====================
+class SamplingProfiler:
+    """Toma muestras de las pilas de todos los threads cada `interval` segundos"""
+
+    def __init__(self, interval=0.005, max_depth=40):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()  # stacks se incrementa en el thread del perfilador
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+            with self._lock:
+                self.samples += 1
+
+    def folded(self):
+        """Pilas en formato folded: 'a;b;c N' por línea"""
+        with self._lock:
+            stacks = Counter(self.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# ==================== SERVIDOR HTTP ====================
+def start_metrics_server(registry, profiler=None, port=9108, host="127.0.0.1"):
+    """
+    Sirve /metrics (Prometheus), /latency (p50/p99) y /profile en un thread daemon.
+
+    /profile?enable=1 inicia el perfilador, ?enable=0 lo detiene y ?reset=1 lo vacía.
+    """
+    # http.server solo se importa si el servidor se usa (las herramientas offline no lo cargan)
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/metrics":
+                body = registry.prometheus()
+            elif url.path == "/latency":
+                body = registry.summary()
+            elif url.path == "/profile" and profiler is not None:
+                query = parse_qs(url.query)
+                if query.get("enable") == ["1"]:
+                    profiler.start()
+                elif query.get("enable") == ["0"]:
+                    profiler.stop()
+                if query.get("reset") == ["1"]:
+                    profiler.reset()
+                body = f"# running={profiler.running} samples={profiler.samples}\n{profiler.folded()}"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
+
+
+# Registro global del proceso
+metrics = MetricsRegistry()
+profiler = SamplingProfiler()
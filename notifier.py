@@ -0,0 +1,148 @@
+"""
+Cola de notificaciones de Telegram con worker propio.
+
+Los threads de trading solo encolan (sin bloquear); el worker agrupa los mensajes
+de cada intervalo en uno solo, respeta los 429 de Telegram (retry_after) y, si la
+cola se llena, descarta mensajes y lo resume en el siguiente envío.
+"""
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+TELEGRAM_MAX_LEN = 4096  # Límite de caracteres por mensaje de Telegram
+SEPARATOR = "\n\n"
+
+
+def retry_after_seconds(error):
+    """Segundos de espera si el error es un 429 de Telegram, None en otro caso"""
+    if getattr(error, 'error_code', None) != 429:
+        return None
+    result = getattr(error, 'result_json', None) or {}
+    return float(result.get('parameters', {}).get('retry_after', 1))
+
+
+def pack_messages(messages, max_len=TELEGRAM_MAX_LEN):
+    """Une mensajes en bloques de como máximo max_len caracteres, sin partir ningún mensaje"""
+    chunks = []
+    current = ""
+    for message in messages:
+        if len(message) > max_len:
+            message = message[:max_len - 3] + "..."
+        if current and len(current) + len(SEPARATOR) + len(message) > max_len:
+            chunks.append(current)
+            current = message
+        else:
+            current = f"{current}{SEPARATOR}{message}" if current else message
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TelegramNotifier:
+    """
+    Notificador asíncrono y acotado.
+
+    Args:
+        send: función(texto) que envía un mensaje (puede lanzar excepciones)
+        interval: segundos durante los que se agrupan los mensajes antes de enviar
+        max_queue: mensajes pendientes como máximo; los que no caben se descartan
+        max_chunks: mensajes de Telegram como máximo por intervalo; el resto se resume
+        max_retries: reintentos por mensaje ante errores 429
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], None],
+        interval: float = 2,
+        max_queue: int = 1000,
+        max_chunks: int = 3,
+        max_retries: int = 5,
+    ):
+        self.send = send
+        self.interval = interval
+        self.max_chunks = max_chunks
+        self.max_retries = max_retries
+        self.sent = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def notify(self, message):
+        """Encola un mensaje sin bloquear nunca. Devuelve False si se descartó"""
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout=10):
+        """Envía lo pendiente y detiene el worker (para el apagado del bot)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------- worker ----------
+    def _drain(self):
+        messages = []
+        while True:
+            try:
+                messages.append(self._queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+
+            # Agrupar todo lo que llegue durante el intervalo
+            if not self._stop.is_set():
+                self._stop.wait(self.interval)
+            self._send_batch([first] + self._drain())
+
+    def _send_batch(self, messages):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            messages.append(f"⚠️ {dropped} mensajes descartados por saturación")
+
+        chunks = pack_messages(messages)
+        if len(chunks) > self.max_chunks:
+            omitted = len(chunks) - self.max_chunks + 1
+            chunks = chunks[:self.max_chunks - 1]
+            chunks.append(f"⚠️ {omitted} bloques de mensajes omitidos por saturación")
+
+        for chunk in chunks:
+            self._send_with_backoff(chunk)
+
+    def _send_with_backoff(self, text):
+        for _ in range(self.max_retries + 1):
+            try:
+                self.send(text)
+                self.sent += 1
+                return True
+            except Exception as e:
+                wait = retry_after_seconds(e)
+                if wait is None:
+                    print(f"Error al enviar mensaje a Telegram: {e}")
+                    return False
+                print(f"⏳ Telegram limitó los envíos, reintentando en {wait:.0f}s")
+                time.sleep(wait)
+        print("Error al enviar mensaje a Telegram: demasiados reintentos")
+        return False
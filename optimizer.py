@@ -0,0 +1,295 @@
+"""
+Optimizador de parámetros (grid / búsqueda aleatoria) con índices de primer paso en caché.
+
+Para cada serie de precios se calcula una sola vez, para cada nivel x usado por los
+parámetros (distancias, stop loss y take profit), el índice del primer tick en que el
+precio se mueve +x% o -x% desde cada punto de partida. Los índices se guardan como
+.npy memory-mapped en un directorio de caché y se reutilizan entre ejecuciones.
+
+Con los índices, evaluar una combinación de parámetros cuesta unas pocas búsquedas
+por operación en lugar de recorrer la serie, así que miles de combinaciones se
+reparten entre todos los núcleos en poco tiempo.
+
+Aproximación: el stop loss y el take profit se miden desde el precio del tick de
+entrada (no desde el precio exacto de la orden limit). Con datos de 1 s la diferencia
+es mínima; confirma las mejores combinaciones con backtester.py.
+
+Uso:
+    python optimizer.py data/LINKUSDT.csv --distance-1 0.005,0.0075,0.01 \\
+        --distance-2 0.02,0.025,0.03 --stop-loss 0.005,0.01 --take-profit 0.01,0.02,0.03
+"""
+import argparse
+import hashlib
+import itertools
+import math
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from backtester import MAKER_FEE, TAKER_FEE, load_series, symbol_from_path
+from strategy import FIRST_CYCLE, StrategyParams, cycle_distance, next_cycle
+
+CACHE_DIR = os.path.join(".cache", "first_passage")
+QUERY_BLOCK = 1 << 21  # Puntos de partida procesados a la vez (acota la memoria temporal)
+
+
+# ==================== ÍNDICES DE PRIMER PASO ====================
+def series_key(path):
+    """Clave de caché: cambia si el archivo cambia"""
+    stat = os.stat(path)
+    raw = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def level_name(direction, level):
+    return f"{direction}_{level:.6f}.npy"
+
+
+def build_sparse_table(prices, op, workdir, name):
+    """
+    Tabla dispersa: tabla[k][i] = op(prices[i : i + 2**k]) (ventanas truncadas al final).
+    Los niveles k >= 1 se guardan en memmaps temporales para no agotar la RAM.
+    """
+    n = prices.shape[0]
+    tables = [prices]
+    for k in range(1, max(1, math.ceil(math.log2(n))) + 1):
+        half = 1 << (k - 1)
+        previous = tables[-1]
+        table = np.lib.format.open_memmap(
+            os.path.join(workdir, f"{name}_{k}.npy"), mode="w+", dtype=prices.dtype, shape=(n,)
+        )
+        if half < n:
+            op(previous[:n - half], previous[half:], out=table[:n - half])
+            table[n - half:] = previous[n - half:]
+        else:
+            table[:] = previous
+        tables.append(table)
+    return tables
+
+
+def first_passage(prices, tables, ratio, upward, out):
+    """
+    out[i] = primer j > i con prices[j] >= prices[i] * ratio (upward) o
+    prices[j] <= prices[i] * ratio (hacia abajo); n si nunca ocurre.
+
+    Búsqueda binaria sobre la tabla dispersa, vectorizada para todos los i.
+    """
+    n = prices.shape[0]
+    top = len(tables) - 1
+    for block_start in range(0, n, QUERY_BLOCK):
+        block_end = min(n, block_start + QUERY_BLOCK)
+        threshold = prices[block_start:block_end] * ratio
+        pos = np.arange(block_start + 1, block_end + 1, dtype=np.int64)
+        for k in range(top, -1, -1):
+            valid = pos < n
+            window = tables[k][np.minimum(pos, n - 1)]
+            no_hit = window < threshold if upward else window > threshold
+            pos = np.where(valid & no_hit, pos + (1 << k), pos)
+        out[block_start:block_end] = np.minimum(pos, n)
+
+
+def ensure_first_passage_cache(path, levels, cache_dir=CACHE_DIR):
+    """Calcula (si faltan) los índices de primer paso de cada nivel y devuelve el directorio"""
+    directory = os.path.join(cache_dir, series_key(path))
+    os.makedirs(directory, exist_ok=True)
+    missing = [
+        (direction, level)
+        for level in levels
+        for direction in ("up", "down")
+        if not os.path.exists(os.path.join(directory, level_name(direction, level)))
+    ]
+    if not missing:
+        return directory
+
+    ts, prices = load_series(path)
+    np.save(os.path.join(directory, "ts.npy"), ts)
+    index_dtype = np.int32 if prices.shape[0] < np.iinfo(np.int32).max else np.int64
+    workdir = os.path.join(directory, "tmp")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        print(f"⚙️ {symbol_from_path(path)}: precalculando {len(missing)} índices sobre {prices.shape[0]} precios")
+        max_tables = build_sparse_table(prices, np.maximum, workdir, "max")
+        min_tables = build_sparse_table(prices, np.minimum, workdir, "min")
+        for direction, level in missing:
+            final = os.path.join(directory, level_name(direction, level))
+            tmp = final + ".part"
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=index_dtype, shape=prices.shape)
+            if direction == "up":
+                first_passage(prices, max_tables, 1 + level, True, out)
+            else:
+                first_passage(prices, min_tables, 1 - level, False, out)
+            out.flush()
+            del out
+            os.replace(tmp, final)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return directory
+
+
+# ==================== EVALUACIÓN ====================
+_open_caches = {}
+
+
+def _open_cache(directory):
+    """Abre (una vez por proceso) los índices en modo solo lectura, sin copiarlos a memoria"""
+    cache = _open_caches.get(directory)
+    if cache is None:
+        cache = _open_caches[directory] = {"ts": np.load(os.path.join(directory, "ts.npy"), mmap_mode="r")}
+    return cache
+
+
+def _index(cache, directory, direction, level):
+    key = (direction, round(level, 6))
+    array = cache.get(key)
+    if array is None:
+        array = cache[key] = np.load(os.path.join(directory, level_name(direction, level)), mmap_mode="r")
+    return array
+
+
+@dataclass
+class SweepResult:
+    symbol: str
+    params: StrategyParams
+    trades: int
+    wins: int
+    pnl: float
+    max_drawdown: float
+
+    @property
+    def hit_rate(self):
+        return self.wins / self.trades if self.trades else 0.0
+
+
+def evaluate(directory, params, symbol="", maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+    """Evalúa una combinación de parámetros usando solo búsquedas en los índices"""
+    cache = _open_cache(directory)
+    ts = cache["ts"]
+    n = ts.shape[0]
+    rearm_ms = int(params.rearm_delay * 1000)
+    sl_down = _index(cache, directory, "down", params.stop_loss)
+    sl_up = _index(cache, directory, "up", params.stop_loss)
+    tp_up = _index(cache, directory, "up", params.take_profit)
+    tp_down = _index(cache, directory, "down", params.take_profit)
+
+    cycle = FIRST_CYCLE
+    start = 0
+    trades = wins = 0
+    equity = peak = max_drawdown = 0.0
+    while start < n - 1:
+        distance = cycle_distance(params, cycle)
+        long_fill = int(_index(cache, directory, "down", distance)[start])
+        short_fill = int(_index(cache, directory, "up", distance)[start])
+        entry = min(long_fill, short_fill)
+        if entry >= n:
+            break
+        if long_fill <= short_fill:
+            stop_exit, target_exit = int(sl_down[entry]), int(tp_up[entry])
+            notional = params.amount_usdt * (1 - distance)
+        else:
+            stop_exit, target_exit = int(sl_up[entry]), int(tp_down[entry])
+            notional = params.amount_usdt * (1 + distance)
+        exit_index = min(stop_exit, target_exit)
+        if exit_index >= n:
+            break
+
+        if target_exit < stop_exit:
+            net = notional * (params.take_profit - 2 * maker_fee)
+        else:
+            net = -notional * (params.stop_loss + maker_fee + taker_fee)
+        trades += 1
+        wins += net > 0
+        equity += net
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, peak - equity)
+
+        cycle = next_cycle(cycle)
+        start = int(np.searchsorted(ts, ts[exit_index] + rearm_ms, side="left"))
+
+    return SweepResult(symbol, params, trades, wins, equity, max_drawdown)
+
+
+def _evaluate_chunk(job):
+    directory, symbol, param_chunk, maker_fee, taker_fee = job
+    return [evaluate(directory, params, symbol, maker_fee, taker_fee) for params in param_chunk]
+
+
+def required_levels(param_sets):
+    levels = set()
+    for p in param_sets:
+        levels.update(round(v, 6) for v in (p.distance_1, p.distance_2, p.stop_loss, p.take_profit))
+    return sorted(levels)
+
+
+def optimize(paths, param_sets, workers=None, cache_dir=CACHE_DIR, maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+    """Precalcula los índices de cada serie y evalúa todas las combinaciones en paralelo"""
+    levels = required_levels(param_sets)
+    directories = [(ensure_first_passage_cache(path, levels, cache_dir), symbol_from_path(path)) for path in paths]
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, len(param_sets) // (workers * 4))
+    jobs = [
+        (directory, symbol, param_sets[i:i + chunk_size], maker_fee, taker_fee)
+        for directory, symbol in directories
+        for i in range(0, len(param_sets), chunk_size)
+    ]
+    if workers == 1:
+        chunks = map(_evaluate_chunk, jobs)
+        return [r for chunk in chunks for r in chunk]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [r for chunk in pool.map(_evaluate_chunk, jobs) for r in chunk]
+
+
+def build_param_sets(amount, distances_1, distances_2, stop_losses, take_profits, rearm_delay=5, samples=None, seed=None):
+    """Grid completo, o una muestra aleatoria de `samples` combinaciones del grid"""
+    combos = list(itertools.product(distances_1, distances_2, stop_losses, take_profits))
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return [StrategyParams(amount, d1, d2, sl, tp, rearm_delay) for d1, d2, sl, tp in combos]
+
+
+def _floats(text):
+    """'0.005,0.01' o un rango 'inicio:fin:paso' -> lista de floats"""
+    if ":" in text:
+        start, stop, step = (float(v) for v in text.split(":"))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 6) for i in range(count)]
+    return [float(v) for v in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimizador de parámetros de la estrategia de brackets")
+    parser.add_argument("paths", nargs="+", help="Archivos CSV/Parquet de trades o klines (uno por símbolo)")
+    parser.add_argument("--amount", type=float, default=20)
+    parser.add_argument("--distance-1", type=_floats, default=_floats("0.005:0.015:0.0025"))
+    parser.add_argument("--distance-2", type=_floats, default=_floats("0.015:0.035:0.005"))
+    parser.add_argument("--stop-loss", type=_floats, default=_floats("0.005:0.02:0.005"))
+    parser.add_argument("--take-profit", type=_floats, default=_floats("0.01:0.04:0.005"))
+    parser.add_argument("--rearm-delay", type=float, default=5)
+    parser.add_argument("--samples", type=int, default=None, help="Búsqueda aleatoria: combinaciones a probar")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    param_sets = build_param_sets(
+        args.amount, args.distance_1, args.distance_2, args.stop_loss, args.take_profit,
+        args.rearm_delay, args.samples, args.seed,
+    )
+    print(f"🔎 {len(args.paths)} series x {len(param_sets)} combinaciones")
+    results = optimize(args.paths, param_sets, args.workers, args.cache_dir)
+    for r in sorted(results, key=lambda r: r.pnl, reverse=True)[:args.top]:
+        p = r.params
+        print(
+            f"{r.symbol:<12} d1={p.distance_1:<7g} d2={p.distance_2:<7g} sl={p.stop_loss:<7g} "
+            f"tp={p.take_profit:<7g} | trades={r.trades:<5} acierto={r.hit_rate:6.1%} "
+            f"pnl={r.pnl:+10.2f} dd={r.max_drawdown:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Caché local de precios alimentada por el stream público 'tickers' de Bybit.
+
+Guarda last, bid, ask y mark de cada símbolo en una foto inmutable con marca de
+tiempo. Si el stream se retrasa (foto más vieja que max_age) se consulta por REST,
+así el bot siempre calcula precios y cantidades sobre una misma foto coherente.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from ws_client import BybitWebSocket
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    symbol: str
+    last: Decimal
+    bid: Optional[Decimal]
+    ask: Optional[Decimal]
+    mark: Optional[Decimal]
+    received_at: float  # time.monotonic() de la recepción
+    source: str  # "ws" o "rest"
+
+    def age(self):
+        return time.monotonic() - self.received_at
+
+
+def _decimal(value):
+    return Decimal(value) if value not in (None, "") else None
+
+
+def snapshot_from_ticker(symbol, ticker, source, received_at=None):
+    """Crea una foto a partir de un ticker de Bybit (REST o WebSocket)"""
+    return PriceSnapshot(
+        symbol=symbol,
+        last=Decimal(ticker['lastPrice']),
+        bid=_decimal(ticker.get('bid1Price')),
+        ask=_decimal(ticker.get('ask1Price')),
+        mark=_decimal(ticker.get('markPrice')),
+        received_at=time.monotonic() if received_at is None else received_at,
+        source=source,
+    )
+
+
+class PriceCache:
+    """
+    Precios por símbolo desde el stream 'tickers.{symbol}'.
+
+    Args:
+        session: sesión HTTP de pybit para el respaldo por REST
+        symbols: símbolos a suscribir
+        url: URL del stream público linear
+        max_age: segundos tras los que una foto se considera vieja
+    """
+
+    def __init__(self, session, symbols, url, max_age=2.0, category="linear"):
+        self.session = session
+        self.symbols = list(symbols)
+        self.max_age = max_age
+        self.category = category
+        self.rest_fallbacks = 0
+        self._snapshots: Dict[str, PriceSnapshot] = {}
+        self._raw: Dict[str, dict] = {}
+        self._listeners: List[Callable[[PriceSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self.stream = BybitWebSocket(url, [f"tickers.{s}" for s in self.symbols], self._on_message)
+
+    def start(self):
+        self.stream.start()
+
+    def stop(self):
+        self.stream.stop()
+
+    def add_listener(self, listener):
+        """Registra una función(PriceSnapshot) que se llama con cada tick del stream"""
+        self._listeners.append(listener)
+
+    def reset(self):
+        """Olvida todas las fotos (el próximo get() consulta por REST)"""
+        with self._lock:
+            self._snapshots.clear()
+            self._raw.clear()
+
+    def seed(self, snapshot):
+        """Foto inicial (p. ej. del almacén local); no pisa una más nueva"""
+        self._store(snapshot)
+
+    # ---------- stream ----------
+    def _on_message(self, message):
+        data = message.get('data')
+        if not isinstance(data, dict) or 'symbol' not in data:
+            return
+        symbol = data['symbol']
+        with self._lock:
+            if message.get('type') == 'snapshot' or symbol not in self._raw:
+                raw = dict(data)
+            else:
+                # Los delta solo traen los campos que cambiaron
+                raw = {**self._raw[symbol], **data}
+            self._raw[symbol] = raw
+            if not raw.get('lastPrice'):
+                return
+            snapshot = snapshot_from_ticker(symbol, raw, "ws")
+            self._snapshots[symbol] = snapshot
+
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Error en listener de precios ({symbol}): {e}")
+
+    # ---------- lectores ----------
+    def peek(self, symbol):
+        """Última foto conocida, sin importar su antigüedad (o None)"""
+        return self._snapshots.get(symbol)
+
+    def is_fresh(self, symbol, max_age=None):
+        snapshot = self._snapshots.get(symbol)
+        return snapshot is not None and snapshot.age() <= (self.max_age if max_age is None else max_age)
+
+    def get(self, symbol, max_age=None):
+        """Foto de precios del símbolo; consulta por REST si la del stream está vieja"""
+        snapshot = self._snapshots.get(symbol)
+        if snapshot is not None and snapshot.age() <= (self.max_age if max_age is None else max_age):
+            return snapshot
+
+        self.rest_fallbacks += 1
+        response = self.session.get_tickers(category=self.category, symbol=symbol)
+        snapshot = snapshot_from_ticker(symbol, response['result']['list'][0], "rest")
+        self._store(snapshot)
+        return snapshot
+
+    def refresh_all(self):
+        """Refresca todos los símbolos con una sola petición de tickers de la categoría"""
+        response = self.session.get_tickers(category=self.category)
+        received_at = time.monotonic()
+        wanted = set(self.symbols)
+        for ticker in response['result']['list']:
+            if ticker['symbol'] in wanted:
+                self._store(snapshot_from_ticker(ticker['symbol'], ticker, "rest", received_at))
+
+    def _store(self, snapshot):
+        with self._lock:
+            current = self._snapshots.get(snapshot.symbol)
+            # No pisar un tick más nuevo del stream con una respuesta REST más vieja
+            if current is None or current.received_at <= snapshot.received_at:
+                self._snapshots[snapshot.symbol] = snapshot
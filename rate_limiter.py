@@ -0,0 +1,262 @@
+"""
+Limitador de peticiones del lado del cliente para la sesión HTTP de pybit.
+
+Cada endpoint tiene su token bucket (límites por UID de Bybit v5) y además hay un
+bucket global (límite por IP). Los buckets se corrigen con las cabeceras
+X-Bapi-Limit-Status / X-Bapi-Limit / X-Bapi-Limit-Reset-Timestamp de cada respuesta.
+
+Prioridades: colocar, modificar y cancelar órdenes siempre pasan primero. Las
+lecturas (posiciones, órdenes abiertas, PnL) ceden el paso a las escrituras que
+estén esperando, dejan una reserva del bucket global libre y, cuando hay límite,
+se agrupan: peticiones idénticas simultáneas comparten una sola llamada, y si hay
+un resultado reciente se reutiliza en vez de esperar.
+"""
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+RATE_LIMIT_CODE = 10006  # retCode de Bybit: "Too many visits"
+
+WRITE_METHODS = frozenset({
+    "place_order", "amend_order", "cancel_order", "cancel_all_orders",
+    "place_batch_order", "amend_batch_order", "cancel_batch_order",
+    "set_trading_stop",
+})
+
+# Peticiones por segundo por endpoint (valores por defecto de Bybit v5 por UID)
+DEFAULT_LIMITS = {
+    "place_order": 10,
+    "amend_order": 10,
+    "cancel_order": 10,
+    "cancel_all_orders": 10,
+    "place_batch_order": 10,
+    "amend_batch_order": 10,
+    "cancel_batch_order": 10,
+    "set_trading_stop": 10,
+    "get_positions": 50,
+    "get_open_orders": 50,
+    "get_closed_pnl": 50,
+    "get_executions": 50,
+    "get_wallet_balance": 50,
+}
+DEFAULT_ENDPOINT_RATE = 20  # Endpoints públicos o sin límite documentado
+GLOBAL_RATE = 120  # Límite por IP: 600 peticiones cada 5 segundos
+
+
+class TokenBucket:
+    """Token bucket clásico; no es thread-safe por sí mismo (lo protege el scheduler)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now, reserve=0.0):
+        """Segundos hasta que haya un token disponible por encima de la reserva"""
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        missing = 1 + reserve - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def update_from_headers(self, limit, remaining, reset_ms, now):
+        if limit:
+            self.rate = self.capacity = float(limit)
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_ms:
+            self.blocked_until = now + max(0.0, reset_ms / 1000 - time.time())
+
+
+class RequestScheduler:
+    """Reparte los tokens entre escrituras (prioritarias) y lecturas"""
+
+    def __init__(self, limits=None, global_rate=GLOBAL_RATE, read_reserve=0.2):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.global_bucket = TokenBucket(global_rate)
+        self.read_reserve = read_reserve * global_rate
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.waiting_writes = 0
+        self.deferred_reads = 0
+        self._condition = threading.Condition()
+
+    def bucket(self, method):
+        bucket = self.buckets.get(method)
+        if bucket is None:
+            bucket = self.buckets[method] = TokenBucket(self.limits.get(method, DEFAULT_ENDPOINT_RATE))
+        return bucket
+
+    def _wait_time(self, method, is_write, now):
+        if not is_write and self.waiting_writes:
+            return math.inf  # Hasta que la escritura en espera tome su token (notify_all)
+        reserve = 0.0 if is_write else self.read_reserve
+        return max(self.bucket(method).wait_time(now), self.global_bucket.wait_time(now, reserve))
+
+    def acquire(self, method, timeout=None):
+        """Bloquea hasta obtener un token. Con timeout devuelve False si no llegó a tiempo"""
+        is_write = method in WRITE_METHODS
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if is_write:
+                self.waiting_writes += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(method, is_write, now)
+                    if wait <= 0:
+                        self.bucket(method).consume()
+                        self.global_bucket.consume()
+                        return True
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = min(wait, deadline - now)
+                    self._condition.wait(None if wait == math.inf else wait)
+            finally:
+                if is_write:
+                    self.waiting_writes -= 1
+                    self._condition.notify_all()
+
+    def would_wait(self, method):
+        with self._condition:
+            return self._wait_time(method, method in WRITE_METHODS, time.monotonic()) > 0
+
+    def feedback(self, method, headers):
+        """Ajusta el bucket del endpoint con las cabeceras de límite de Bybit"""
+        if not headers:
+            return
+        remaining = headers.get("X-Bapi-Limit-Status")
+        if remaining is None:
+            return
+        with self._condition:
+            self.bucket(method).update_from_headers(
+                int(headers.get("X-Bapi-Limit") or 0),
+                int(remaining),
+                int(headers.get("X-Bapi-Limit-Reset-Timestamp") or 0),
+                time.monotonic(),
+            )
+
+    def block(self, method, seconds):
+        """Bloquea un endpoint tras recibir un error de límite"""
+        with self._condition:
+            bucket = self.bucket(method)
+            bucket.tokens = 0
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + seconds)
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class RateLimitedSession:
+    """
+    Envoltorio de la sesión HTTP de pybit con el mismo interfaz (session.get_positions(...), etc.).
+
+    Si la sesión se crea con return_response_headers=True, se leen las cabeceras de
+    límite y se devuelve solo el JSON, igual que sin el envoltorio.
+
+    Args:
+        session: sesión HTTP de pybit
+        scheduler: RequestScheduler compartido (se crea uno por defecto)
+        stale_read_ok: antigüedad máxima (s) de un resultado de lectura que se reutiliza
+            en lugar de esperar cuando el endpoint está limitado
+        max_read_wait: espera máxima (s) de una lectura antes de salir igualmente
+    """
+
+    def __init__(self, session, scheduler=None, stale_read_ok=2.0, max_read_wait=10.0):
+        self.session = session
+        self.scheduler = scheduler or RequestScheduler()
+        self.stale_read_ok = stale_read_ok
+        self.max_read_wait = max_read_wait
+        self._inflight: Dict[tuple, _InFlight] = {}
+        self._recent: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.session, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        def call(**kwargs):
+            if name in WRITE_METHODS:
+                return self._call_write(name, attr, kwargs)
+            return self._call_read(name, attr, kwargs)
+
+        call.__name__ = name
+        return call
+
+    # ---------- ejecución ----------
+    def _execute(self, name, fn, kwargs):
+        response = fn(**kwargs)
+        headers = None
+        if isinstance(response, tuple):
+            response, headers = response[0], response[-1]
+        self.scheduler.feedback(name, headers)
+        return response
+
+    def _call_with_retry(self, name, fn, kwargs, attempts):
+        for attempt in range(attempts):
+            try:
+                response = self._execute(name, fn, kwargs)
+            except Exception as e:
+                if getattr(e, "status_code", None) != RATE_LIMIT_CODE or attempt == attempts - 1:
+                    raise
+                response = {"retCode": RATE_LIMIT_CODE}
+            if response.get("retCode") != RATE_LIMIT_CODE or attempt == attempts - 1:
+                return response
+            self.scheduler.block(name, 1.0)
+            self.scheduler.acquire(name)
+        return response
+
+    def _call_write(self, name, fn, kwargs):
+        self.scheduler.acquire(name)
+        return self._call_with_retry(name, fn, kwargs, attempts=2)
+
+    def _call_read(self, name, fn, kwargs):
+        key = (name, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+
+        # Lecturas idénticas simultáneas comparten una sola petición
+        with self._lock:
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = _InFlight()
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._limited_read(name, fn, kwargs, key)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _limited_read(self, name, fn, kwargs, key):
+        if self.scheduler.would_wait(name):
+            recent = self._recent.get(key)
+            if recent and time.monotonic() - recent[0] <= self.stale_read_ok:
+                return recent[1]
+        self.scheduler.acquire(name, timeout=self.max_read_wait)
+        response = self._call_with_retry(name, fn, kwargs, attempts=3)
+        if response.get("retCode") == 0:
+            self._recent[key] = (time.monotonic(), response)
+        return response
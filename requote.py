@@ -0,0 +1,154 @@
+"""
+Re-cotización de brackets armados cuando el precio se aleja de ellos.
+
+Cada tick del stream compara el precio con el ancla del bracket (el precio con el que
+se armó o se re-cotizó por última vez) y mide la deriva en unidades de la distancia
+del bracket: deriva = |precio / ancla - 1| / distancia.
+
+Histéresis: un símbolo queda "pendiente" cuando la deriva supera `trigger` y deja de
+estarlo si baja de `release`; solo se re-cotiza si sigue pendiente durante `dwell`
+segundos. Así un precio que oscila alrededor del umbral no genera modificaciones.
+
+Presupuesto: cada símbolo tiene un token bucket de `budget` modificaciones por
+`budget_window` segundos (ráfaga de `burst`), de modo que con cientos de símbolos
+las modificaciones no consumen los límites de /v5/order/amend que necesitan las
+órdenes nuevas y las cancelaciones.
+
+Las re-cotizaciones pendientes se agrupan y se entregan a `amend` desde un thread
+propio cada `batch_interval` segundos: el thread del stream nunca espera al REST.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from rate_limiter import TokenBucket
+
+
+class Requoter:
+    """
+    Args:
+        bracket_for: función(symbol) -> (ancla, distancia) como floats, o None si el
+            símbolo no tiene un bracket re-cotizable
+        amend: función({symbol: precio}) que modifica las piernas de esos símbolos
+        trigger, release: deriva (en distancias) que activa / desactiva la re-cotización
+        dwell: segundos que la deriva debe mantenerse antes de re-cotizar
+        budget, budget_window, burst: modificaciones permitidas por símbolo
+        batch_interval: segundos entre envíos agrupados
+    """
+
+    def __init__(self, bracket_for: Callable[[str], Optional[Tuple[float, float]]], amend,
+                 trigger=0.5, release=0.25, dwell=2.0, budget=6, budget_window=60.0, burst=2,
+                 batch_interval=0.2):
+        self.bracket_for = bracket_for
+        self.amend = amend
+        self.trigger = trigger
+        self.release = release
+        self.dwell = dwell
+        self.budget_rate = budget / budget_window
+        self.burst = burst
+        self.batch_interval = batch_interval
+        self.requotes = 0
+        self.budget_denied = 0
+        self._pending_since: Dict[str, float] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queue: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- ciclo de vida ----------
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="requote", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread = None
+
+    def reset(self):
+        """Vacía pendientes, presupuestos, cola y contadores (p. ej. entre corridas del benchmark)"""
+        with self._lock:
+            self._queue.clear()
+        self._pending_since.clear()
+        self._buckets.clear()
+        self.requotes = self.budget_denied = 0
+
+    # ---------- detección (thread del stream) ----------
+    def on_price(self, snapshot):
+        """Listener de PriceCache"""
+        self.update(snapshot.symbol, snapshot.last, time.monotonic())
+
+    def update(self, symbol, price, now):
+        """Evalúa la deriva del símbolo con un precio nuevo y encola la re-cotización si corresponde"""
+        bracket = self.bracket_for(symbol)
+        if bracket is None:
+            self._pending_since.pop(symbol, None)
+            return
+        anchor, distance = bracket
+        if not anchor or not distance:
+            return
+        drift = abs(float(price) / anchor - 1) / distance
+
+        if drift < self.release:
+            self._pending_since.pop(symbol, None)
+            return
+        since = self._pending_since.get(symbol)
+        if since is None:
+            if drift < self.trigger:
+                return
+            self._pending_since[symbol] = since = now
+        if now - since < self.dwell:
+            return
+
+        if not self._take_budget(symbol, now):
+            self.budget_denied += 1
+            return
+        self._pending_since.pop(symbol, None)
+        with self._lock:
+            self._queue[symbol] = price
+        self._wake.set()
+
+    def _take_budget(self, symbol, now):
+        bucket = self._buckets.get(symbol)
+        if bucket is None:
+            bucket = self._buckets[symbol] = TokenBucket(self.budget_rate, self.burst)
+            bucket.updated = now
+        if bucket.wait_time(now) > 0:
+            return False
+        bucket.consume()
+        return True
+
+    # ---------- envío (thread propio) ----------
+    def flush(self):
+        """Entrega a `amend` las re-cotizaciones encoladas (las devuelve)"""
+        with self._lock:
+            targets, self._queue = self._queue, {}
+        if targets:
+            try:
+                self.amend(targets)
+                self.requotes += len(targets)
+            except Exception as e:
+                print(f"Error al re-cotizar {', '.join(targets)}: {e}")
+        return targets
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            # Esperar un poco para agrupar los símbolos que derivan a la vez
+            time.sleep(self.batch_interval)
+            self.flush()
+
+    def metric_samples(self):
+        """Contadores para metrics.MetricsRegistry.add_collector"""
+        return [
+            ("requotes", {}, self.requotes),
+            ("requote_budget_denied", {}, self.budget_denied),
+            ("requote_pending", {}, len(self._pending_since)),
+        ]
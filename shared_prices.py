@@ -0,0 +1,213 @@
+"""
+Tabla de precios en memoria compartida entre procesos (multiprocessing.shared_memory).
+
+El proceso de datos de mercado escribe el último ticker de cada símbolo en una ranura
+fija y los procesos de trading lo leen sin pasar por ningún canal ni copiar mensajes.
+Cada ranura usa un seqlock: el escritor incrementa la secuencia (impar = escribiendo),
+escribe los precios y vuelve a incrementarla; el lector reintenta si la secuencia era
+impar o cambió durante la lectura. Así nunca se bloquea al escritor.
+
+Ranura: secuencia (uint64) + last, bid, ask, mark (float64, NaN = sin dato) + recepción
+(time.monotonic(), común a todos los procesos de la máquina).
+"""
+import math
+import struct
+import threading
+import time
+from decimal import Decimal
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List
+
+from price_feed import PriceSnapshot, snapshot_from_ticker
+
+SEQ = struct.Struct("<Q")
+FIELDS = struct.Struct("<5d")
+SLOT_SIZE = SEQ.size + FIELDS.size
+
+
+def _float(value):
+    return float(value) if value is not None else math.nan
+
+
+def _decimal(value):
+    # repr() da el texto más corto que reproduce el float: "15.234" vuelve a ser 15.234
+    return None if math.isnan(value) else Decimal(repr(value))
+
+
+class SharedPriceBoard:
+    """
+    Ranuras de precios por símbolo sobre un bloque de memoria compartida.
+
+    create() la crea (proceso de datos de mercado); attach() se conecta a una
+    existente por nombre (procesos de trading). El orden de `symbols` debe coincidir.
+    """
+
+    def __init__(self, shm, symbols, owner):
+        self.shm = shm
+        self.symbols = list(symbols)
+        self.index: Dict[str, int] = {s: i * SLOT_SIZE for i, s in enumerate(self.symbols)}
+        self.owner = owner
+
+    @classmethod
+    def create(cls, symbols):
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(symbols)) * SLOT_SIZE)
+        shm.buf[:] = bytes(shm.size)
+        return cls(shm, symbols, owner=True)
+
+    @classmethod
+    def attach(cls, name, symbols):
+        # Los procesos lanzados por el supervisor comparten su resource_tracker, que
+        # solo libera el bloque cuando el creador llama a close()
+        return cls(shared_memory.SharedMemory(name=name), symbols, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # ---------- escritor (un solo proceso) ----------
+    def write(self, snapshot):
+        offset = self.index.get(snapshot.symbol)
+        if offset is None:
+            return
+        buf = self.shm.buf
+        seq = SEQ.unpack_from(buf, offset)[0]
+        SEQ.pack_into(buf, offset, seq + 1)
+        FIELDS.pack_into(
+            buf, offset + SEQ.size,
+            float(snapshot.last), _float(snapshot.bid), _float(snapshot.ask), _float(snapshot.mark),
+            snapshot.received_at,
+        )
+        SEQ.pack_into(buf, offset, seq + 2)
+
+    # ---------- lectores ----------
+    def sequence(self, symbol):
+        """Secuencia de la ranura: cambia con cada escritura (0 = sin precio)"""
+        offset = self.index.get(symbol)
+        return SEQ.unpack_from(self.shm.buf, offset)[0] if offset is not None else 0
+
+    def read(self, symbol, retries=100):
+        """Última foto del símbolo (o None si todavía no hay precio)"""
+        offset = self.index.get(symbol)
+        if offset is None:
+            return None
+        buf = self.shm.buf
+        for _ in range(retries):
+            before = SEQ.unpack_from(buf, offset)[0]
+            if before & 1:
+                continue
+            last, bid, ask, mark, received_at = FIELDS.unpack_from(buf, offset + SEQ.size)
+            if SEQ.unpack_from(buf, offset)[0] == before:
+                if not before:
+                    return None
+                return PriceSnapshot(
+                    symbol=symbol,
+                    last=_decimal(last),
+                    bid=_decimal(bid),
+                    ask=_decimal(ask),
+                    mark=_decimal(mark),
+                    received_at=received_at,
+                    source="shm",
+                )
+        return None
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedPriceCache:
+    """
+    Lector con la misma interfaz que price_feed.PriceCache que usa el bot
+    (get, peek, is_fresh, refresh_all, add_listener); si la foto compartida está vieja
+    consulta por REST.
+
+    Los listeners se alimentan sondeando las secuencias de las ranuras cada
+    `poll_interval` segundos: reciben la última foto de cada símbolo que cambió (los
+    ticks intermedios entre dos sondeos se pierden).
+    """
+
+    def __init__(self, board, session, symbols=None, max_age=2.0, category="linear", poll_interval=0.1):
+        self.board = board
+        self.session = session
+        self.symbols = list(board.symbols if symbols is None else symbols)
+        self.max_age = max_age
+        self.category = category
+        self.poll_interval = poll_interval
+        self.rest_fallbacks = 0
+        self._rest: Dict[str, PriceSnapshot] = {}
+        self._listeners: List[Callable[[PriceSnapshot], None]] = []
+        self._stop = threading.Event()
+        self._poller = None
+
+    def start(self):
+        """El stream lo mantiene el proceso de datos de mercado; aquí solo se sondea para los listeners"""
+        if self._listeners and self._poller is None:
+            self._stop.clear()
+            self._poller = threading.Thread(target=self._poll, name="shm-prices", daemon=True)
+            self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+        self._poller = None
+
+    def add_listener(self, listener):
+        """Registra una función(PriceSnapshot) que se llama con cada precio nuevo (desde start())"""
+        self._listeners.append(listener)
+
+    def reset(self):
+        """Olvida las fotos obtenidas por REST (las compartidas no son de este proceso)"""
+        self._rest.clear()
+
+    def seed(self, snapshot):
+        """Foto inicial (p. ej. del almacén local); la compartida la reemplaza si es más nueva"""
+        current = self._rest.get(snapshot.symbol)
+        if current is None or current.received_at <= snapshot.received_at:
+            self._rest[snapshot.symbol] = snapshot
+
+    def _poll(self):
+        seen = {symbol: 0 for symbol in self.symbols}
+        while not self._stop.wait(self.poll_interval):
+            for symbol, last_seq in seen.items():
+                seq = self.board.sequence(symbol)
+                if seq == last_seq or seq & 1:
+                    continue
+                snapshot = self.board.read(symbol)
+                if snapshot is None:
+                    continue
+                seen[symbol] = seq
+                for listener in self._listeners:
+                    try:
+                        listener(snapshot)
+                    except Exception as e:
+                        print(f"Error en listener de precios ({symbol}): {e}")
+
+    def peek(self, symbol):
+        shared = self.board.read(symbol)
+        rest = self._rest.get(symbol)
+        if shared is None or (rest is not None and rest.received_at > shared.received_at):
+            return rest
+        return shared
+
+    def is_fresh(self, symbol, max_age=None):
+        snapshot = self.peek(symbol)
+        return snapshot is not None and snapshot.age() <= (self.max_age if max_age is None else max_age)
+
+    def get(self, symbol, max_age=None):
+        snapshot = self.peek(symbol)
+        if snapshot is not None and snapshot.age() <= (self.max_age if max_age is None else max_age):
+            return snapshot
+
+        self.rest_fallbacks += 1
+        response = self.session.get_tickers(category=self.category, symbol=symbol)
+        snapshot = snapshot_from_ticker(symbol, response['result']['list'][0], "rest")
+        self._rest[symbol] = snapshot
+        return snapshot
+
+    def refresh_all(self):
+        response = self.session.get_tickers(category=self.category)
+        received_at = time.monotonic()
+        wanted = set(self.symbols)
+        for ticker in response['result']['list']:
+            if ticker['symbol'] in wanted:
+                self._rest[ticker['symbol']] = snapshot_from_ticker(ticker['symbol'], ticker, "rest", received_at)
@@ -0,0 +1,143 @@
+"""
+Almacén de estado persistente y a prueba de caídas (SQLite en modo WAL).
+
+Cada transición de estado de un símbolo (bracket armado, posición abierta, posición
+cerrada) se añade a un journal y, en la misma transacción, actualiza la tabla `state`
+con el último estado por símbolo. Al reiniciar se lee `state` (una fila por símbolo),
+así el arranque tarda lo mismo con 1 o con cientos de símbolos; si esa tabla se
+perdiera, rebuild_from_journal() la reconstruye reproduciendo el journal.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    event TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS state (
+    symbol TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+# Campos de active_orders que solo tienen sentido dentro del proceso actual
+VOLATILE_FIELDS = ('state_since',)
+
+
+def serialize_state(active, cycle):
+    """Estado persistible de un símbolo: órdenes activas (o None) y ciclo actual"""
+    if active is not None:
+        active = {k: v for k, v in active.items() if k not in VOLATILE_FIELDS}
+    return json.dumps({'active': active, 'cycle': cycle})
+
+
+class StateStore:
+    """
+    Journal de transiciones + último estado por símbolo.
+
+    Args:
+        path: archivo SQLite (se crea si no existe)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, symbol, event, active, cycle):
+        """Añade la transición al journal y actualiza el estado del símbolo (atómico)"""
+        payload = serialize_state(active, cycle)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO journal (ts, symbol, event, payload) VALUES (?, ?, ?, ?)",
+                    (time.time(), symbol, event, payload),
+                )
+                self._conn.execute(
+                    "INSERT INTO state (symbol, seq, payload) VALUES (?, ?, ?) "
+                    "ON CONFLICT(symbol) DO UPDATE SET seq = excluded.seq, payload = excluded.payload",
+                    (symbol, cursor.lastrowid, payload),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def load(self):
+        """
+        Último estado conocido de cada símbolo.
+
+        Returns:
+            (active_orders, cycle_control) con el mismo formato que los dicts del bot
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT symbol, payload FROM state").fetchall()
+        active_orders = {}
+        cycle_control = {}
+        for symbol, payload in rows:
+            data = json.loads(payload)
+            if data.get('active'):
+                active_orders[symbol] = data['active']
+            if data.get('cycle'):
+                cycle_control[symbol] = data['cycle']
+        return active_orders, cycle_control
+
+    def rebuild_from_journal(self):
+        """Reconstruye la tabla state reproduciendo el journal completo"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM state")
+                self._conn.execute(
+                    "INSERT INTO state (symbol, seq, payload) "
+                    "SELECT j.symbol, j.seq, j.payload FROM journal j "
+                    "JOIN (SELECT symbol, MAX(seq) AS seq FROM journal GROUP BY symbol) last "
+                    "ON j.seq = last.seq"
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def compact(self, keep=1000):
+        """
+        Borra del journal las transiciones más antiguas, conservando las últimas `keep`
+        y la última de cada símbolo (la que usa rebuild_from_journal)
+
+        Returns:
+            Filas borradas
+        """
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM journal WHERE seq <= (SELECT MAX(seq) FROM journal) - ?"
+                " AND seq NOT IN (SELECT seq FROM state)",
+                (keep,),
+            ).rowcount
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    def events(self, symbol=None, limit=100):
+        """Últimas transiciones (más recientes primero), útil para diagnóstico"""
+        query = "SELECT seq, ts, symbol, event, payload FROM journal"
+        params = ()
+        if symbol:
+            query += " WHERE symbol = ?"
+            params = (symbol,)
+        query += " ORDER BY seq DESC LIMIT ?"
+        with self._lock:
+            return self._conn.execute(query, params + (limit,)).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
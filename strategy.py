@@ -0,0 +1,126 @@
+"""
+Núcleo puro de la estrategia de brackets con ciclos de distancia.
+
+Sin red ni estado global: lo usan el bot en vivo (con Decimal), el runtime asyncio
+y el backtester (con float). Las funciones aceptan cualquiera de los dos tipos
+mientras todos los argumentos sean del mismo tipo.
+
+Reglas:
+  - Se arman dos órdenes limit: LONG a precio * (1 - distancia) y SHORT a
+    precio * (1 + distancia), cada una con stop loss a `stop_loss` de su entrada.
+  - Al ejecutarse una, se cancela la otra y se coloca un take profit reduce only
+    a `take_profit` del precio de entrada.
+  - Al cerrarse la posición se alterna el ciclo (distance_1 ↔ distance_2) y se rearma.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from instruments import qty_within_limits, round_price, round_qty
+
+CYCLES = ('distance_1', 'distance_2')
+FIRST_CYCLE = 'distance_1'
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    amount_usdt: object
+    distance_1: object
+    distance_2: object
+    stop_loss: object
+    take_profit: object
+    rearm_delay: float = 5  # Segundos entre el cierre y el nuevo bracket
+
+
+@dataclass(frozen=True)
+class BracketPrices:
+    """Precios sin redondear del bracket"""
+    long_entry: object
+    long_stop: object
+    short_entry: object
+    short_stop: object
+
+
+@dataclass(frozen=True)
+class BracketQuote:
+    """Cantidad y precios del bracket ya redondeados al instrumento, como texto"""
+    quantity: str
+    long_entry: str
+    long_stop: str
+    long_take_profit: str
+    short_entry: str
+    short_stop: str
+    short_take_profit: str
+    qty_in_limits: bool
+
+
+def next_cycle(cycle):
+    """Ciclo siguiente tras un cierre"""
+    return 'distance_2' if cycle == 'distance_1' else 'distance_1'
+
+
+def cycle_distance(params, cycle):
+    return params.distance_1 if cycle == 'distance_1' else params.distance_2
+
+
+def percent_label(value):
+    """0.025 -> '2.5%'"""
+    value = value * 100
+    if isinstance(value, Decimal):
+        return f"{format(value.normalize(), 'f')}%"
+    return f"{value:g}%"
+
+
+def cycle_label(params, cycle):
+    return percent_label(cycle_distance(params, cycle))
+
+
+def bracket_prices(price, distance, stop_loss):
+    """Entradas y stop loss de ambas piernas a partir del precio actual"""
+    long_entry = price * (1 - distance)
+    short_entry = price * (1 + distance)
+    return BracketPrices(
+        long_entry=long_entry,
+        long_stop=long_entry * (1 - stop_loss),
+        short_entry=short_entry,
+        short_stop=short_entry * (1 + stop_loss),
+    )
+
+
+def take_profit_price(side, entry_price, take_profit):
+    """Precio del take profit de una posición abierta con side 'Buy' o 'Sell'"""
+    if side == "Buy":
+        return entry_price * (1 + take_profit)
+    return entry_price * (1 - take_profit)
+
+
+def close_side(side):
+    """Lado de la orden que cierra una posición"""
+    return "Sell" if side == "Buy" else "Buy"
+
+
+def order_quantity(amount_usdt, price):
+    """Cantidad sin redondear para invertir amount_usdt al precio dado"""
+    return amount_usdt / price
+
+
+def quote_bracket(spec, price, distance, stop_loss, take_profit, amount_usdt):
+    """
+    Bracket completo redondeado hacia abajo al tick y al qty step de `spec` (Decimal).
+
+    Los stop loss salen de la entrada sin redondear y el take profit de la entrada ya
+    redondeada (el precio al que se ejecuta la limit).
+    """
+    prices = bracket_prices(price, distance, stop_loss)
+    long_entry = round_price(spec, prices.long_entry)
+    short_entry = round_price(spec, prices.short_entry)
+    quantity = round_qty(spec, order_quantity(amount_usdt, price))
+    return BracketQuote(
+        quantity=quantity,
+        long_entry=long_entry,
+        long_stop=round_price(spec, prices.long_stop),
+        long_take_profit=round_price(spec, take_profit_price("Buy", Decimal(long_entry), take_profit)),
+        short_entry=short_entry,
+        short_stop=round_price(spec, prices.short_stop),
+        short_take_profit=round_price(spec, take_profit_price("Sell", Decimal(short_entry), take_profit)),
+        qty_in_limits=qty_within_limits(spec, quantity),
+    )
@@ -0,0 +1,245 @@
+"""
+Supervisor multiproceso del bot.
+
+Reparte SYMBOLS entre varios procesos de trading (cada uno con su sesión, su stream
+privado y su journal de estado) y, si config.ACCOUNTS tiene varias cuentas o
+subcuentas, entre ellas, para usar todos los núcleos y repartir los límites de
+peticiones por clave.
+
+Un único proceso de datos de mercado mantiene el stream público de tickers y la
+carga de instrumentos: publica los precios en memoria compartida (shared_prices.py)
+y envía las especificaciones de instrumentos a cada proceso por una cola, así el
+tráfico público no se duplica por proceso.
+
+Si un proceso termina inesperadamente se vuelve a lanzar tras RESTART_DELAY segundos.
+
+Uso:
+    python supervisor.py --workers-per-account 2
+"""
+import argparse
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+import config
+from lazy import is_created
+from shared_prices import SharedPriceBoard, SharedPriceCache
+
+RESTART_DELAY = 10  # Segundos antes de relanzar un proceso caído
+INSTRUMENTS_WAIT = 60  # Segundos que un proceso espera las especificaciones iniciales
+
+
+def shard_symbols(symbols, shards):
+    """Reparte los símbolos en `shards` grupos (round robin)"""
+    return [symbols[i::shards] for i in range(shards)]
+
+
+def plan_workers(symbols, accounts, per_account=1):
+    """
+    Asigna un grupo de símbolos a cada proceso, alternando cuentas
+
+    Returns:
+        Lista de dicts {'name', 'account', 'symbols'}
+    """
+    shards = shard_symbols(list(symbols), len(accounts) * per_account)
+    workers = []
+    for i, shard in enumerate(shards):
+        if not shard:
+            continue
+        account = accounts[i % len(accounts)]
+        workers.append({
+            'name': f"{account['name']}-{i // len(accounts)}",
+            'account': account,
+            'symbols': shard,
+        })
+    return workers
+
+
+# ==================== PROCESO DE DATOS DE MERCADO ====================
+def run_market_data(board_name, symbols, queues, testnet, ws_url=None, instruments_ttl=3600):
+    """Stream público de tickers -> memoria compartida; instrumentos -> colas de los procesos"""
+    from pybit.unified_trading import HTTP
+
+    from account_snapshot import fetch_all
+    from price_feed import PriceCache
+    from rate_limiter import RateLimitedSession
+    from transport import RetryingSession, configure_http
+    from ws_client import public_url
+
+    session = RetryingSession(RateLimitedSession(configure_http(HTTP(testnet=testnet, return_response_headers=True))))
+    board = SharedPriceBoard.attach(board_name, symbols)
+    prices = PriceCache(session, symbols, ws_url or public_url(testnet))
+    prices.add_listener(board.write)
+    prices.start()
+
+    # Precios iniciales por REST (una petición) hasta que llegue el primer tick
+    try:
+        prices.refresh_all()
+        for symbol in symbols:
+            snapshot = prices.peek(symbol)
+            if snapshot is not None:
+                board.write(snapshot)
+    except Exception as e:
+        print(f"Error al cargar precios iniciales: {e}")
+
+    wanted = set(symbols)
+    while True:
+        try:
+            items = fetch_all(session.get_instruments_info, category="linear", limit=1000)
+            items = [item for item in items if item['symbol'] in wanted]
+            for instruments_queue in queues:
+                instruments_queue.put(items)
+            print(f"📐 Instrumentos enviados a {len(queues)} procesos: {len(items)}")
+        except Exception as e:
+            print(f"Error al cargar instrumentos: {e}")
+            time.sleep(RESTART_DELAY)
+            continue
+        time.sleep(instruments_ttl)
+
+
+# ==================== PROCESO DE TRADING ====================
+def _follow_instruments(registry, instruments_queue):
+    while True:
+        try:
+            registry.load_from_list(instruments_queue.get())
+        except Exception as e:
+            print(f"Error al actualizar instrumentos: {e}")
+
+
+def run_worker(name, account, symbols, all_symbols, board_name, instruments_queue, metrics_port=None):
+    """Ejecuta bybit_bot con un grupo de símbolos, la cuenta indicada y precios compartidos"""
+    # Las credenciales deben estar puestas antes del primer uso de bybit_bot.session
+    config.api_key = account['api_key']
+    config.api_secret = account['api_secret']
+
+    import bybit_bot as bot
+    from state_store import StateStore
+    from trade_ledger import TradeLedger
+
+    board = SharedPriceBoard.attach(board_name, all_symbols)
+    bot.SYMBOLS = list(symbols)
+    bot.instrument_registry.symbols = list(symbols)
+    bot.price_cache = SharedPriceCache(board, bot.session, symbols, max_age=bot.PRICE_MAX_AGE)
+    bot.price_cache.add_listener(bot.volatility.on_price)
+    if bot.REQUOTE_ENABLED:
+        bot.price_cache.add_listener(bot.requoter.on_price)
+    if is_created(bot.state_store):
+        bot.state_store.close()
+    bot.state_store = StateStore(f"bot_state_{name}.db")
+    bot.trade_ledger = TradeLedger(
+        bot.session, f"ledger_{name}", cycle_for=bot.ledger_cycle, symbols=symbols
+    )
+    bot.METRICS_PORT = metrics_port
+
+    try:
+        bot.instrument_registry.load_from_list(instruments_queue.get(timeout=INSTRUMENTS_WAIT))
+    except queue.Empty:
+        print(f"⚠️ [{name}] sin instrumentos del proceso de datos de mercado, se cargarán por REST")
+    threading.Thread(
+        target=_follow_instruments, args=(bot.instrument_registry, instruments_queue), daemon=True
+    ).start()
+
+    print(f"🧩 [{name}] {len(symbols)} símbolos: {', '.join(symbols)}")
+    bot.main()
+
+
+# ==================== SUPERVISOR ====================
+class Supervisor:
+    """
+    Lanza y vigila el proceso de datos de mercado y los procesos de trading.
+
+    Args:
+        symbols: todos los símbolos a operar
+        accounts: lista de cuentas {'name', 'api_key', 'api_secret'} (config.ACCOUNTS)
+        per_account: procesos de trading por cuenta
+        metrics_port: puerto base de métricas (cada proceso usa el siguiente) o None
+    """
+
+    def __init__(self, symbols, accounts, per_account=1, testnet=False, ws_url=None,
+                 instruments_ttl=3600, metrics_port=None):
+        self.symbols = list(symbols)
+        self.plan = plan_workers(self.symbols, accounts, per_account)
+        self.testnet = testnet
+        self.ws_url = ws_url
+        self.instruments_ttl = instruments_ttl
+        self.metrics_port = metrics_port
+        # spawn: los procesos no heredan threads ni sockets del supervisor
+        self.ctx = mp.get_context("spawn")
+        self.board = SharedPriceBoard.create(self.symbols)
+        self.queues = [self.ctx.Queue() for _ in self.plan]
+        self.processes = {}
+
+    def _start_market_data(self):
+        return self.ctx.Process(
+            target=run_market_data,
+            args=(self.board.name, self.symbols, self.queues, self.testnet, self.ws_url, self.instruments_ttl),
+            name="market-data",
+            daemon=True,
+        )
+
+    def _start_worker(self, index):
+        worker = self.plan[index]
+        port = self.metrics_port + index + 1 if self.metrics_port else None
+        return self.ctx.Process(
+            target=run_worker,
+            args=(worker['name'], worker['account'], worker['symbols'], self.symbols,
+                  self.board.name, self.queues[index], port),
+            name=worker['name'],
+            daemon=True,
+        )
+
+    def _launch(self, key):
+        process = self._start_market_data() if key == "market-data" else self._start_worker(key)
+        process.start()
+        self.processes[key] = process
+
+    def run(self):
+        print(f"🧭 {len(self.plan)} procesos de trading para {len(self.symbols)} símbolos")
+        self._launch("market-data")
+        for index in range(len(self.plan)):
+            self._launch(index)
+
+        try:
+            while True:
+                time.sleep(RESTART_DELAY)
+                for key, process in list(self.processes.items()):
+                    if not process.is_alive():
+                        label = key if key == "market-data" else self.plan[key]['name']
+                        print(f"⚠️ Proceso {label} terminó (código {process.exitcode}), relanzando")
+                        self._launch(key)
+        except KeyboardInterrupt:
+            print("\n⚠️ Deteniendo procesos...")
+        finally:
+            self.stop()
+
+    def stop(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=10)
+        self.board.close()
+
+
+def main():
+    import bybit_bot
+
+    parser = argparse.ArgumentParser(description="Reparte los símbolos del bot entre procesos y cuentas")
+    parser.add_argument("--workers-per-account", type=int, default=1)
+    parser.add_argument("--metrics-port", type=int, default=None, help="Puerto base de métricas por proceso")
+    args = parser.parse_args()
+
+    Supervisor(
+        bybit_bot.SYMBOLS,
+        config.ACCOUNTS,
+        per_account=args.workers_per_account,
+        testnet=config.TESTNET,
+        ws_url=bybit_bot.WS_PUBLIC_URL,
+        instruments_ttl=bybit_bot.INSTRUMENTS_TTL,
+        metrics_port=args.metrics_port,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos del bot viven en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Globales de bybit_bot que las pruebas reemplazan o modifican (se restauran al terminar)
+BOT_GLOBALS = (
+    "session", "http_client", "SYMBOLS", "EXECUTION_MODE", "TAKE_PROFIT_MODE",
+    "instrument_registry", "account_snapshot", "state_store", "trade_ledger",
+    "execution_engine", "polling_started",
+)
+
+
+@pytest.fixture
+def isolated_bot(monkeypatch):
+    """
+    bybit_bot con su estado de módulo aislado: sesión, símbolos, clientes y registros de
+    brackets vuelven a sus valores originales al terminar la prueba
+    """
+    from lazy import Lazy
+
+    import bybit_bot as bot
+
+    for name in BOT_GLOBALS:
+        monkeypatch.setattr(bot, name, getattr(bot, name))
+    monkeypatch.setattr(bot, "price_cache", Lazy(bot.make_price_cache))
+    monkeypatch.setattr(bot, "active_orders", {})
+    monkeypatch.setattr(bot, "cycle_control", {})
+    monkeypatch.setattr(bot, "unmatched_positions", set())
+    monkeypatch.setattr(bot, "closed_cycles", {})
+    return bot
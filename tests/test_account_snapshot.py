@@ -0,0 +1,68 @@
+"""
+Foto de la cuenta: una lectura paginada para todos los símbolos y control de antigüedad
+"""
+import time
+
+from account_snapshot import AccountSnapshot
+
+
+class PagedSession:
+    """Sesión mínima: posiciones y órdenes abiertas en páginas de `page` elementos"""
+
+    def __init__(self, positions, orders, page=2):
+        self.data = {'get_positions': positions, 'get_open_orders': orders}
+        self.page = page
+        self.calls = []
+
+    def _paged(self, name, cursor=None, **params):
+        self.calls.append(name)
+        start = int(cursor or 0)
+        items = self.data[name][start:start + self.page]
+        next_cursor = str(start + self.page) if start + self.page < len(self.data[name]) else ""
+        return {'retCode': 0, 'result': {'list': items, 'nextPageCursor': next_cursor}}
+
+    def get_positions(self, **params):
+        return self._paged("get_positions", **params)
+
+    def get_open_orders(self, **params):
+        return self._paged("get_open_orders", **params)
+
+
+def test_refresh_indexes_every_page_by_symbol():
+    positions = [
+        {'symbol': "AUSDT", 'size': "1", 'side': "Buy"},
+        {'symbol': "BUSDT", 'size': "0", 'side': ""},
+        {'symbol': "CUSDT", 'size': "2", 'side': "Sell"},
+    ]
+    orders = [{'symbol': "AUSDT", 'orderId': "1"}, {'symbol': "DUSDT", 'orderId': "2"}, {'symbol': "AUSDT", 'orderId': "3"}]
+    session = PagedSession(positions, orders)
+    snapshot = AccountSnapshot(session)
+
+    assert snapshot.refresh() == 1
+
+    assert session.calls == ["get_positions", "get_positions", "get_open_orders", "get_open_orders"]
+    assert snapshot.position("AUSDT") == (positions[0], 1)
+    assert snapshot.position("BUSDT") == (None, 1)  # Tamaño 0: sin posición
+    assert [o['orderId'] for o in snapshot.open_orders("AUSDT")[0]] == ["1", "3"]
+
+
+def test_stale_or_earlier_snapshots_are_not_used():
+    snapshot = AccountSnapshot(PagedSession([], []))
+    assert snapshot.position("AUSDT") == (None, None)
+
+    before = time.monotonic()
+    snapshot.refresh()
+
+    assert snapshot.position("AUSDT", since=before) == (None, 1)
+    assert snapshot.position("AUSDT", since=time.monotonic()) == (None, None)
+    time.sleep(0.02)
+    assert snapshot.open_orders("AUSDT", max_age=0.01) == (None, None)
+
+
+def test_wait_newer_returns_after_the_next_refresh():
+    snapshot = AccountSnapshot(PagedSession([], []), interval=0.01)
+    snapshot.start()
+    try:
+        assert snapshot.wait_newer(1, timeout=2) > 1
+    finally:
+        snapshot.stop()
@@ -0,0 +1,182 @@
+"""
+Runtime asyncio: conciliación al arrancar (journal + exchange) y take profit de cada
+posición, con un cliente asíncrono en memoria
+"""
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from async_runtime import BybitAPIError, SymbolState, SymbolStrategy, reconcile
+from instruments import InstrumentRegistry
+from strategy import StrategyParams
+
+SYMBOL = "SIMUSDT"
+PARAMS = StrategyParams(Decimal(20), Decimal("0.01"), Decimal("0.025"), Decimal("0.01"), Decimal("0.02"), rearm_delay=0)
+
+
+class FakeAsyncClient:
+    """Cliente asíncrono mínimo: posiciones y órdenes fijas, registra las escrituras"""
+
+    def __init__(self, positions=(), orders=(), replies=None):
+        self.positions = list(positions)
+        self.orders = list(orders)
+        self.calls = []
+        self.replies = replies or {}  # {método: [retCode, ...]} antes de responder 0
+
+    async def get_positions(self, **params):
+        return {'retCode': 0, 'result': {'list': self.positions, 'nextPageCursor': ""}}
+
+    async def get_open_orders(self, **params):
+        return {'retCode': 0, 'result': {'list': self.orders, 'nextPageCursor': ""}}
+
+    def _reply(self, name, params):
+        self.calls.append((name, params))
+        codes = self.replies.get(name)
+        code = codes.pop(0) if codes else 0
+        return {'retCode': code, 'retMsg': "OK" if code == 0 else "rejected", 'result': {}}
+
+    async def cancel_order(self, **params):
+        return self._reply("cancel_order", params)
+
+    async def place_order(self, **params):
+        return self._reply("place_order", params)
+
+
+class OpenPosition:
+    """Tablero de posiciones que ya ve la posición abierta"""
+
+    async def wait_for(self, symbol, predicate):
+        return position()
+
+
+def order(order_id, side, reduce_only=False):
+    return {'symbol': SYMBOL, 'orderId': order_id, 'orderLinkId': f"link-{order_id}", 'side': side,
+            'orderType': "Limit", 'reduceOnly': reduce_only}
+
+
+def position(side="Buy", size="1.3"):
+    return {'symbol': SYMBOL, 'side': side, 'size': size, 'avgPrice': "14.85"}
+
+
+def strategy(client, journal=None, **options):
+    on_transition = (lambda *args: journal.append(args)) if journal is not None else None
+    return SymbolStrategy(SYMBOL, client, None, None, None, PARAMS, lambda mensaje: None,
+                          on_transition=on_transition, **options)
+
+
+def run_reconcile(client, saved=None, cycle=None, **options):
+    s = strategy(client, **options)
+    ready = asyncio.run(reconcile(client, [s], {SYMBOL: saved} if saved else {}, {SYMBOL: cycle} if cycle else {}))
+    return s, ready
+
+
+def test_restart_keeps_the_live_bracket_and_its_cycle():
+    client = FakeAsyncClient(orders=[order("L", "Buy"), order("S", "Sell")])
+    saved = {'long_order_id': "L", 'short_order_id': "S", 'has_position': False, 'distance': "0.025"}
+
+    s, ready = run_reconcile(client, saved, cycle="distance_2")
+
+    assert ready == [s]
+    assert s.state == SymbolState.ARMED
+    assert (s.long_order_id, s.short_order_id, s.cycle) == ("L", "S", "distance_2")
+    assert client.calls == []
+
+
+def test_restart_adopts_an_unrecorded_bracket():
+    client = FakeAsyncClient(orders=[order("L", "Buy"), order("S", "Sell")])
+
+    s, _ = run_reconcile(client)
+
+    assert s.state == SymbolState.ARMED
+    assert (s.long_order_id, s.short_order_id) == ("L", "S")
+
+
+def test_restart_cancels_an_incomplete_bracket_and_rearms():
+    client = FakeAsyncClient(orders=[order("S", "Sell")])
+    saved = {'long_order_id': "L", 'short_order_id': "S", 'has_position': False}
+
+    s, _ = run_reconcile(client, saved)
+
+    assert s.state == SymbolState.IDLE
+    assert client.calls == [("cancel_order", {'category': "linear", 'symbol': SYMBOL, 'orderId': "S"})]
+
+
+def test_restart_with_a_protected_position_waits_for_the_close():
+    journal = []
+    client = FakeAsyncClient(positions=[position()], orders=[order("S", "Sell"), order("TP", "Sell", reduce_only=True)])
+    saved = {'long_order_id': "L", 'short_order_id': "S", 'has_position': False}
+
+    s, _ = run_reconcile(client, saved, journal=journal)
+
+    assert s.state == SymbolState.IN_POSITION
+    assert s.tp_order_link_id == "link-TP"
+    # La pierna opuesta seguía abierta
+    assert [call[1]['orderId'] for call in client.calls] == ["S"]
+    assert journal[-1][1] == "restored" and journal[-1][2]['has_position']
+
+
+def test_restart_with_a_position_without_take_profit_places_it():
+    client = FakeAsyncClient(positions=[position()])
+
+    s, _ = run_reconcile(client, {'long_order_id': "L", 'short_order_id': None}, take_profit_mode="attached")
+
+    assert s.state == SymbolState.ARMED
+    assert s.missing_take_profit
+
+
+def test_unknown_open_orders_leave_the_symbol_alone():
+    client = FakeAsyncClient(orders=[order("A", "Buy"), order("B", "Buy")])
+
+    s, ready = run_reconcile(client)
+
+    assert ready == []
+    assert client.calls == []
+
+
+def test_position_closed_while_stopped_finishes_the_cycle():
+    client = FakeAsyncClient()
+
+    s, _ = run_reconcile(client, {'long_order_id': "L", 'short_order_id': None, 'has_position': True})
+
+    assert s.state == SymbolState.CLOSED
+
+
+def armed_strategy(client):
+    registry = InstrumentRegistry(None, [SYMBOL])
+    registry.load_from_list([{
+        'symbol': SYMBOL, 'priceFilter': {'tickSize': "0.001"},
+        'lotSizeFilter': {'qtyStep': "0.1", 'minOrderQty': "0.1", 'maxOrderQty': "10000"},
+    }])
+    s = SymbolStrategy(SYMBOL, client, registry, None, OpenPosition(), PARAMS, lambda mensaje: None)
+    s.long_order_id, s.short_order_id = "L", "S"
+    s.state = SymbolState.ARMED
+    return s
+
+
+def test_failed_opposite_cancel_stays_armed_and_is_retried():
+    client = FakeAsyncClient(replies={'cancel_order': [10001]})
+    s = armed_strategy(client)
+
+    with pytest.raises(BybitAPIError):
+        asyncio.run(s.wait_fill())
+    assert s.state == SymbolState.ARMED
+    assert [name for name, _ in client.calls] == ["cancel_order"]
+
+    assert asyncio.run(s.wait_fill()) == SymbolState.IN_POSITION
+    assert [name for name, _ in client.calls] == ["cancel_order", "cancel_order", "place_order"]
+
+
+def test_rejected_take_profit_is_retried_with_the_same_order_link_id():
+    client = FakeAsyncClient(replies={'place_order': [10001]})
+    s = armed_strategy(client)
+
+    with pytest.raises(BybitAPIError):
+        asyncio.run(s.wait_fill())
+    assert s.state == SymbolState.ARMED
+
+    assert asyncio.run(s.wait_fill()) == SymbolState.IN_POSITION
+    # La cancelación ya se hizo: el reintento solo vuelve a enviar el take profit
+    assert [name for name, _ in client.calls] == ["cancel_order", "place_order", "place_order"]
+    assert client.calls[1][1]['orderLinkId'] == client.calls[2][1]['orderLinkId']
+    assert client.calls[2][1]['price'] == "15.147"
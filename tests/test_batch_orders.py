@@ -0,0 +1,80 @@
+"""
+Órdenes por lotes: conciliación pierna por pierna y envío en bloques de BATCH_LIMIT
+"""
+from batch_orders import BATCH_LIMIT, cancel_batch_orders, place_batch_orders, reconcile_batch
+
+
+def leg(symbol, side, link_id=None):
+    order = {'symbol': symbol, 'side': side, 'orderType': "Limit", 'qty': "1", 'price': "10"}
+    if link_id:
+        order['orderLinkId'] = link_id
+    return order
+
+
+def test_partial_batch_failure_is_reported_per_leg():
+    requests = [leg("AUSDT", "Buy", "a"), leg("AUSDT", "Sell", "b")]
+    response = {
+        'retCode': 0,
+        'result': {'list': [{'orderId': "1", 'orderLinkId': "a"}, {'orderId': "", 'orderLinkId': "b"}]},
+        'retExtInfo': {'list': [{'code': 0, 'msg': "OK"}, {'code': 110007, 'msg': "insufficient balance"}]},
+    }
+
+    results = reconcile_batch(requests, response)
+
+    assert [(r['ok'], r['order_id'], r['msg']) for r in results] == [
+        (True, "1", "OK"), (False, None, "insufficient balance"),
+    ]
+    assert results[1]['request'] is requests[1]
+
+
+def test_rejected_batch_fails_every_leg():
+    requests = [leg("AUSDT", "Buy", "a"), leg("AUSDT", "Sell", "b")]
+
+    results = reconcile_batch(requests, {'retCode': 10001, 'retMsg': "params error"})
+
+    assert [(r['ok'], r['msg']) for r in results] == [(False, "params error")] * 2
+
+
+class BatchSession:
+    """Sesión mínima: responde cada lote (o lanza) y registra su tamaño"""
+
+    def __init__(self, fail_chunk=None):
+        self.sizes = []
+        self.fail_chunk = fail_chunk
+
+    def _reply(self, request):
+        self.sizes.append(len(request))
+        if len(self.sizes) - 1 == self.fail_chunk:
+            raise ConnectionError("reset")
+        return {
+            'retCode': 0,
+            'result': {'list': [{'orderId': f"id-{i}", 'orderLinkId': r.get('orderLinkId')} for i, r in enumerate(request)]},
+            'retExtInfo': {'list': [{'code': 0, 'msg': "OK"} for _ in request]},
+        }
+
+    def place_batch_order(self, category, request):
+        return self._reply(request)
+
+    def cancel_batch_order(self, category, request):
+        return self._reply(request)
+
+
+def test_orders_are_sent_in_chunks_and_keep_their_order():
+    orders = [leg(f"S{i}USDT", "Buy") for i in range(BATCH_LIMIT * 2 + 5)]
+    session = BatchSession()
+
+    results = place_batch_orders(session, orders, max_parallel=3)
+
+    assert sorted(session.sizes) == [5, BATCH_LIMIT, BATCH_LIMIT]
+    assert [r['symbol'] for r in results] == [o['symbol'] for o in orders]
+    assert all(r['ok'] and r['order_link_id'].startswith("B-") for r in results)
+
+
+def test_a_failed_chunk_only_fails_its_own_legs():
+    cancels = [(f"S{i}USDT", f"order-{i}") for i in range(BATCH_LIMIT + 1)]
+    session = BatchSession(fail_chunk=1)
+
+    results = cancel_batch_orders(session, cancels)
+
+    assert all(r['ok'] for r in results[:BATCH_LIMIT])
+    assert not results[-1]['ok'] and results[-1]['msg'] == "reset"
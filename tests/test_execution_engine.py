@@ -0,0 +1,196 @@
+"""
+Motor de ejecución por WebSocket contra un servidor local (fake_ws_server) y el
+exchange simulado: los eventos de posición y de órdenes llegan a on_position_update
+y on_order_update como llegarían desde Bybit.
+"""
+import threading
+import time
+
+import pytest
+
+import bybit_bot as bot
+from account_snapshot import AccountSnapshot
+from exchange_sim import ExchangeSimulator
+from execution_engine import ExecutionEngine
+from fake_ws_server import FakeBybitWsServer
+from instruments import InstrumentRegistry
+from state_store import StateStore
+from trade_ledger import TradeLedger
+
+SYMBOL = "SIMUSDT"
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def sim(tmp_path, isolated_bot, monkeypatch):
+    sim = ExchangeSimulator()
+    # 15.0 al armar; 14.5 cruza la pierna long (1% debajo)
+    sim.add_symbol(SYMBOL, [15.0, 14.5, 14.5, 14.5])
+    monkeypatch.setattr(bot, "SYMBOLS", [SYMBOL])
+    monkeypatch.setattr(bot, "WS_REARM_DELAY", 0)
+    monkeypatch.setattr(bot, "instrument_registry", InstrumentRegistry(None, [SYMBOL]))
+    monkeypatch.setattr(bot, "account_snapshot", AccountSnapshot(None))
+    monkeypatch.setattr(bot, "state_store", StateStore(str(tmp_path / "state.db")))
+    bot.use_session(sim, rate_limited=False)
+    ledger = TradeLedger(bot.session, str(tmp_path / "ledger"), cycle_for=bot.ledger_cycle)
+    monkeypatch.setattr(bot, "trade_ledger", ledger)
+    bot.instrument_registry.load()
+    bot.price_cache.symbols = [SYMBOL]
+    bot.price_cache.max_age = 0  # Sin stream público: precio del simulador por REST
+    return sim
+
+
+@pytest.fixture
+def server():
+    server = FakeBybitWsServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def gave_up():
+    return threading.Event()
+
+
+@pytest.fixture
+def engine(server, gave_up, monkeypatch):
+    engine = ExecutionEngine(
+        server.url, "key", "secret",
+        on_position=bot.on_position_update,
+        on_order=bot.on_order_update,
+        on_execution=bot.on_execution_update,
+        on_resync=bot.resync_positions,
+        on_failure=lambda: (bot.fallback_to_polling(), gave_up.set()),
+        max_reconnects=2,
+    )
+    engine.stream.reconnect_delay = 0.05
+    monkeypatch.setattr(bot, "execution_engine", engine)
+    assert engine.start(timeout=5)
+    yield engine
+    engine.stop()
+
+
+def position_event(size, side="Buy", price="14.85"):
+    return [{
+        'category': "linear", 'symbol': SYMBOL, 'side': side if size != "0" else "",
+        'size': size, 'entryPrice': price, 'updatedTime': str(int(time.time() * 1000)),
+    }]
+
+
+def test_order_fill_cancels_opposite_leg(sim, server, engine):
+    assert bot.rearm_symbols([SYMBOL]) == [SYMBOL]
+    active = bot.active_orders[SYMBOL]
+
+    server.publish("order.linear", [{
+        'category': "linear", 'symbol': SYMBOL, 'orderId': active['long_order_id'], 'orderStatus': "Filled",
+    }])
+
+    assert wait_until(lambda: active.get('opposite_cancelled'))
+    assert active['short_order_id'] not in sim.markets[SYMBOL].orders
+
+
+def test_execution_event_records_the_fill_time(sim, server, engine):
+    bot.rearm_symbols([SYMBOL])
+    active = bot.active_orders[SYMBOL]
+
+    server.publish("execution.linear", [{
+        'category': "linear", 'symbol': SYMBOL, 'orderId': "otra", 'execType': "Trade", 'execTime': "1",
+    }])
+    server.publish("execution.linear", [{
+        'category': "linear", 'symbol': SYMBOL, 'orderId': active['long_order_id'],
+        'execType': "Trade", 'execTime': "1700000000000",
+    }])
+
+    assert wait_until(lambda: active.get('filled_at'))
+    assert active['filled_at'] == 1700000000000
+
+
+def test_position_events_open_and_close(sim, server, engine):
+    bot.rearm_symbols([SYMBOL])
+    first_cycle = bot.cycle_control[SYMBOL]
+
+    server.publish("position.linear", position_event("1.3"))
+    assert wait_until(lambda: bot.active_orders.get(SYMBOL, {}).get('has_position'))
+    assert wait_until(lambda: bot.metrics.histogram("fill_to_tp", symbol=SYMBOL, mode=bot.TAKE_PROFIT_MODE).count)
+
+    server.publish("position.linear", position_event("0"))
+    # El cierre cambia el ciclo antes de rearmar: se espera el bracket nuevo
+    assert wait_until(lambda: bot.active_orders.get(SYMBOL, {}).get('has_position') is False)
+    assert bot.cycle_control[SYMBOL] != first_cycle
+
+
+def test_position_before_registration_is_resynced(sim, server, engine, monkeypatch):
+    place_batch_order = sim.place_batch_order
+
+    def place_and_fill(**kwargs):
+        # La pierna long se ejecuta y el stream lo notifica antes de que el bot registre el bracket
+        response = place_batch_order(**kwargs)
+        sim.step()
+        server.publish("position.linear", position_event(str(sim.markets[SYMBOL].position.size)))
+        assert wait_until(lambda: SYMBOL in bot.unmatched_positions)
+        return response
+
+    monkeypatch.setattr(sim, "place_batch_order", place_and_fill)
+    assert bot.rearm_symbols([SYMBOL]) == [SYMBOL]
+
+    assert wait_until(lambda: bot.active_orders[SYMBOL].get('has_position'))
+    assert SYMBOL not in bot.unmatched_positions
+
+
+def test_lost_stream_falls_back_to_polling(sim, server, engine, gave_up, monkeypatch):
+    started = []
+    monkeypatch.setattr(bot, "start_polling_threads", lambda: started.append(True))
+
+    server.stop()
+
+    assert gave_up.wait(5)
+    assert started == [True]
+
+
+def test_failed_opposite_cancel_is_retried_by_position_handler(sim, server, engine, monkeypatch):
+    bot.rearm_symbols([SYMBOL])
+    active = bot.active_orders[SYMBOL]
+    cancel_order = bot.cancel_order
+    attempts = []
+
+    def flaky_cancel(symbol, order_id):
+        attempts.append(order_id)
+        return len(attempts) > 1 and cancel_order(symbol, order_id)
+
+    monkeypatch.setattr(bot, "cancel_order", flaky_cancel)
+    server.publish("order.linear", [{
+        'category': "linear", 'symbol': SYMBOL, 'orderId': active['long_order_id'], 'orderStatus': "Filled",
+    }])
+    assert wait_until(lambda: len(attempts) == 1)
+    assert not active.get('opposite_cancelled')
+
+    server.publish("position.linear", position_event("1.3"))
+    assert wait_until(lambda: len(attempts) == 2)
+    assert attempts == [active['short_order_id']] * 2
+    assert wait_until(lambda: active['short_order_id'] not in sim.markets[SYMBOL].orders)
+
+
+def test_requote_leaves_a_rearmed_bracket_alone(sim, monkeypatch):
+    bot.rearm_symbols([SYMBOL])
+    amend_batch_orders = bot.amend_batch_orders
+    amended = []
+
+    def amend_and_rearm(session, amends, **kwargs):
+        # Mientras viaja el amend la pierna se ejecuta, se cierra y el símbolo se rearma
+        amended.extend(amends)
+        results = amend_batch_orders(session, amends, **kwargs)
+        bot.active_orders[SYMBOL] = dict(bot.active_orders[SYMBOL], long_order_id="new", anchor_price="15")
+        return results
+
+    monkeypatch.setattr(bot, "amend_batch_orders", amend_and_rearm)
+    assert bot.requote_brackets({SYMBOL: 15.3}) == []
+    assert amended and all('qty' not in amend for amend in amended)
+    assert bot.active_orders[SYMBOL]['anchor_price'] == "15"
@@ -0,0 +1,75 @@
+"""
+Objetos creados al primer uso y arranque del bot sin abrir clientes
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from lazy import Lazy, is_created
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Client:
+    def __init__(self):
+        self.session = "inicial"
+
+    def ping(self):
+        return "pong"
+
+
+def test_factory_runs_on_first_attribute_access_only():
+    calls = []
+    client = Lazy(lambda: calls.append(1) or Client())
+    assert not is_created(client)
+    assert repr(client) == "Lazy(<sin crear>)"
+    assert calls == []
+
+    assert client.ping() == "pong"
+    assert is_created(client)
+    client.session = "nueva"
+    assert client.session == "nueva"
+    assert calls == [1]
+    assert is_created(Client())
+
+
+def test_first_assignment_creates_the_target():
+    client = Lazy(Client)
+    client.session = "otra"
+    assert is_created(client)
+    assert client.session == "otra"
+
+
+def test_concurrent_first_use_builds_a_single_object():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return Client()
+
+    client = Lazy(factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.ping())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["pong"] * 8
+
+
+def test_importing_the_bot_creates_no_clients():
+    code = (
+        "import bybit_bot as bot\n"
+        "from lazy import is_created\n"
+        "bot.transport_samples()\n"
+        "bot.metrics.prometheus()\n"
+        "names = ('http_client', 'session', 'price_cache', 'bot', 'state_store', 'trade_ledger')\n"
+        "print(','.join(n for n in names if is_created(getattr(bot, n))))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
@@ -0,0 +1,54 @@
+"""
+Notificaciones de Telegram: agrupado por intervalo, descarte acotado y 429
+"""
+from notifier import TelegramNotifier, pack_messages, retry_after_seconds
+
+
+class TooManyRequests(Exception):
+    error_code = 429
+    result_json = {'parameters': {'retry_after': 0}}
+
+
+def test_pack_messages_never_splits_a_message():
+    chunks = pack_messages(["a" * 6, "b" * 6, "c" * 20], max_len=15)
+
+    assert chunks == ["a" * 6 + "\n\n" + "b" * 6, "c" * 12 + "..."]
+
+
+def test_messages_of_one_interval_go_out_together():
+    sent = []
+    notifier = TelegramNotifier(sent.append, interval=0.05)
+    notifier.start()
+    for i in range(3):
+        notifier.notify(f"m{i}")
+    notifier.flush()
+
+    assert sent == ["m0\n\nm1\n\nm2"]
+
+
+def test_full_queue_drops_and_reports_the_loss():
+    sent = []
+    notifier = TelegramNotifier(sent.append, max_queue=2)
+
+    assert [notifier.notify(f"m{i}") for i in range(4)] == [True, True, False, False]
+    notifier.start()
+    notifier.flush()
+
+    assert sent == ["m0\n\nm1\n\n⚠️ 2 mensajes descartados por saturación"]
+
+
+def test_rate_limited_send_is_retried():
+    attempts = []
+
+    def send(text):
+        attempts.append(text)
+        if len(attempts) == 1:
+            raise TooManyRequests()
+
+    notifier = TelegramNotifier(send)
+    notifier.notify("hola")
+    notifier.start()
+    notifier.flush()
+
+    assert retry_after_seconds(TooManyRequests()) == 0
+    assert attempts == ["hola", "hola"] and notifier.sent == 1
@@ -0,0 +1,87 @@
+"""
+Optimizador: índices de primer paso en caché y evaluación de combinaciones con ellos
+"""
+import os
+
+import numpy as np
+import pytest
+
+import optimizer
+from backtester import MAKER_FEE, TAKER_FEE
+from strategy import StrategyParams
+
+
+def write_series(path, prices, step_ms=1000):
+    lines = ["ts,price"] + [f"{1_700_000_000_000 + i * step_ms},{p}" for i, p in enumerate(prices)]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def brute_first_passage(prices, ratio, upward):
+    n = len(prices)
+    out = np.full(n, n, dtype=np.int64)
+    for i in range(n):
+        threshold = prices[i] * ratio
+        for j in range(i + 1, n):
+            if (prices[j] >= threshold) if upward else (prices[j] <= threshold):
+                out[i] = j
+                break
+    return out
+
+
+@pytest.mark.parametrize("upward", [True, False])
+def test_first_passage_matches_a_linear_scan(tmp_path, upward):
+    prices = 100 * np.cumprod(1 + np.random.default_rng(7).normal(0, 0.004, 500))
+    op = np.maximum if upward else np.minimum
+    tables = optimizer.build_sparse_table(prices, op, str(tmp_path), "t")
+    ratio = 1.01 if upward else 0.99
+    out = np.empty(prices.shape, dtype=np.int64)
+
+    optimizer.first_passage(prices, tables, ratio, upward, out)
+    assert np.array_equal(out, brute_first_passage(prices, ratio, upward))
+
+
+def test_cache_is_reused_and_only_missing_levels_are_built(tmp_path, monkeypatch):
+    path = write_series(tmp_path / "LINKUSDT.csv", [100, 99, 101, 98, 102])
+    cache_dir = str(tmp_path / "cache")
+    directory = optimizer.ensure_first_passage_cache(path, [0.01], cache_dir)
+    built = optimizer.level_name("up", 0.01)
+    mtime = os.stat(os.path.join(directory, built)).st_mtime_ns
+
+    loads = []
+    original = optimizer.load_series
+    monkeypatch.setattr(optimizer, "load_series", lambda p: loads.append(p) or original(p))
+    assert optimizer.ensure_first_passage_cache(path, [0.01], cache_dir) == directory
+    assert loads == []
+
+    optimizer.ensure_first_passage_cache(path, [0.01, 0.02], cache_dir)
+    assert loads == [path]
+    assert os.stat(os.path.join(directory, built)).st_mtime_ns == mtime
+
+
+def test_optimize_walks_the_cycles_with_the_cached_indexes(tmp_path):
+    # d1 = 1 %: largo a 98.9, TP +2 % en 101; d2 = 2 %: corto a 103.1, stop +1 % en 104.2
+    path = write_series(tmp_path / "LINKUSDT.csv", [100, 98.9, 101, 103.1, 104.2, 104.0])
+    params = StrategyParams(20, 0.01, 0.02, 0.01, 0.02, rearm_delay=0)
+
+    [result] = optimizer.optimize([path], [params], workers=1, cache_dir=str(tmp_path / "cache"))
+
+    win = 20 * (1 - 0.01) * (0.02 - 2 * MAKER_FEE)
+    loss = 20 * (1 + 0.02) * (0.01 + MAKER_FEE + TAKER_FEE)
+    assert result.symbol == "LINKUSDT"
+    assert (result.trades, result.wins) == (2, 1)
+    assert result.hit_rate == 0.5
+    assert result.pnl == pytest.approx(win - loss)
+    assert result.max_drawdown == pytest.approx(loss)
+
+
+def test_build_param_sets_samples_the_grid_reproducibly():
+    grid = optimizer.build_param_sets(20, [0.01, 0.02], [0.03], [0.01, 0.02], [0.02, 0.04])
+    assert len(grid) == 8
+    assert len(set(grid)) == 8
+
+    sample = optimizer.build_param_sets(20, [0.01, 0.02], [0.03], [0.01, 0.02], [0.02, 0.04], samples=3, seed=1)
+    assert len(sample) == 3
+    assert set(sample) <= set(grid)
+    assert sample == optimizer.build_param_sets(20, [0.01, 0.02], [0.03], [0.01, 0.02], [0.02, 0.04], samples=3, seed=1)
+    assert optimizer.required_levels(grid) == [0.01, 0.02, 0.03, 0.04]
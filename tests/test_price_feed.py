@@ -0,0 +1,99 @@
+"""
+Caché de precios: fotos del stream 'tickers', deltas, respaldo por REST y listeners
+"""
+from decimal import Decimal
+
+from price_feed import PriceCache
+
+
+class TickerSession:
+    """Sesión mínima que responde get_tickers con un precio fijo por símbolo"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def get_tickers(self, category, symbol=None):
+        self.calls.append(symbol)
+        symbols = [symbol] if symbol else list(self.prices)
+        return {'retCode': 0, 'result': {'list': [
+            {'symbol': s, 'lastPrice': self.prices[s], 'bid1Price': "", 'ask1Price': "", 'markPrice': ""}
+            for s in symbols
+        ]}}
+
+
+def make_cache(prices, max_age=2.0):
+    session = TickerSession(prices)
+    cache = PriceCache(session, list(prices), "wss://example.invalid", max_age=max_age)
+    return cache, session
+
+
+def ticker(symbol, kind="snapshot", **fields):
+    return {'topic': f"tickers.{symbol}", 'type': kind, 'data': {'symbol': symbol, **fields}}
+
+
+def test_stream_deltas_are_merged_into_the_last_snapshot():
+    cache, session = make_cache({"BTCUSDT": "100"})
+    cache.stream.on_message(ticker("BTCUSDT", lastPrice="100", bid1Price="99.5", ask1Price="100.5", markPrice="100"))
+    cache.stream.on_message(ticker("BTCUSDT", kind="delta", lastPrice="101"))
+
+    snapshot = cache.get("BTCUSDT")
+    assert snapshot.source == "ws"
+    assert snapshot.last == Decimal("101")
+    assert snapshot.bid == Decimal("99.5")
+    assert snapshot.ask == Decimal("100.5")
+    assert session.calls == []
+    assert cache.rest_fallbacks == 0
+
+
+def test_stale_snapshot_falls_back_to_rest():
+    cache, session = make_cache({"BTCUSDT": "105"}, max_age=0.0)
+    cache.stream.on_message(ticker("BTCUSDT", lastPrice="100"))
+
+    assert cache.peek("BTCUSDT").last == Decimal("100")
+    snapshot = cache.get("BTCUSDT", max_age=-1)
+    assert snapshot.source == "rest"
+    assert snapshot.last == Decimal("105")
+    assert snapshot.bid is None
+    assert session.calls == ["BTCUSDT"]
+    assert cache.rest_fallbacks == 1
+
+
+def test_older_rest_answer_does_not_overwrite_a_newer_tick():
+    cache, _ = make_cache({"BTCUSDT": "90"})
+    cache.stream.on_message(ticker("BTCUSDT", lastPrice="100"))
+    newer = cache.peek("BTCUSDT")
+
+    older = newer.__class__(**{**newer.__dict__, 'last': Decimal("90"), 'received_at': newer.received_at - 5})
+    cache.seed(older)
+    assert cache.peek("BTCUSDT") is newer
+
+
+def test_refresh_all_uses_a_single_request_and_reset_forgets():
+    cache, session = make_cache({"BTCUSDT": "100", "ETHUSDT": "10"})
+    cache.refresh_all()
+    assert session.calls == [None]
+    assert cache.peek("ETHUSDT").last == Decimal("10")
+    assert cache.is_fresh("BTCUSDT")
+
+    cache.reset()
+    assert cache.peek("BTCUSDT") is None
+    assert not cache.is_fresh("BTCUSDT")
+
+
+def test_listeners_get_every_tick_and_errors_do_not_stop_the_rest():
+    cache, _ = make_cache({"BTCUSDT": "100"})
+    seen = []
+
+    def broken(snapshot):
+        raise ValueError("listener roto")
+
+    cache.add_listener(broken)
+    cache.add_listener(lambda snapshot: seen.append(snapshot.last))
+    cache.stream.on_message(ticker("BTCUSDT", lastPrice="100"))
+    cache.stream.on_message(ticker("BTCUSDT", kind="delta", bid1Price="99"))
+    # Mensajes sin precio o sin símbolo no llegan a los listeners
+    cache.stream.on_message(ticker("ETHUSDT", bid1Price="9"))
+    cache.stream.on_message({'topic': "tickers.BTCUSDT", 'data': []})
+
+    assert seen == [Decimal("100"), Decimal("100")]
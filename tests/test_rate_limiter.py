@@ -0,0 +1,102 @@
+"""
+Limitador de peticiones: token buckets, cabeceras de límite de Bybit y 10006
+"""
+import threading
+import time
+
+from rate_limiter import RATE_LIMIT_CODE, RateLimitedSession, RequestScheduler, TokenBucket
+
+
+class RateLimitError(Exception):
+    status_code = RATE_LIMIT_CODE
+
+
+def test_empty_bucket_waits_for_the_refill():
+    bucket = TokenBucket(rate=10)
+    bucket.updated = now = 100.0
+    for _ in range(10):
+        assert bucket.wait_time(now) == 0
+        bucket.consume()
+
+    assert abs(bucket.wait_time(now) - 0.1) < 1e-9
+    assert bucket.wait_time(now + 0.1) < 1e-9
+
+
+def test_acquire_times_out_when_the_endpoint_is_exhausted():
+    scheduler = RequestScheduler(limits={'get_positions': 1})
+
+    assert scheduler.acquire("get_positions")
+    assert not scheduler.acquire("get_positions", timeout=0.05)
+
+
+def test_limit_headers_block_the_endpoint_until_the_reset():
+    scheduler = RequestScheduler()
+    reset_ms = int((time.time() + 0.2) * 1000)
+
+    scheduler.feedback("place_order", {
+        'X-Bapi-Limit': "10", 'X-Bapi-Limit-Status': "0", 'X-Bapi-Limit-Reset-Timestamp': str(reset_ms),
+    })
+
+    assert scheduler.would_wait("place_order")
+    assert not scheduler.would_wait("cancel_order")
+
+
+class FlakySession:
+    """Sesión mínima: responde 10006 (o lo lanza, como pybit) antes de responder 0"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def place_order(self, **kwargs):
+        return self._reply()
+
+    def get_positions(self, **kwargs):
+        return self._reply()
+
+    def _reply(self):
+        self.calls += 1
+        reply = self.replies.pop(0) if self.replies else {'retCode': 0, 'result': {'calls': self.calls}}
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_rate_limited_write_is_retried_once_after_blocking_the_endpoint():
+    session = RateLimitedSession(FlakySession(RateLimitError()))
+
+    response = session.place_order(symbol="AUSDT")
+
+    assert response['retCode'] == 0
+    assert session.session.calls == 2
+
+
+def test_persistent_rate_limit_is_returned_to_the_caller():
+    session = RateLimitedSession(FlakySession({'retCode': RATE_LIMIT_CODE}, {'retCode': RATE_LIMIT_CODE}))
+
+    assert session.place_order(symbol="AUSDT")['retCode'] == RATE_LIMIT_CODE
+
+
+def test_identical_concurrent_reads_share_one_request():
+    release = threading.Event()
+
+    class SlowSession(FlakySession):
+        def get_positions(self, **kwargs):
+            release.wait(1)
+            return super().get_positions(**kwargs)
+
+    session = RateLimitedSession(SlowSession())
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(session.get_positions(category="linear")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert session.session.calls == 1
+    assert results == [results[0]] * 4
@@ -0,0 +1,109 @@
+"""
+Re-cotización: histéresis de la deriva, permanencia mínima, presupuesto por símbolo y
+envío agrupado
+"""
+import threading
+
+from requote import Requoter
+
+# Ancla 100 y distancia 1%: la deriva es el movimiento en puntos porcentuales
+BRACKETS = {"BTCUSDT": (100.0, 0.01), "ETHUSDT": (100.0, 0.01)}
+
+
+def make_requoter(brackets=None, **options):
+    brackets = BRACKETS if brackets is None else brackets
+    amended = []
+    options = {'trigger': 0.5, 'release': 0.25, 'dwell': 2.0, **options}
+    requoter = Requoter(brackets.get, amended.append, **options)
+    return requoter, amended
+
+
+def test_requotes_after_the_drift_holds_for_the_dwell_time():
+    requoter, amended = make_requoter()
+    requoter.update("BTCUSDT", 100.4, 0.0)  # Bajo el trigger: no empieza
+    requoter.update("BTCUSDT", 100.6, 1.0)
+    requoter.update("BTCUSDT", 100.4, 2.0)  # Entre release y trigger: sigue pendiente
+    assert requoter.flush() == {}
+
+    requoter.update("BTCUSDT", 100.4, 3.0)
+    assert requoter.flush() == {"BTCUSDT": 100.4}
+    assert amended == [{"BTCUSDT": 100.4}]
+    assert requoter.requotes == 1
+
+
+def test_falling_below_release_restarts_the_dwell():
+    requoter, _ = make_requoter()
+    requoter.update("BTCUSDT", 100.6, 0.0)
+    requoter.update("BTCUSDT", 100.1, 1.0)
+    requoter.update("BTCUSDT", 100.6, 2.5)
+    requoter.update("BTCUSDT", 100.6, 4.0)
+    assert requoter.flush() == {}
+
+    requoter.update("BTCUSDT", 99.3, 4.5)
+    assert requoter.flush() == {"BTCUSDT": 99.3}
+
+
+def test_budget_limits_requotes_per_symbol():
+    requoter, amended = make_requoter(dwell=0, budget=1, budget_window=60, burst=2)
+    for now in (0.0, 1.0, 2.0):
+        requoter.update("BTCUSDT", 101.0, now)
+        requoter.flush()
+    assert len(amended) == 2
+    assert requoter.budget_denied == 1
+
+    # Otro símbolo tiene su propio presupuesto
+    requoter.update("ETHUSDT", 101.0, 2.0)
+    assert requoter.flush() == {"ETHUSDT": 101.0}
+
+    requoter.update("BTCUSDT", 101.0, 62.0)
+    assert requoter.flush() == {"BTCUSDT": 101.0}
+
+
+def test_symbols_without_bracket_are_forgotten_and_reset_clears_everything():
+    brackets = dict(BRACKETS)
+    requoter, _ = make_requoter(brackets)
+    requoter.update("BTCUSDT", 100.6, 0.0)
+    assert dict((name, value) for name, _, value in requoter.metric_samples())['requote_pending'] == 1
+
+    del brackets["BTCUSDT"]
+    requoter.update("BTCUSDT", 100.6, 1.0)
+    brackets["BTCUSDT"] = BRACKETS["BTCUSDT"]
+    requoter.update("BTCUSDT", 100.6, 2.5)  # Pendiente de nuevo desde 2.5
+    assert requoter.flush() == {}
+
+    requoter.update("ETHUSDT", 100.6, 0.0)
+    requoter.reset()
+    requoter.update("ETHUSDT", 100.6, 3.0)
+    assert requoter.flush() == {}
+    assert dict((name, value) for name, _, value in requoter.metric_samples()) == {
+        'requotes': 0, 'requote_budget_denied': 0, 'requote_pending': 1,
+    }
+
+
+def test_failed_amend_is_not_counted():
+    def amend(targets):
+        raise RuntimeError("sin conexión")
+
+    requoter = Requoter(BRACKETS.get, amend, dwell=0)
+    requoter.update("BTCUSDT", 101.0, 0.0)
+    assert requoter.flush() == {"BTCUSDT": 101.0}
+    assert requoter.requotes == 0
+
+
+def test_background_thread_batches_symbols_that_drift_together():
+    batches = []
+    done = threading.Event()
+
+    def amend(targets):
+        batches.append(dict(targets))
+        done.set()
+
+    requoter = Requoter(BRACKETS.get, amend, dwell=0, batch_interval=0.05)
+    requoter.start()
+    try:
+        requoter.update("BTCUSDT", 101.0, 0.0)
+        requoter.update("ETHUSDT", 99.0, 0.0)
+        assert done.wait(2)
+    finally:
+        requoter.stop()
+    assert batches == [{"BTCUSDT": 101.0, "ETHUSDT": 99.0}]
@@ -0,0 +1,138 @@
+"""
+Precios en memoria compartida: ranuras con seqlock, lector compatible con PriceCache y
+reparto de símbolos del supervisor
+"""
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from price_feed import PriceSnapshot
+from shared_prices import SEQ, SharedPriceBoard, SharedPriceCache
+from supervisor import plan_workers
+
+
+def snapshot(symbol, last, bid=None, received_at=None):
+    return PriceSnapshot(
+        symbol=symbol,
+        last=Decimal(last),
+        bid=Decimal(bid) if bid is not None else None,
+        ask=None,
+        mark=None,
+        received_at=time.monotonic() if received_at is None else received_at,
+        source="ws",
+    )
+
+
+class TickerSession:
+    def __init__(self, price):
+        self.price = price
+        self.calls = 0
+
+    def get_tickers(self, category, symbol=None):
+        self.calls += 1
+        return {'retCode': 0, 'result': {'list': [{'symbol': symbol, 'lastPrice': self.price}]}}
+
+
+@pytest.fixture
+def board():
+    board = SharedPriceBoard.create(["BTCUSDT", "LINKUSDT"])
+    yield board
+    board.close()
+
+
+def test_attached_board_reads_what_the_writer_wrote(board):
+    reader = SharedPriceBoard.attach(board.name, board.symbols)
+    try:
+        assert reader.read("LINKUSDT") is None
+        assert reader.sequence("LINKUSDT") == 0
+
+        board.write(snapshot("LINKUSDT", "15.234", bid="15.233"))
+        board.write(snapshot("DOGEUSDT", "0.1"))  # Sin ranura: se ignora
+        read = reader.read("LINKUSDT")
+        assert (read.last, read.bid, read.ask, read.source) == (Decimal("15.234"), Decimal("15.233"), None, "shm")
+        assert reader.sequence("LINKUSDT") == 2
+        assert reader.read("BTCUSDT") is None
+        assert reader.read("DOGEUSDT") is None
+    finally:
+        reader.close()
+
+
+def test_read_gives_up_while_a_write_is_in_progress(board):
+    board.write(snapshot("BTCUSDT", "100"))
+    offset = board.index["BTCUSDT"]
+    SEQ.pack_into(board.shm.buf, offset, 3)  # Escritor a medias (secuencia impar)
+    assert board.read("BTCUSDT", retries=5) is None
+
+    SEQ.pack_into(board.shm.buf, offset, 4)
+    assert board.read("BTCUSDT").last == Decimal("100")
+
+
+def test_concurrent_reads_never_mix_two_writes(board):
+    stop = threading.Event()
+    torn = []
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            board.write(snapshot("BTCUSDT", str(i), bid=str(i)))
+
+    def reader():
+        while not stop.is_set():
+            read = board.read("BTCUSDT")
+            if read is not None and read.last != read.bid:
+                torn.append(read)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert torn == []
+    assert board.read("BTCUSDT").last == board.read("BTCUSDT").bid
+
+
+def test_cache_falls_back_to_rest_and_prefers_the_newest_snapshot(board):
+    session = TickerSession("101")
+    cache = SharedPriceCache(board, session, max_age=2.0)
+
+    board.write(snapshot("BTCUSDT", "100", received_at=time.monotonic() - 10))
+    assert cache.peek("BTCUSDT").last == Decimal("100")
+    fresh = cache.get("BTCUSDT")
+    assert (fresh.last, fresh.source) == (Decimal("101"), "rest")
+    assert (session.calls, cache.rest_fallbacks) == (1, 1)
+    assert cache.get("BTCUSDT") is fresh
+
+    board.write(snapshot("BTCUSDT", "102"))
+    assert cache.get("BTCUSDT").source == "shm"
+    assert session.calls == 1
+
+
+def test_cache_listeners_receive_changed_slots(board):
+    cache = SharedPriceCache(board, TickerSession("1"), poll_interval=0.01)
+    seen = []
+    received = threading.Event()
+
+    def listener(snapshot):
+        seen.append((snapshot.symbol, snapshot.last))
+        received.set()
+
+    cache.add_listener(listener)
+    cache.start()
+    try:
+        board.write(snapshot("LINKUSDT", "15"))
+        assert received.wait(2)
+        time.sleep(0.05)
+        assert seen == [("LINKUSDT", Decimal("15"))]
+    finally:
+        cache.stop()
+
+
+def test_plan_workers_alternates_accounts_and_skips_empty_shards():
+    accounts = [{'name': "a"}, {'name': "b"}]
+    workers = plan_workers(["S1", "S2", "S3"], accounts, per_account=2)
+    assert [(w['name'], w['symbols']) for w in workers] == [("a-0", ["S1"]), ("b-0", ["S2"]), ("a-1", ["S3"])]
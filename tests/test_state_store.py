@@ -0,0 +1,65 @@
+"""
+Almacén de estado: journal WAL, último estado por símbolo, reconstrucción y compactación
+"""
+import sqlite3
+
+from state_store import StateStore
+
+
+def bracket(long_id, short_id):
+    return {'long_order_id': long_id, 'short_order_id': short_id, 'state': 'ARMED', 'state_since': 123.4}
+
+
+def test_load_returns_the_last_state_per_symbol_without_volatile_fields(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store.record("BTCUSDT", "armed", bracket("1", "2"), "distance_1")
+    store.record("ETHUSDT", "armed", bracket("3", "4"), "distance_1")
+    store.record("BTCUSDT", "position_closed", None, "distance_2")
+
+    active_orders, cycle_control = store.load()
+    assert active_orders == {"ETHUSDT": {'long_order_id': "3", 'short_order_id': "4", 'state': 'ARMED'}}
+    assert cycle_control == {"BTCUSDT": "distance_2", "ETHUSDT": "distance_1"}
+    assert [row[3] for row in store.events("BTCUSDT")] == ["position_closed", "armed"]
+    store.close()
+
+    # Tras reiniciar el proceso el estado sigue ahí
+    reopened = StateStore(str(tmp_path / "state.db"))
+    assert reopened.load() == (active_orders, cycle_control)
+    reopened.close()
+
+
+def test_rebuild_from_journal_replays_the_last_transition_of_each_symbol(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = StateStore(path)
+    store.record("BTCUSDT", "armed", bracket("1", "2"), "distance_1")
+    store.record("BTCUSDT", "position_opened", bracket("1", "2"), "distance_1")
+    store.record("ETHUSDT", "armed", bracket("3", "4"), "distance_2")
+    expected = store.load()
+
+    other = sqlite3.connect(path)
+    other.execute("DELETE FROM state")
+    other.commit()
+    other.close()
+    assert store.load() == ({}, {})
+
+    store.rebuild_from_journal()
+    assert store.load() == expected
+    store.close()
+
+
+def test_compact_keeps_recent_rows_and_the_last_one_per_symbol(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store.record("ETHUSDT", "armed", bracket("0", "0"), "distance_1")
+    for i in range(10):
+        store.record("BTCUSDT", "armed", bracket(str(i), str(i)), "distance_1")
+    expected = store.load()
+
+    deleted = store.compact(keep=3)
+    assert deleted == 7
+    events = store.events(limit=100)
+    assert [row[2] for row in events] == ["BTCUSDT"] * 3 + ["ETHUSDT"]
+
+    # El journal compactado sigue bastando para reconstruir el estado
+    store.rebuild_from_journal()
+    assert store.load() == expected
+    store.close()
@@ -0,0 +1,25 @@
+"""
+Cotización del bracket: redondeo hacia abajo al tick y al qty step del instrumento
+"""
+from decimal import Decimal
+
+from instruments import InstrumentSpec
+from strategy import quote_bracket
+
+SPEC = InstrumentSpec("LINKUSDT", Decimal("0.001"), Decimal("0.1"), Decimal("0.1"), Decimal("10000"))
+
+
+def test_quote_bracket_rounds_every_leg_down_to_the_instrument():
+    quote = quote_bracket(SPEC, Decimal("15"), Decimal("0.01"), Decimal("0.01"), Decimal("0.02"), Decimal(20))
+
+    assert quote.quantity == "1.3"
+    assert (quote.long_entry, quote.long_stop, quote.long_take_profit) == ("14.850", "14.701", "15.147")
+    assert (quote.short_entry, quote.short_stop, quote.short_take_profit) == ("15.150", "15.301", "14.847")
+    assert quote.qty_in_limits
+
+
+def test_quote_bracket_flags_quantities_below_the_minimum():
+    quote = quote_bracket(SPEC, Decimal("500"), Decimal("0.01"), Decimal("0.01"), Decimal("0.02"), Decimal(20))
+
+    assert quote.quantity == "0.0"
+    assert not quote.qty_in_limits
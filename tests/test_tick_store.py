@@ -0,0 +1,103 @@
+"""
+Almacén local por símbolo y día: bloques por descarga, lectura por rango, compactación
+y reanudación de descargas desde el checkpoint
+"""
+import time
+
+import numpy as np
+
+from downloader import Downloader
+from tick_store import COLD_FILE, DAY_MS, TickStore
+
+DAY = 1_700_006_400_000  # 2023-11-15 00:00 UTC
+
+
+def trades(ts, price=10.0):
+    ts = np.asarray(ts, dtype=np.int64)
+    return {
+        'ts': ts,
+        'price': np.full(ts.shape, price) + np.arange(ts.size),
+        'size': np.ones(ts.shape),
+        'side': np.ones(ts.shape, dtype=np.int8),
+    }
+
+
+def test_append_rolls_over_to_a_new_chunk_per_day_and_is_idempotent(tmp_path):
+    store = TickStore(str(tmp_path))
+    rows = trades([DAY + DAY_MS + 5, DAY + 1, DAY + DAY_MS - 1])  # Desordenadas, dos días
+    assert store.append('trades', "BTCUSDT", rows) == 3
+    assert store.days('trades', "BTCUSDT") == ["2023-11-15", "2023-11-16"]
+    assert store.append('trades', "BTCUSDT", rows) == 0
+
+    assert store.append('trades', "BTCUSDT", trades([DAY + 10, DAY + 20])) == 2
+    day_dir = tmp_path / "trades" / "BTCUSDT" / "2023-11-15"
+    assert sorted(p.name for p in day_dir.iterdir()) == [
+        f"{DAY + 1:013d}-{DAY + DAY_MS - 1:013d}", f"{DAY + 10:013d}-{DAY + 20:013d}",
+    ]
+    assert store.last_ts('trades', "BTCUSDT") == DAY + DAY_MS + 5
+
+
+def test_iter_range_maps_hot_chunks_and_filters_by_time(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append('trades', "BTCUSDT", trades([DAY + 1, DAY + 2, DAY + 3]))
+    store.append('trades', "BTCUSDT", trades([DAY + DAY_MS, DAY + DAY_MS + 1]))
+
+    parts = list(store.iter_range('trades', "BTCUSDT", DAY + 2, DAY + DAY_MS + 1, ['price']))
+    assert all(isinstance(part['price'], np.memmap) for part in parts)
+    assert [part['ts'].tolist() for part in parts] == [[DAY + 2, DAY + 3], [DAY + DAY_MS]]
+
+    loaded = store.load('trades', "BTCUSDT", start_ms=DAY + 3)
+    assert loaded['ts'].tolist() == [DAY + 3, DAY + DAY_MS, DAY + DAY_MS + 1]
+    assert set(loaded) == {'ts', 'price', 'size', 'side'}
+    assert store.load('trades', "ETHUSDT")['ts'].size == 0
+
+
+def test_compact_merges_closed_days_without_changing_reads(tmp_path):
+    store = TickStore(str(tmp_path))
+    store.append('trades', "BTCUSDT", trades([DAY + 30, DAY + 40]))
+    store.append('trades', "BTCUSDT", trades([DAY + 10, DAY + 20], price=20.0))
+    store.append('trades', "BTCUSDT", trades([DAY + DAY_MS + 1]))
+    before = store.load('trades', "BTCUSDT")
+
+    assert store.compact('trades', "BTCUSDT", before_day="2023-11-16") == 1
+    day_dir = tmp_path / "trades" / "BTCUSDT" / "2023-11-15"
+    assert [p.name for p in day_dir.iterdir()] == [COLD_FILE]
+    assert len(list((tmp_path / "trades" / "BTCUSDT" / "2023-11-16").iterdir())) == 1
+
+    after = store.load('trades', "BTCUSDT")
+    assert after['ts'].tolist() == [DAY + 10, DAY + 20, DAY + 30, DAY + 40, DAY + DAY_MS + 1]
+    assert sorted(after['price'].tolist()) == sorted(before['price'].tolist())
+    # Un día compactado no acepta bloques nuevos ni se vuelve a compactar
+    assert store.append('trades', "BTCUSDT", trades([DAY + 50])) == 0
+    assert store.compact('trades', "BTCUSDT", before_day="2023-11-16") == 0
+
+
+class KlineSession:
+    """Devuelve velas de una hora para el rango pedido (más nueva primero, como Bybit)"""
+
+    def __init__(self):
+        self.starts = []
+
+    def get_kline(self, category, symbol, interval, start, end, limit):
+        self.starts.append(start)
+        step = 3_600_000
+        rows = [[str(ts), "1", "2", "0.5", "1.5", "10", "15"] for ts in range(start, end + 1, step)]
+        return {'retCode': 0, 'result': {'list': rows[::-1]}}
+
+
+def test_download_resumes_from_the_checkpoint(tmp_path):
+    now = int(time.time() * 1000)
+    start_ms = now - 5 * 3_600_000
+    store = TickStore(str(tmp_path))
+    session = KlineSession()
+
+    written = Downloader(store, session, ["BTCUSDT"], start_ms, interval="60").download_klines("BTCUSDT")
+    assert written >= 4
+    checkpoint = Downloader(store, session, ["BTCUSDT"], start_ms, interval="60").checkpoints["klines/60/BTCUSDT"]
+    assert checkpoint > store.last_ts('klines', "BTCUSDT")
+
+    session.starts.clear()
+    Downloader(store, session, ["BTCUSDT"], start_ms, interval="60").download_klines("BTCUSDT")
+    assert all(start >= checkpoint for start in session.starts)
+    ts = store.load('klines', "BTCUSDT")['ts']
+    assert ts.size == np.unique(ts).size
@@ -0,0 +1,48 @@
+"""
+Etiquetado por ciclo del libro de operaciones cuando Bybit publica el PnL cerrado con
+demora: el cierre se atribuye al bracket que lo generó, no al armado después.
+"""
+import time
+
+import bybit_bot as bot
+from trade_ledger import TradeLedger
+
+SYMBOL = "SIMUSDT"
+
+
+class DelayedClosedPnl:
+    """Sesión mínima: closed-pnl devuelve solo los cierres ya publicados"""
+
+    def __init__(self):
+        self.published = []
+
+    def get_closed_pnl(self, **kwargs):
+        return {'retCode': 0, 'result': {'list': list(self.published), 'nextPageCursor': ""}}
+
+    def get_executions(self, **kwargs):
+        return {'retCode': 0, 'result': {'list': [], 'nextPageCursor': ""}}
+
+
+def closed_pnl(order_id, created_ms, pnl):
+    return {
+        'symbol': SYMBOL, 'orderId': order_id, 'side': "Sell", 'qty': "1", 'avgEntryPrice': "10",
+        'avgExitPrice': "10.2", 'closedPnl': pnl, 'createdTime': str(created_ms),
+    }
+
+
+def test_late_closed_pnl_keeps_the_cycle_of_its_bracket(tmp_path, isolated_bot):
+    bot.active_orders[SYMBOL] = {'cycle': "1%"}
+    session = DelayedClosedPnl()
+    ledger = TradeLedger(session, str(tmp_path), cycle_for=bot.ledger_cycle)
+
+    # Se cierra el bracket del 1% y la sincronización inmediata todavía no ve el cierre
+    closed_ms = int(time.time() * 1000) - 200
+    bot.remember_closed_cycle(SYMBOL)
+    assert ledger.sync() == []
+
+    # Rearmado con el ciclo siguiente; el cierre aparece en la sincronización posterior
+    bot.active_orders[SYMBOL] = {'cycle': "2.5%"}
+    session.published.append(closed_pnl("a", closed_ms, "1.5"))
+    assert [row['cycle'] for row in ledger.sync()] == ["1%"]
+    assert ledger.cycle_stats("1%").trades == 1
+    assert ledger.cycle_stats("2.5%").trades == 0
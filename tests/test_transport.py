@@ -0,0 +1,78 @@
+"""
+RetryingSession: recuperación por orderLinkId (110072) y cancels reintentados (110001)
+"""
+from pybit.exceptions import InvalidRequestError
+from pybit.unified_trading import HTTP
+
+from rate_limiter import RATE_LIMIT_CODE
+from transport import DUPLICATE_ORDER_LINK_ID, ORDER_NOT_EXISTS, RetryingSession, configure_http
+
+
+def rejected(code):
+    return InvalidRequestError(request="test", message="rejected", status_code=code, time="00:00:00", resp_headers={})
+
+
+class FlakySession:
+    """Sesión mínima: cada método responde (o lanza) lo que tenga en su cola"""
+
+    def __init__(self, **replies):
+        self.replies = replies
+        self.orders = []
+
+    def _reply(self, name):
+        reply = self.replies[name].pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def place_order(self, **kwargs):
+        return self._reply("place_order")
+
+    def cancel_order(self, **kwargs):
+        return self._reply("cancel_order")
+
+    def get_open_orders(self, **kwargs):
+        return {'retCode': 0, 'result': {'list': self.orders}}
+
+    def get_order_history(self, **kwargs):
+        return {'retCode': 0, 'result': {'list': []}}
+
+
+def test_duplicate_order_link_id_on_first_attempt_returns_the_existing_order():
+    session = FlakySession(place_order=[rejected(DUPLICATE_ORDER_LINK_ID)])
+    session.orders.append({'orderId': "1", 'orderLinkId': "L-1"})
+    retrying = RetryingSession(session, base_delay=0)
+
+    response = retrying.place_order(category="linear", symbol="SIMUSDT", side="Buy", orderLinkId="L-1")
+
+    assert response['retCode'] == 0
+    assert response['result'] == {'orderId': "1", 'orderLinkId': "L-1"}
+    assert retrying.recovered == 1
+
+
+def test_retried_cancel_of_a_missing_order_counts_as_cancelled():
+    session = FlakySession(cancel_order=[ConnectionError("reset"), rejected(ORDER_NOT_EXISTS)])
+    retrying = RetryingSession(session, base_delay=0)
+
+    response = retrying.cancel_order(category="linear", symbol="SIMUSDT", orderId="1")
+
+    assert response['retCode'] == 0
+    assert retrying.already_cancelled == 1
+
+
+def test_first_cancel_of_a_missing_order_still_fails():
+    session = FlakySession(cancel_order=[rejected(ORDER_NOT_EXISTS)])
+    retrying = RetryingSession(session, base_delay=0)
+
+    try:
+        retrying.cancel_order(category="linear", symbol="SIMUSDT", orderId="1")
+    except InvalidRequestError as e:
+        assert e.status_code == ORDER_NOT_EXISTS
+    else:
+        raise AssertionError("110001 en el primer intento no es un cancel exitoso")
+
+
+def test_rate_limit_is_retried_by_the_rate_limiter_only():
+    http = configure_http(HTTP(testnet=True))
+    assert RATE_LIMIT_CODE not in http.retry_codes
+    assert 10002 in http.retry_codes
@@ -0,0 +1,82 @@
+"""
+Volatilidad en streaming (EWMA y ATR) y política de distancia basada en ella
+"""
+import math
+from decimal import Decimal
+
+import pytest
+
+from price_feed import PriceSnapshot
+from strategy import StrategyParams
+from volatility import AtrEstimator, EwmaVolatility, FixedCyclePolicy, VolatilityPolicy, VolatilityTracker
+
+PARAMS = StrategyParams(Decimal("20"), Decimal("0.0075"), Decimal("0.025"), Decimal("0.01"), Decimal("0.02"))
+
+
+def test_ewma_decays_with_elapsed_time_and_ignores_bad_ticks():
+    ewma = EwmaVolatility(halflife=1.0)
+    ewma.update(100.0, 0.0)
+    ewma.update(0.0, 0.5)  # Precio inválido
+    ewma.update(101.0, 1.0)
+    r = math.log(1.01)
+    # Un segundo con vida media de un segundo: alpha = 0.5
+    assert ewma.variance == pytest.approx(0.5 * r * r)
+    assert ewma.sigma(4) == pytest.approx(math.sqrt(2 * r * r))
+
+    ewma.update(102.0, 1.0)  # Mismo instante: se ignora
+    assert ewma.samples == 1
+
+    # Retornos constantes: la varianza converge a r^2 / dt
+    for i in range(2, 60):
+        ewma.update(100.0 * 1.01 ** i, float(i))
+    assert ewma.variance == pytest.approx(r * r, rel=1e-9)
+
+
+def test_atr_builds_bars_from_ticks_and_uses_wilder_smoothing():
+    atr = AtrEstimator(bar_seconds=60, period=3)
+    for price, ts in [(100, 0), (102, 30), (99, 59)]:
+        atr.update(price, ts)
+    assert atr.bars == 0
+
+    atr.update(101, 60)  # Cierra la vela 1: H 102, L 99 -> TR 3
+    assert (atr.bars, atr.atr) == (1, 3)
+    atr.update(104, 90)
+    atr.update(100, 120)  # Vela 2: H 104, L 101, cierre anterior 99 -> TR 5
+    assert atr.atr == pytest.approx(4)
+    assert atr.relative() == pytest.approx(4 / 104)
+
+    atr.update(100, 400)  # Vela 3 (H = L = 100, cierre anterior 104 -> TR 4) y salto de velas vacías
+    assert atr.bars == 3
+    assert atr.atr == pytest.approx(4)
+    atr.update(100, 419)
+    assert atr.bars == 3  # 400 - 360 < 60: sigue la vela que empezó en 360
+
+
+def test_policy_uses_the_fixed_distance_until_the_estimator_is_ready():
+    tracker = VolatilityTracker(halflife=60)
+    policy = VolatilityPolicy(tracker, {'distance_1': 2, 'distance_2': 5}, horizon=3600, min_samples=10)
+    assert policy.distance("LINKUSDT", 'distance_1', PARAMS) == FixedCyclePolicy().distance("LINKUSDT", 'distance_1', PARAMS)
+
+    for i in range(5):
+        tracker.on_price(PriceSnapshot("LINKUSDT", Decimal("15") + i % 2, None, None, None, float(i), "ws"))
+    assert policy.volatility("LINKUSDT") is None
+    assert policy.distance("LINKUSDT", 'distance_2', PARAMS) == PARAMS.distance_2
+
+
+def test_policy_scales_quantizes_and_bounds_the_distance():
+    tracker = VolatilityTracker(halflife=600)
+    for i in range(200):
+        tracker.update("LINKUSDT", 15 * (1.0005 if i % 2 else 1), float(i))
+    policy = VolatilityPolicy(
+        tracker, {'distance_1': 2, 'distance_2': 100}, horizon=60,
+        min_distance=Decimal("0.002"), max_distance=Decimal("0.05"), min_samples=50,
+    )
+    sigma = tracker.get("LINKUSDT").ewma.sigma(60)
+    assert policy.volatility("LINKUSDT") == pytest.approx(sigma)
+
+    # 2 x sigma (~0.00351) redondeado a 0.01%
+    assert policy.distance("LINKUSDT", 'distance_1', PARAMS) == Decimal("0.0035")
+    assert policy.distance("LINKUSDT", 'distance_2', PARAMS) == Decimal("0.05")
+
+    tight = VolatilityPolicy(tracker, {'distance_1': 0.01}, horizon=60, min_samples=50)
+    assert tight.distance("LINKUSDT", 'distance_1', PARAMS) == Decimal("0.002")
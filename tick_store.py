@@ -0,0 +1,246 @@
+"""
+Almacén local de datos de mercado por columnas, particionado por símbolo y día.
+
+Estructura:
+    {root}/{tipo}/{SÍMBOLO}/{AAAA-MM-DD}/{ts_inicial}-{ts_final}/{columna}.npy   (día caliente)
+    {root}/{tipo}/{SÍMBOLO}/{AAAA-MM-DD}/day.npz                                  (día frío)
+
+Cada descarga se guarda como un bloque (un .npy por columna, ordenado por tiempo). Los
+bloques se leen con np.load(mmap_mode="r"): el lector entrega vistas del archivo
+mapeado, sin copiarlo a memoria. compact() une los bloques de los días cerrados en un
+solo .npz comprimido; esos días se descomprimen al leerlos.
+
+Tipos:
+    klines: ts (inicio de la vela, ms), open, high, low, close, volume, turnover
+    trades: ts (ms), price, size, side (+1 compra, -1 venta)
+
+warm_start() precarga la volatilidad y el último precio del bot desde el almacén, sin
+REST, para no arrancar con los estimadores vacíos.
+"""
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+DAY_MS = 24 * 3600 * 1000
+
+SCHEMAS = {
+    'klines': {
+        'ts': np.int64, 'open': np.float64, 'high': np.float64, 'low': np.float64,
+        'close': np.float64, 'volume': np.float64, 'turnover': np.float64,
+    },
+    'trades': {'ts': np.int64, 'price': np.float64, 'size': np.float64, 'side': np.int8},
+}
+COLD_FILE = "day.npz"
+
+
+def day_name(ts_ms):
+    return datetime.fromtimestamp(ts_ms // 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def day_start_ms(name):
+    return int(datetime.strptime(name, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class TickStore:
+    """
+    Args:
+        root: directorio del almacén
+    """
+
+    def __init__(self, root="market_data"):
+        self.root = root
+
+    # ---------- rutas ----------
+    def symbol_dir(self, kind, symbol):
+        return os.path.join(self.root, kind, symbol)
+
+    def symbols(self, kind):
+        directory = os.path.join(self.root, kind)
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def days(self, kind, symbol):
+        directory = self.symbol_dir(kind, symbol)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(d for d in os.listdir(directory) if not d.startswith("."))
+
+    def _chunks(self, day_dir):
+        return sorted(c for c in os.listdir(day_dir) if not c.startswith(".") and c != COLD_FILE)
+
+    # ---------- escritura ----------
+    def append(self, kind, symbol, columns: Dict[str, np.ndarray]):
+        """
+        Guarda filas nuevas (dict de columnas del esquema del tipo) como un bloque por día
+
+        Es idempotente: un bloque con el mismo rango de tiempo no se vuelve a escribir,
+        así reanudar una descarga interrumpida no duplica filas.
+
+        Returns:
+            Filas escritas
+        """
+        schema = SCHEMAS[kind]
+        data = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in schema.items()}
+        ts = data['ts']
+        if not ts.size:
+            return 0
+        order = np.argsort(ts, kind="stable")
+        data = {name: values[order] for name, values in data.items()}
+        ts = data['ts']
+
+        written = 0
+        days = ts // DAY_MS
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for start, end in zip(np.r_[0, bounds], np.r_[bounds, ts.size]):
+            day_dir = os.path.join(self.symbol_dir(kind, symbol), day_name(int(ts[start])))
+            final = os.path.join(day_dir, f"{int(ts[start]):013d}-{int(ts[end - 1]):013d}")
+            if os.path.exists(final) or os.path.exists(os.path.join(day_dir, COLD_FILE)):
+                continue
+            tmp = os.path.join(day_dir, f".tmp-{os.getpid()}-{time.monotonic_ns()}")
+            os.makedirs(tmp)
+            for name, values in data.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), values[start:end])
+            os.rename(tmp, final)
+            written += int(end - start)
+        return written
+
+    def compact(self, kind, symbol, before_day=None):
+        """
+        Une los bloques de cada día anterior a `before_day` (por defecto, hoy UTC) en
+        un .npz comprimido
+
+        Returns:
+            Días compactados
+        """
+        before_day = before_day or day_name(int(time.time() * 1000))
+        compacted = 0
+        for day in self.days(kind, symbol):
+            day_dir = os.path.join(self.symbol_dir(kind, symbol), day)
+            chunks = self._chunks(day_dir)
+            if day >= before_day or not chunks or os.path.exists(os.path.join(day_dir, COLD_FILE)):
+                continue
+            parts = [self._open_chunk(os.path.join(day_dir, c), None) for c in chunks]
+            merged = {name: np.concatenate([p[name] for p in parts]) for name in SCHEMAS[kind]}
+            order = np.argsort(merged['ts'], kind="stable")
+            tmp = os.path.join(day_dir, ".day.tmp.npz")
+            np.savez_compressed(tmp, **{name: values[order] for name, values in merged.items()})
+            del parts, merged
+            os.replace(tmp, os.path.join(day_dir, COLD_FILE))
+            for chunk in chunks:
+                shutil.rmtree(os.path.join(day_dir, chunk), ignore_errors=True)
+            compacted += 1
+        return compacted
+
+    # ---------- lectura ----------
+    def _open_chunk(self, path, columns):
+        names = columns or _chunk_columns(path)
+        return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}
+
+    def iter_range(self, kind, symbol, start_ms=None, end_ms=None, columns=None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Bloques de filas con start_ms <= ts < end_ms, en orden de tiempo
+
+        Los días calientes se entregan como vistas de archivos mapeados (sin copia); los
+        compactados, descomprimidos en memoria.
+        """
+        names = list(columns or SCHEMAS[kind])
+        if 'ts' not in names:
+            names.insert(0, 'ts')
+        first_day = day_name(start_ms) if start_ms is not None else None
+        last_day = day_name(end_ms - 1) if end_ms is not None else None
+        for day in self.days(kind, symbol):
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            day_dir = os.path.join(self.symbol_dir(kind, symbol), day)
+            cold = os.path.join(day_dir, COLD_FILE)
+            if os.path.exists(cold):
+                with np.load(cold) as archive:
+                    parts = [{name: archive[name] for name in names}]
+            else:
+                parts = [self._open_chunk(os.path.join(day_dir, c), names) for c in self._chunks(day_dir)]
+            for part in parts:
+                ts = part['ts']
+                lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+                hi = ts.shape[0] if end_ms is None else int(np.searchsorted(ts, end_ms, side="left"))
+                if lo < hi:
+                    yield {name: values[lo:hi] for name, values in part.items()}
+
+    def load(self, kind, symbol, start_ms=None, end_ms=None, columns=None) -> Dict[str, np.ndarray]:
+        """Todas las filas del rango concatenadas (una copia)"""
+        names = list(columns or SCHEMAS[kind])
+        parts = list(self.iter_range(kind, symbol, start_ms, end_ms, names))
+        if not parts:
+            return {name: np.empty(0, dtype=SCHEMAS[kind][name]) for name in set(names) | {'ts'}}
+        return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+    def last_ts(self, kind, symbol) -> Optional[int]:
+        """Marca de tiempo más reciente guardada (o None)"""
+        for day in reversed(self.days(kind, symbol)):
+            last = None
+            for part in self.iter_range(kind, symbol, day_start_ms(day), day_start_ms(day) + DAY_MS, ['ts']):
+                if part['ts'].size:
+                    last = int(part['ts'][-1]) if last is None else max(last, int(part['ts'][-1]))
+            if last is not None:
+                return last
+        return None
+
+
+def _chunk_columns(path):
+    """Columnas guardadas en un bloque"""
+    return [name[:-4] for name in sorted(os.listdir(path)) if name.endswith(".npy")]
+
+
+# ==================== ARRANQUE EN CALIENTE ====================
+def price_history(store, symbol, start_ms, end_ms=None):
+    """
+    Serie (ts en ms, precio) del símbolo: klines expandidas a 4 precios por vela si las
+    hay, trades si no
+    """
+    klines = store.load('klines', symbol, start_ms, end_ms, ['ts', 'open', 'high', 'low', 'close'])
+    if klines['ts'].size:
+        from backtester import expand_klines
+
+        return expand_klines(klines['ts'], klines['open'], klines['high'], klines['low'], klines['close'])
+    trades = store.load('trades', symbol, start_ms, end_ms, ['ts', 'price'])
+    return trades['ts'], trades['price']
+
+
+def warm_start(store, symbols, tracker=None, price_cache=None, hours=6):
+    """
+    Alimenta `tracker` (volatility.VolatilityTracker) con las últimas `hours` horas de
+    cada símbolo y deja en `price_cache` su último precio guardado (viejo, así que el
+    bot igual pide uno actual antes de ordenar)
+
+    Returns:
+        Símbolos precargados
+    """
+    from price_feed import PriceSnapshot
+
+    now_ms = int(time.time() * 1000)
+    # Los ticks en vivo usan time.monotonic(): se trasladan las marcas históricas a ese reloj
+    offset = time.monotonic() - time.time()
+    warmed = []
+    for symbol in symbols:
+        ts, prices = price_history(store, symbol, now_ms - int(hours * 3600 * 1000))
+        if not ts.size:
+            continue
+        if tracker is not None:
+            update = tracker.update
+            for t, price in zip((ts / 1000.0 + offset).tolist(), prices.tolist()):
+                update(symbol, price, t)
+        if price_cache is not None:
+            price_cache.seed(PriceSnapshot(
+                symbol=symbol,
+                last=Decimal(repr(float(prices[-1]))),
+                bid=None,
+                ask=None,
+                mark=None,
+                received_at=float(ts[-1]) / 1000 + offset,
+                source="store",
+            ))
+        warmed.append(symbol)
+    return warmed
@@ -0,0 +1,252 @@
+"""
+Libro de operaciones: PnL cerrado y ejecuciones leídos de forma incremental.
+
+sync() pide a /v5/position/closed-pnl y /v5/execution/list solo lo nuevo desde la
+última marca de agua (ventanas de 7 días, que es el máximo de Bybit, y paginación por
+cursor), descarta lo ya visto y guarda cada lote como un archivo de columnas
+(Parquet si pyarrow está instalado, JSON por columnas si no). Ningún cierre se pierde
+aunque varios lleguen en la misma ventana.
+
+Con cada registro nuevo se actualizan en O(1) los agregados por símbolo y por ciclo
+(trades, aciertos, PnL y comisiones), que se guardan junto a las marcas de agua para
+no releer el historial al reiniciar. Telegram y /metrics leen de esos agregados.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+from account_snapshot import fetch_all
+
+WINDOW_MS = 7 * 24 * 3600 * 1000  # Rango máximo por petición de closed-pnl y executions
+INITIAL_LOOKBACK_MS = WINDOW_MS  # Historial que se lee la primera vez
+
+CLOSED_PNL_COLUMNS = (
+    'symbol', 'orderId', 'side', 'qty', 'avgEntryPrice', 'avgExitPrice', 'closedPnl', 'createdTime', 'cycle',
+)
+EXECUTION_COLUMNS = (
+    'execId', 'symbol', 'orderId', 'side', 'execPrice', 'execQty', 'execFee', 'execTime', 'isMaker', 'cycle',
+)
+
+
+@dataclass
+class Aggregate:
+    """Totales acumulados de un grupo de operaciones"""
+    trades: int = 0
+    wins: int = 0
+    pnl: float = 0.0
+    fees: float = 0.0
+
+    @property
+    def win_rate(self):
+        return self.wins / self.trades if self.trades else 0.0
+
+    def add_trade(self, pnl):
+        self.trades += 1
+        self.wins += pnl > 0
+        self.pnl += pnl
+
+
+# ==================== ALMACENAMIENTO POR COLUMNAS ====================
+def write_part(directory, rows, columns):
+    """Guarda un lote de filas como un archivo de columnas y devuelve su ruta"""
+    os.makedirs(directory, exist_ok=True)
+    data = {c: [row.get(c) for row in rows] for c in columns}
+    name = f"part-{int(time.time() * 1000)}-{len(os.listdir(directory)):06d}"
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = os.path.join(directory, name + ".parquet")
+        table = pa.table({c: [None if v is None else str(v) for v in values] for c, values in data.items()})
+        pq.write_table(table, path)
+    except ImportError:
+        path = os.path.join(directory, name + ".json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def read_parts(directory):
+    """Lee todos los lotes de un directorio como filas (dicts), en orden de escritura"""
+    if not os.path.isdir(directory):
+        return []
+    rows = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            data = pq.read_table(path).to_pydict()
+        elif name.endswith(".json"):
+            with open(path) as f:
+                data = json.load(f)
+        else:
+            continue
+        columns = list(data)
+        rows.extend(dict(zip(columns, values)) for values in zip(*data.values()))
+    return rows
+
+
+# ==================== LIBRO ====================
+class TradeLedger:
+    """
+    Args:
+        session: sesión HTTP de pybit
+        path: directorio del libro (closed_pnl/, executions/ y state.json)
+        cycle_for: función(symbol, ts) -> ciclo del bracket al que pertenece una operación
+            con marca de tiempo ts (ms del exchange), para etiquetarla
+        symbols: si se indica, solo se registran esos símbolos (varios procesos por cuenta)
+    """
+
+    def __init__(self, session, path="ledger", cycle_for=None, symbols=None, category="linear"):
+        self.session = session
+        self.path = path
+        self.cycle_for = cycle_for or (lambda symbol, ts: None)
+        self.symbols = set(symbols) if symbols else None
+        self.category = category
+        self.by_symbol: Dict[str, Aggregate] = {}
+        self.by_cycle: Dict[str, Aggregate] = {}
+        self.watermarks = {'closed_pnl': None, 'executions': None}
+        self._seen = {'closed_pnl': [], 'executions': []}  # Ids en la marca de agua (desempate)
+        self._lock = threading.Lock()
+        self._load_state()
+
+    # ---------- estado ----------
+    @property
+    def _state_path(self):
+        return os.path.join(self.path, "state.json")
+
+    def _load_state(self):
+        try:
+            with open(self._state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.watermarks = state['watermarks']
+        self._seen = state['seen']
+        self.by_symbol = {k: Aggregate(**v) for k, v in state['by_symbol'].items()}
+        self.by_cycle = {k: Aggregate(**v) for k, v in state['by_cycle'].items()}
+
+    def _save_state(self):
+        os.makedirs(self.path, exist_ok=True)
+        state = {
+            'watermarks': self.watermarks,
+            'seen': self._seen,
+            'by_symbol': {k: asdict(v) for k, v in self.by_symbol.items()},
+            'by_cycle': {k: asdict(v) for k, v in self.by_cycle.items()},
+        }
+        with open(self._state_path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(self._state_path + ".tmp", self._state_path)
+
+    # ---------- lectura incremental ----------
+    def _fetch_new(self, kind, call, time_field, id_field):
+        """Registros posteriores a la marca de agua, del más viejo al más nuevo"""
+        now = int(time.time() * 1000)
+        start = self.watermarks[kind] or now - INITIAL_LOOKBACK_MS
+        items = []
+        while start <= now:
+            end = min(start + WINDOW_MS, now)
+            items += fetch_all(call, category=self.category, startTime=start, endTime=end, limit=100)
+            start = end + 1
+
+        seen = set(self._seen[kind])
+        fresh = {}
+        for item in items:
+            if item[id_field] not in seen:
+                fresh[item[id_field]] = item  # Una ventana puede repetir el borde de la anterior
+        new = sorted(fresh.values(), key=lambda r: int(r[time_field]))
+        if new:
+            watermark = int(new[-1][time_field])
+            at_watermark = [r[id_field] for r in new if int(r[time_field]) == watermark]
+            if watermark == self.watermarks[kind]:
+                at_watermark += self._seen[kind]
+            self.watermarks[kind] = watermark
+            self._seen[kind] = at_watermark
+        if self.symbols is not None:
+            new = [r for r in new if r['symbol'] in self.symbols]
+        return new
+
+    def sync(self):
+        """
+        Trae los cierres y ejecuciones nuevos, los guarda y actualiza los agregados
+
+        Returns:
+            Lista de cierres nuevos (dicts de closed-pnl con 'cycle'), del más viejo al más nuevo
+        """
+        with self._lock:
+            closed = self._fetch_new('closed_pnl', self.session.get_closed_pnl, 'createdTime', 'orderId')
+            executions = self._fetch_new('executions', self.session.get_executions, 'execTime', 'execId')
+
+            for row in closed:
+                row['cycle'] = self.cycle_for(row['symbol'], int(row['createdTime']))
+                pnl = float(row['closedPnl'])
+                self.by_symbol.setdefault(row['symbol'], Aggregate()).add_trade(pnl)
+                if row['cycle']:
+                    self.by_cycle.setdefault(row['cycle'], Aggregate()).add_trade(pnl)
+            for row in executions:
+                row['cycle'] = self.cycle_for(row['symbol'], int(row['execTime']))
+                fee = float(row.get('execFee') or 0)
+                self.by_symbol.setdefault(row['symbol'], Aggregate()).fees += fee
+                if row['cycle']:
+                    self.by_cycle.setdefault(row['cycle'], Aggregate()).fees += fee
+
+            if closed:
+                write_part(os.path.join(self.path, "closed_pnl"), closed, CLOSED_PNL_COLUMNS)
+            if executions:
+                write_part(os.path.join(self.path, "executions"), executions, EXECUTION_COLUMNS)
+            if closed or executions:
+                self._save_state()
+            return closed
+
+    # ---------- lectores ----------
+    def symbol_stats(self, symbol) -> Aggregate:
+        return self.by_symbol.get(symbol) or Aggregate()
+
+    def cycle_stats(self, cycle) -> Aggregate:
+        return self.by_cycle.get(cycle) or Aggregate()
+
+    def totals(self) -> Aggregate:
+        total = Aggregate()
+        for aggregate in list(self.by_symbol.values()):
+            total.trades += aggregate.trades
+            total.wins += aggregate.wins
+            total.pnl += aggregate.pnl
+            total.fees += aggregate.fees
+        return total
+
+    def rebuild(self):
+        """Recalcula los agregados leyendo todos los lotes guardados"""
+        with self._lock:
+            by_symbol: Dict[str, Aggregate] = {}
+            by_cycle: Dict[str, Aggregate] = {}
+            for row in read_parts(os.path.join(self.path, "closed_pnl")):
+                pnl = float(row['closedPnl'])
+                by_symbol.setdefault(row['symbol'], Aggregate()).add_trade(pnl)
+                if row.get('cycle'):
+                    by_cycle.setdefault(row['cycle'], Aggregate()).add_trade(pnl)
+            for row in read_parts(os.path.join(self.path, "executions")):
+                fee = float(row.get('execFee') or 0)
+                by_symbol.setdefault(row['symbol'], Aggregate()).fees += fee
+                if row.get('cycle'):
+                    by_cycle.setdefault(row['cycle'], Aggregate()).fees += fee
+            self.by_symbol, self.by_cycle = by_symbol, by_cycle
+            self._save_state()
+
+    def metric_samples(self):
+        """Gauges para metrics.MetricsRegistry.add_collector"""
+        samples = []
+        for label, groups in (('symbol', self.by_symbol), ('cycle', self.by_cycle)):
+            for key, aggregate in list(groups.items()):
+                labels = {label: key}
+                samples += [
+                    ("pnl_usdt", labels, aggregate.pnl),
+                    ("trades", labels, aggregate.trades),
+                    ("win_rate", labels, aggregate.win_rate),
+                    ("fees_usdt", labels, aggregate.fees),
+                ]
+        return samples
@@ -0,0 +1,327 @@
+"""
+Capa de transporte REST: conexiones persistentes, caché DNS y reintentos.
+
+- configure_http(): monta en el requests.Session de pybit un adaptador con un pool
+  de conexiones del tamaño de la concurrencia del bot (por defecto requests guarda
+  10 y descarta las demás, que luego pagan otro handshake TLS) y TCP keep-alive.
+- install_dns_cache(): resuelve cada host de Bybit una vez cada `ttl` segundos.
+- warm_up() / start_keepalive(): abren las conexiones antes de la primera orden y las
+  mantienen vivas con una consulta liviana mientras el bot está inactivo.
+- RetryingSession: reintentos con espera exponencial y jitter para errores
+  transitorios (red, timeouts, 5xx, retCode 10000/10016). Las lecturas se reintentan
+  siempre; las escrituras solo si repetirlas es inocuo. Las órdenes nuevas llevan
+  orderLinkId: si una llamada responde 110072 (orderLinkId duplicado) es que un envío
+  anterior con ese orderLinkId sí llegó, y se devuelve esa orden en lugar de fallar.
+  Un cancel reintentado que responde 110001 (la orden no existe) se da por cancelado.
+
+Cada error se reintenta en una sola capa: red, 5xx, 10000 y 10016 aquí; 10006 (límite
+de peticiones) en RateLimitedSession, que espera según las cabeceras de límite. A pybit
+se le quita 10006 de sus retry_codes en configure_http (los demás los sigue manejando,
+p. ej. 10002 recv_window) y los reintentos de urllib3 quedan desactivados.
+"""
+import threading
+import time
+from collections import Counter
+
+from batch_orders import new_order_link_id
+from rate_limiter import RATE_LIMIT_CODE, WRITE_METHODS
+
+TRANSIENT_CODES = frozenset({
+    500, 502, 503, 504,  # HTTP
+    10000,  # Server timeout
+    10016,  # Server error / servicio reiniciando
+})
+DUPLICATE_ORDER_LINK_ID = 110072
+ORDER_NOT_EXISTS = 110001
+# Escrituras que se pueden repetir sin efectos duplicados
+IDEMPOTENT_WRITES = frozenset({
+    "cancel_order", "cancel_batch_order", "cancel_all_orders",
+    "amend_order", "amend_batch_order", "set_trading_stop",
+})
+PLACE_METHODS = frozenset({"place_order", "place_batch_order"})
+CANCEL_METHODS = frozenset({"cancel_order", "cancel_batch_order"})
+
+BYBIT_HOSTS = ("api.bybit.com", "api-testnet.bybit.com", "api.bytick.com", "api-demo.bybit.com")
+
+
+# ==================== CONEXIONES ====================
+def configure_http(http, pool_maxsize=32, tcp_keepalive=True):
+    """
+    Sustituye el adaptador HTTPS del cliente requests de pybit por uno con un pool
+    de `pool_maxsize` conexiones persistentes y TCP keep-alive
+
+    Sin efecto si la sesión no usa requests (p. ej. el exchange simulado).
+    """
+    retry_codes = getattr(http, "retry_codes", None)
+    if retry_codes:
+        # 10006 lo reintenta RateLimitedSession: si también lo hiciera pybit, cada
+        # límite se esperaría dos veces y las llamadas se multiplicarían
+        http.retry_codes = set(retry_codes) - {RATE_LIMIT_CODE}
+    client = getattr(http, "client", None)
+    if client is None:
+        return http
+    import socket
+
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection
+
+    options = list(HTTPConnection.default_socket_options)
+    if tcp_keepalive:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        for name, value in (("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 10), ("TCP_KEEPCNT", 3)):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+
+    class KeepAliveAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs["socket_options"] = options
+            super().init_poolmanager(*args, **kwargs)
+
+    # Sin reintentos de urllib3: los decide RetryingSession
+    adapter = KeepAliveAdapter(pool_connections=4, pool_maxsize=pool_maxsize, pool_block=False, max_retries=0)
+    client.mount("https://", adapter)
+    client.headers["Connection"] = "keep-alive"
+    return http
+
+
+def pool_stats(http):
+    """Conexiones abiertas y peticiones enviadas por el pool HTTPS (conexiones << peticiones = reutilización)"""
+    client = getattr(http, "client", None)
+    if client is None:
+        return {'connections': 0, 'requests': 0}
+    pools = client.get_adapter("https://").poolmanager.pools
+    connections = requests = 0
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is not None:
+            connections += pool.num_connections
+            requests += pool.num_requests
+    return {'connections': connections, 'requests': requests}
+
+
+def warm_up(session, connections=1):
+    """Abre `connections` conexiones en paralelo (handshake TCP + TLS) antes de operar"""
+    def ping(_):
+        try:
+            session.get_server_time()
+        except Exception as e:
+            print(f"Error al precalentar conexiones: {e}")
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+        list(pool.map(ping, range(max(1, connections))))
+
+
+def start_keepalive(session, interval=30.0):
+    """Consulta la hora del servidor cada `interval` segundos para que no se cierren las conexiones"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                session.get_server_time()
+            except Exception as e:
+                print(f"Error en keep-alive HTTP: {e}")
+
+    thread = threading.Thread(target=run, name="http-keepalive", daemon=True)
+    thread.start()
+    return thread
+
+
+# ==================== DNS ====================
+_dns_lock = threading.Lock()
+_dns_cache = {}
+_getaddrinfo = None  # socket.getaddrinfo original
+
+
+def install_dns_cache(ttl=300.0, hosts=BYBIT_HOSTS):
+    """Cachea socket.getaddrinfo para `hosts` durante `ttl` segundos (el resto se resuelve normal)"""
+    global _getaddrinfo
+    import socket
+
+    if _getaddrinfo is None:
+        _getaddrinfo = socket.getaddrinfo
+    hosts = frozenset(hosts)
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host not in hosts:
+            return _getaddrinfo(host, port, *args, **kwargs)
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        cached = _dns_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        result = _getaddrinfo(host, port, *args, **kwargs)
+        with _dns_lock:
+            _dns_cache[key] = (time.monotonic(), result)
+        return result
+
+    socket.getaddrinfo = getaddrinfo
+
+
+# ==================== REINTENTOS ====================
+def is_transient(error):
+    """Errores de red, timeouts y respuestas 5xx / 10000 / 10016"""
+    if getattr(error, "status_code", None) in TRANSIENT_CODES:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import requests
+    except ImportError:
+        return False
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class RetryingSession:
+    """
+    Envoltorio de la sesión con el mismo interfaz que reintenta los errores transitorios
+
+    Args:
+        session: sesión a envolver (RateLimitedSession, HTTP de pybit o el simulador)
+        attempts: intentos totales por llamada
+        base_delay, max_delay: espera exponencial con jitter completo entre intentos
+    """
+
+    def __init__(self, session, attempts=3, base_delay=0.2, max_delay=2.0):
+        self.session = session
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = Counter()  # Reintentos por método
+        self.recovered = 0  # Órdenes encontradas tras un 110072
+        self.already_cancelled = 0  # Cancels reintentados que respondieron 110001
+
+    def __getattr__(self, name):
+        attr = getattr(self.session, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        if name in PLACE_METHODS:
+            def call(**kwargs):
+                return self._place(name, attr, kwargs)
+        elif name in CANCEL_METHODS:
+            def call(**kwargs):
+                return self._call(name, attr, kwargs, on_retry=lambda attempt, r: self._recover_cancel(kwargs, attempt, r))
+        elif name in WRITE_METHODS and name not in IDEMPOTENT_WRITES:
+            return attr
+        else:
+            def call(**kwargs):
+                return self._call(name, attr, kwargs)
+        call.__name__ = name
+        return call
+
+    def _delay(self, attempt):
+        import random
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _call(self, name, fn, kwargs, on_retry=None):
+        """
+        on_retry(attempt, response): revisa cada respuesta (110072 puede llegar en el
+        primer intento si la orden ya se había enviado) y devuelve la que corresponde
+        """
+        for attempt in range(self.attempts):
+            last = attempt == self.attempts - 1
+            if attempt:
+                self.retries[name] += 1
+                time.sleep(self._delay(attempt - 1))
+            try:
+                response = fn(**kwargs)
+            except Exception as e:
+                code = getattr(e, "status_code", None)
+                if on_retry and code in (DUPLICATE_ORDER_LINK_ID, ORDER_NOT_EXISTS):
+                    # pybit lanza los retCode distintos de 0: un envío anterior sí llegó
+                    recovered = on_retry(attempt, {"retCode": code, "retMsg": str(e)})
+                    if recovered.get("retCode") == 0:
+                        return recovered
+                if last or not is_transient(e):
+                    raise
+                continue
+            if not isinstance(response, dict) or response.get("retCode") not in TRANSIENT_CODES or last:
+                return on_retry(attempt, response) if on_retry and isinstance(response, dict) else response
+        return response
+
+    # ---------- órdenes nuevas (idempotentes por orderLinkId) ----------
+    def _place(self, name, fn, kwargs):
+        if name == "place_order":
+            kwargs.setdefault("orderLinkId", new_order_link_id(kwargs.get("side", "O")[0]))
+            return self._call(name, fn, kwargs, on_retry=lambda attempt, r: self._recover_single(kwargs, r))
+        for order in kwargs.get("request", ()):
+            order.setdefault("orderLinkId", new_order_link_id(order.get("side", "O")[0]))
+        return self._call(name, fn, kwargs, on_retry=lambda attempt, r: self._recover_batch(kwargs, r))
+
+    def _find_order(self, category, symbol, order_link_id):
+        """Orden ya creada con ese orderLinkId (abierta o en el historial), o None"""
+        for method in ("get_open_orders", "get_order_history"):
+            try:
+                response = getattr(self.session, method)(
+                    category=category, symbol=symbol, orderLinkId=order_link_id
+                )
+            except Exception as e:
+                print(f"Error al buscar la orden {order_link_id}: {e}")
+                continue
+            for order in response.get('result', {}).get('list', []):
+                if order.get('orderLinkId') == order_link_id:
+                    return order
+        return None
+
+    def _recover_single(self, kwargs, response):
+        if response.get("retCode") != DUPLICATE_ORDER_LINK_ID:
+            return response
+        order = self._find_order(kwargs.get("category", "linear"), kwargs.get("symbol"), kwargs["orderLinkId"])
+        if order is None:
+            return response
+        self.recovered += 1
+        return {
+            "retCode": 0, "retMsg": "OK", "retExtInfo": {}, "time": int(time.time() * 1000),
+            "result": {'orderId': order['orderId'], 'orderLinkId': order['orderLinkId']},
+        }
+
+    def _recover_batch(self, kwargs, response):
+        if response.get("retCode") != 0:
+            return response
+        orders = response['result'].get('list', [])
+        statuses = (response.get('retExtInfo') or {}).get('list', [])
+        category = kwargs.get("category", "linear")
+        for i, request in enumerate(kwargs.get("request", ())):
+            if i >= len(statuses) or statuses[i].get('code') != DUPLICATE_ORDER_LINK_ID:
+                continue
+            order = self._find_order(category, request['symbol'], request['orderLinkId'])
+            if order is None:
+                continue
+            self.recovered += 1
+            statuses[i] = {'code': 0, 'msg': 'OK'}
+            if i < len(orders):
+                orders[i] = {**orders[i], 'orderId': order['orderId'], 'orderLinkId': order['orderLinkId']}
+        return response
+
+    # ---------- cancelaciones ----------
+    def _recover_cancel(self, kwargs, attempt, response):
+        """
+        En un reintento, 110001 (la orden no existe) significa que el intento anterior
+        la canceló aunque se perdió la respuesta: se devuelve como cancelada
+        """
+        if not attempt:
+            return response
+        if "request" not in kwargs:
+            if response.get("retCode") != ORDER_NOT_EXISTS:
+                return response
+            self.already_cancelled += 1
+            return {
+                "retCode": 0, "retMsg": "OK", "retExtInfo": {}, "time": int(time.time() * 1000),
+                "result": {'orderId': kwargs.get('orderId', ""), 'orderLinkId': kwargs.get('orderLinkId', "")},
+            }
+        if response.get("retCode") != 0:
+            return response
+        statuses = (response.get('retExtInfo') or {}).get('list', [])
+        for i, status in enumerate(statuses):
+            if status.get('code') == ORDER_NOT_EXISTS:
+                self.already_cancelled += 1
+                statuses[i] = {'code': 0, 'msg': 'OK'}
+        return response
+
+    def metric_samples(self):
+        """Contadores para metrics.MetricsRegistry.add_collector"""
+        samples = [("rest_retries", {'method': method}, count) for method, count in list(self.retries.items())]
+        samples.append(("rest_orders_recovered", {}, self.recovered))
+        samples.append(("rest_cancels_already_done", {}, self.already_cancelled))
+        return samples
@@ -0,0 +1,196 @@
+"""
+Estimadores de volatilidad en streaming y políticas de distancia del bracket.
+
+Los estimadores se actualizan con cada tick del stream de precios en O(1) y sin REST:
+
+- EwmaVolatility: varianza por segundo de los retornos logarítmicos con decaimiento
+  exponencial en el tiempo (vida media en segundos), válida con ticks irregulares.
+- AtrEstimator: velas de `bar_seconds` armadas con los ticks y ATR de Wilder sobre ellas,
+  expresado como fracción del cierre.
+
+VolatilityTracker mantiene ambos por símbolo y se registra como listener de
+PriceCache. Las políticas deciden la distancia de cada bracket:
+
+- FixedCyclePolicy: distancia fija de cada ciclo (comportamiento original).
+- VolatilityPolicy: multiplicador del ciclo x volatilidad actual, acotada entre un
+  mínimo y un máximo; mientras el estimador no tiene datos suficientes usa la fija.
+"""
+import math
+import threading
+from decimal import Decimal
+from typing import Dict, Optional
+
+from strategy import cycle_distance
+
+DISTANCE_QUANTUM = Decimal("0.0001")  # Distancias redondeadas a 0.01%
+
+
+class EwmaVolatility:
+    """Volatilidad realizada EWMA (por segundo) de una serie de precios"""
+
+    __slots__ = ("halflife", "variance", "samples", "_last_price", "_last_time")
+
+    def __init__(self, halflife=600.0):
+        self.halflife = halflife
+        self.variance = 0.0  # Varianza de retornos log por segundo
+        self.samples = 0
+        self._last_price = None
+        self._last_time = None
+
+    def update(self, price, timestamp):
+        if price <= 0:
+            return
+        if self._last_price is not None:
+            dt = timestamp - self._last_time
+            if dt <= 0:
+                return
+            r = math.log(price / self._last_price)
+            alpha = 1.0 - math.exp(-dt * math.log(2) / self.halflife)
+            self.variance += alpha * (r * r / dt - self.variance)
+            self.samples += 1
+        self._last_price = price
+        self._last_time = timestamp
+
+    def sigma(self, horizon):
+        """Desviación esperada del retorno en `horizon` segundos (fracción del precio)"""
+        return math.sqrt(self.variance * horizon)
+
+
+class AtrEstimator:
+    """ATR de Wilder sobre velas de tiempo fijo armadas con los ticks"""
+
+    __slots__ = ("bar_seconds", "period", "atr", "bars", "_bar_start", "_high", "_low", "_close", "_prev_close")
+
+    def __init__(self, bar_seconds=60.0, period=14):
+        self.bar_seconds = bar_seconds
+        self.period = period
+        self.atr = 0.0
+        self.bars = 0
+        self._bar_start = None
+        self._high = self._low = self._close = None
+        self._prev_close = None
+
+    def update(self, price, timestamp):
+        if self._bar_start is None:
+            self._bar_start = timestamp
+            self._high = self._low = self._close = price
+            return
+        if timestamp - self._bar_start >= self.bar_seconds:
+            self._close_bar()
+            # Saltar velas vacías si el stream estuvo quieto
+            self._bar_start += self.bar_seconds * ((timestamp - self._bar_start) // self.bar_seconds)
+            self._high = self._low = price
+        else:
+            self._high = max(self._high, price)
+            self._low = min(self._low, price)
+        self._close = price
+
+    def _close_bar(self):
+        high, low = self._high, self._low
+        if self._prev_close is not None:
+            high, low = max(high, self._prev_close), min(low, self._prev_close)
+        true_range = high - low
+        self.bars += 1
+        n = min(self.bars, self.period)
+        self.atr += (true_range - self.atr) / n
+        self._prev_close = self._close
+
+    def relative(self):
+        """ATR como fracción del último cierre"""
+        return self.atr / self._prev_close if self._prev_close else 0.0
+
+
+class SymbolVolatility:
+    __slots__ = ("ewma", "atr")
+
+    def __init__(self, halflife, bar_seconds, atr_period):
+        self.ewma = EwmaVolatility(halflife)
+        self.atr = AtrEstimator(bar_seconds, atr_period)
+
+    def update(self, price, timestamp):
+        self.ewma.update(price, timestamp)
+        self.atr.update(price, timestamp)
+
+
+class VolatilityTracker:
+    """
+    Estimadores por símbolo alimentados por el stream de precios.
+
+    Uso: price_cache.add_listener(tracker.on_price)
+    """
+
+    def __init__(self, halflife=600.0, bar_seconds=60.0, atr_period=14):
+        self.halflife = halflife
+        self.bar_seconds = bar_seconds
+        self.atr_period = atr_period
+        self.symbols: Dict[str, SymbolVolatility] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, symbol):
+        state = self.symbols.get(symbol)
+        if state is None:
+            with self._lock:
+                state = self.symbols.setdefault(
+                    symbol, SymbolVolatility(self.halflife, self.bar_seconds, self.atr_period)
+                )
+        return state
+
+    def update(self, symbol, price, timestamp):
+        self._state(symbol).update(float(price), timestamp)
+
+    def on_price(self, snapshot):
+        """Listener de PriceCache (PriceSnapshot con last y received_at)"""
+        self._state(snapshot.symbol).update(float(snapshot.last), snapshot.received_at)
+
+    def get(self, symbol) -> Optional[SymbolVolatility]:
+        return self.symbols.get(symbol)
+
+
+# ==================== POLÍTICAS DE DISTANCIA ====================
+class FixedCyclePolicy:
+    """Distancia fija de cada ciclo (DISTANCE_1 / DISTANCE_2)"""
+
+    def distance(self, symbol, cycle, params):
+        return cycle_distance(params, cycle)
+
+
+class VolatilityPolicy:
+    """
+    Distancia = multiplicador del ciclo x volatilidad del símbolo, acotada.
+
+    Args:
+        tracker: VolatilityTracker alimentado por el stream
+        multipliers: {ciclo: multiplicador} (p. ej. {'distance_1': 2, 'distance_2': 5})
+        estimator: "ewma" (sigma en `horizon` segundos) o "atr" (ATR relativo)
+        horizon: horizonte en segundos de la sigma EWMA
+        min_distance, max_distance: límites de la distancia resultante
+        min_samples: ticks (EWMA) o velas (ATR) mínimos antes de confiar en el estimador
+        fallback: política usada mientras no hay datos suficientes
+    """
+
+    def __init__(self, tracker, multipliers, estimator="ewma", horizon=3600.0,
+                 min_distance=Decimal("0.002"), max_distance=Decimal("0.1"), min_samples=50, fallback=None):
+        self.tracker = tracker
+        self.multipliers = multipliers
+        self.estimator = estimator
+        self.horizon = horizon
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.min_samples = min_samples
+        self.fallback = fallback or FixedCyclePolicy()
+
+    def volatility(self, symbol):
+        """Volatilidad relativa del símbolo, o None si todavía no es confiable"""
+        state = self.tracker.get(symbol)
+        if state is None:
+            return None
+        if self.estimator == "atr":
+            return state.atr.relative() if state.atr.bars >= self.min_samples else None
+        return state.ewma.sigma(self.horizon) if state.ewma.samples >= self.min_samples else None
+
+    def distance(self, symbol, cycle, params):
+        volatility = self.volatility(symbol)
+        if not volatility:
+            return self.fallback.distance(symbol, cycle, params)
+        raw = Decimal(repr(self.multipliers[cycle] * volatility)).quantize(DISTANCE_QUANTUM)
+        return min(self.max_distance, max(self.min_distance, raw))
@@ -0,0 +1,205 @@
+"""
+Cliente WebSocket mínimo para los streams v5 de Bybit.
+
+Maneja autenticación (streams privados), suscripción, ping de aplicación y
+reconexión. La URL es configurable para poder usar un servidor WebSocket local
+de pruebas en lugar de Bybit.
+"""
+import json
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+PRIVATE_URL = "wss://stream.bybit.com/v5/private"
+PRIVATE_URL_TESTNET = "wss://stream-testnet.bybit.com/v5/private"
+PUBLIC_URL = "wss://stream.bybit.com/v5/public/{category}"
+PUBLIC_URL_TESTNET = "wss://stream-testnet.bybit.com/v5/public/{category}"
+
+
+def private_url(testnet):
+    return PRIVATE_URL_TESTNET if testnet else PRIVATE_URL
+
+
+def public_url(testnet, category="linear"):
+    return (PUBLIC_URL_TESTNET if testnet else PUBLIC_URL).format(category=category)
+
+
+def auth_message(api_key, api_secret, expires_in=10):
+    """Mensaje de autenticación de Bybit: firma HMAC-SHA256 de 'GET/realtime{expires}'"""
+    import hashlib
+    import hmac
+
+    expires = int((time.time() + expires_in) * 1000)
+    signature = hmac.new(
+        api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256
+    ).hexdigest()
+    return {"op": "auth", "args": [api_key, expires, signature]}
+
+
+class BybitWebSocket:
+    """
+    Conexión WebSocket con reconexión automática.
+
+    on_message recibe cada mensaje con 'topic' ya decodificado. on_connect se llama
+    cada vez que la suscripción queda activa (también tras reconectar), lo que permite
+    resincronizar con REST los eventos perdidos durante la desconexión.
+
+    Si `max_reconnects` intentos seguidos no llegan a suscribirse, la conexión se
+    abandona y se llama a on_give_up (p. ej. para pasar a polling).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        topics: Iterable[str],
+        on_message: Callable[[dict], None],
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        on_connect: Optional[Callable[[], None]] = None,
+        ping_interval: float = 20,
+        reconnect_delay: float = 2,
+        max_reconnects: Optional[int] = None,
+        on_give_up: Optional[Callable[[], None]] = None,
+    ):
+        self.url = url
+        self.topics = list(topics)
+        self.on_message = on_message
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.on_connect = on_connect
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnects = max_reconnects
+        self.on_give_up = on_give_up
+        self.failures = 0  # Intentos seguidos sin llegar a suscribirse
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._ws = None
+        self._subscribed = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- ciclo de vida ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.connected.clear()
+        if self._ws is not None:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+
+    def wait_connected(self, timeout=None):
+        return self.connected.wait(timeout)
+
+    def subscribe(self, topics):
+        """Añade tópicos (se reenvían automáticamente al reconectar)"""
+        topics = [t for t in topics if t not in self.topics]
+        if not topics:
+            return
+        self.topics.extend(topics)
+        if self.connected.is_set():
+            self._send({"op": "subscribe", "args": topics})
+
+    # ---------- internos ----------
+    def _run(self):
+        import websocket  # dependencia de pybit (websocket-client)
+
+        while not self._stop.is_set():
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_raw_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            pinger = threading.Thread(target=self._ping_loop, args=(self._ws,), daemon=True)
+            pinger.start()
+            self._subscribed = False
+            self._ws.run_forever()
+            self.connected.clear()
+            if self._stop.is_set():
+                return
+            self.failures = 0 if self._subscribed else self.failures + 1
+            if self.max_reconnects and self.failures >= self.max_reconnects:
+                print(f"❌ WebSocket sin conexión tras {self.failures} intentos ({self.url})")
+                self._stop.set()
+                if self.on_give_up:
+                    try:
+                        self.on_give_up()
+                    except Exception as e:
+                        print(f"Error en on_give_up del WebSocket: {e}")
+                return
+            print(f"⚠️ WebSocket desconectado ({self.url}), reconectando...")
+            time.sleep(self.reconnect_delay)
+
+    def _send(self, payload):
+        try:
+            self._ws.send(json.dumps(payload))
+        except Exception as e:
+            print(f"Error al enviar por WebSocket: {e}")
+
+    def _ping_loop(self, ws):
+        while not self._stop.wait(self.ping_interval):
+            if self._ws is not ws:
+                return
+            try:
+                ws.send(json.dumps({"op": "ping"}))
+            except Exception:
+                return
+
+    def _subscribe_all(self):
+        if self.topics:
+            self._send({"op": "subscribe", "args": self.topics})
+
+    def _on_open(self, ws):
+        if self.api_key:
+            self._send(auth_message(self.api_key, self.api_secret))
+        else:
+            self._subscribe_all()
+
+    def _on_raw_message(self, ws, raw):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+
+        op = message.get("op")
+        if op == "auth":
+            if message.get("success"):
+                self._subscribe_all()
+            else:
+                print(f"❌ Autenticación WebSocket rechazada: {message.get('ret_msg')}")
+            return
+        if op == "subscribe":
+            if message.get("success"):
+                first = not self.connected.is_set()
+                self._subscribed = True
+                self.connected.set()
+                if first and self.on_connect:
+                    try:
+                        self.on_connect()
+                    except Exception as e:
+                        print(f"Error en on_connect del WebSocket: {e}")
+            else:
+                print(f"❌ Suscripción WebSocket rechazada: {message.get('ret_msg')}")
+            return
+        if "topic" not in message:
+            return
+
+        try:
+            self.on_message(message)
+        except Exception as e:
+            print(f"Error procesando mensaje WebSocket ({message.get('topic')}): {e}")
+
+    def _on_error(self, ws, error):
+        print(f"Error en WebSocket: {error}")
+
+    def _on_close(self, ws, *args):
+        self.connected.clear()